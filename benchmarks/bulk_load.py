@@ -0,0 +1,36 @@
+"""Time loading a large, FB15k-shaped CSV file into a KB.
+
+Usage (from the repo's root directory): `python benchmarks/bulk_load.py [rows] [workers]`
+
+Writes a synthetic tab-separated file of (subject, predicate, object) rows over
+15,000 entities and 237 predicates to a temporary directory, then loads it,
+cleansing rows in `workers` processes (see `KB.from_csv`).
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from zincbase import KB
+
+def write_rows(filename, rows):
+    random.seed(0)
+    with open(filename, 'w') as f:
+        for _ in range(rows):
+            f.write('e{}\tr{}\te{}\n'.format(random.randrange(15000), random.randrange(237),
+                                             random.randrange(15000)))
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, 'triples.tsv')
+        write_rows(filename, rows)
+        kb = KB()
+        start = time.time()
+        kb.from_csv(filename, delimiter='\t', workers=workers, verbose=True)
+        elapsed = time.time() - start
+    print('{} rows with {} workers in {:.2f}s: {:,.0f} rows/s'.format(
+        len(kb.rules), workers, elapsed, len(kb.rules) / elapsed))
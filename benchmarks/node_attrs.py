@@ -0,0 +1,41 @@
+"""Time reading and writing node attributes through `Node`, the innermost loop
+of simulations like `examples/abelian_sandpile.py`.
+
+Usage (from the repo's root directory): `python benchmarks/node_attrs.py [nodes] [rounds]`
+"""
+
+import sys
+import time
+
+from zincbase import KB
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    kb = KB()
+    kb.from_triples([('n{}'.format(i), 'next', 'n{}'.format(i + 1)) for i in range(n)])
+    nodes = [kb.node('n{}'.format(i)) for i in range(n)]
+    for node in nodes:
+        node.grains = 0
+
+    start = time.time()
+    for _ in range(rounds):
+        for node in nodes:
+            node.grains
+    get = (time.time() - start) / (n * rounds)
+
+    start = time.time()
+    for i in range(rounds):
+        for node in nodes:
+            node.grains = i
+    put = (time.time() - start) / (n * rounds)
+
+    start = time.time()
+    for _ in range(rounds):
+        for node in nodes:
+            node.grains += 1
+    increment = (time.time() - start) / (n * rounds)
+
+    assert all(node.grains == rounds * 2 - 1 for node in nodes)
+    print('{} nodes: get {:.2f}us ({:,.0f}/s), set {:.2f}us ({:,.0f}/s), += {:.2f}us ({:,.0f}/s)'.format(
+        n, get * 1e6, 1 / get, put * 1e6, 1 / put, increment * 1e6, 1 / increment))
@@ -0,0 +1,30 @@
+"""Measure how many statements per second the parser gets through.
+
+Usage (from the repo's root directory): `python benchmarks/parsing.py`
+"""
+
+import time
+
+from zincbase import KB
+from zincbase.logic.parser import parse_rule, parse_many
+
+N = 50000
+
+def workloads():
+    facts = ['neighbor(country{},country{})'.format(i, (i * 7) % 500) for i in range(N)]
+    rules = ['path{}(X,Z):-edge(X,Y),path{}(Y,Z),differ([X,Y],[Z|_])'.format(i, i) for i in range(N // 10)]
+    lists = ['route(r{},[{}])'.format(i, ','.join('stop{}'.format(j) for j in range(200)))
+             for i in range(N // 100)]
+    return [('facts', facts), ('rules', rules), ('200-element lists', lists)]
+
+def throughput(fn, statements):
+    start = time.time()
+    fn(statements)
+    return len(statements) / (time.time() - start)
+
+if __name__ == '__main__':
+    kb = KB()
+    for name, statements in workloads():
+        one_by_one = throughput(lambda s: [parse_rule(x) for x in s], statements)
+        bulk = throughput(parse_many, statements)
+        print('{}: {:,.0f}/s with parse_rule, {:,.0f}/s with parse_many'.format(name, one_by_one, bulk))
@@ -0,0 +1,44 @@
+"""Time finding shortest paths between random pairs of nodes in a large random graph,
+with `KB.paths`, and with `KB.bfs` on a much smaller graph for comparison.
+
+Usage (from the repo's root directory): `python benchmarks/paths.py [edges] [pairs]`
+"""
+
+import random
+import sys
+import time
+
+from zincbase import KB
+
+def build(n_edges, n_nodes):
+    kb = KB()
+    random.seed(0)
+    kb.from_triples([('n{}'.format(random.randrange(n_nodes)), 'p{}'.format(random.randrange(5)),
+                      'n{}'.format(random.randrange(n_nodes))) for _ in range(n_edges)])
+    return kb
+
+def timed(kb, fn, pairs):
+    times = []
+    for start, target in pairs:
+        began = time.time()
+        fn(start, target)
+        times.append(time.time() - began)
+    times.sort()
+    return times[len(times) // 2] * 1000, times[-1] * 1000
+
+if __name__ == '__main__':
+    n_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    kb = build(n_edges, n_edges // 4)
+    pairs = [('n{}'.format(random.randrange(n_edges // 4)), 'n{}'.format(random.randrange(n_edges // 4)))
+             for _ in range(n_pairs)]
+    lengths = [len(next(kb.paths(s, t, max_depth=30), [])) for s, t in pairs]
+    median, worst = timed(kb, lambda s, t: next(kb.paths(s, t, max_depth=30), None), pairs)
+    print('{} edges: paths median {:.2f}ms, max {:.2f}ms (median length {})'.format(
+        n_edges, median, worst, sorted(lengths)[len(lengths) // 2]))
+    small = build(2000, 500)
+    pairs = [('n{}'.format(random.randrange(500)), 'n{}'.format(random.randrange(500))) for _ in range(10)]
+    median, worst = timed(small, lambda s, t: next(small.paths(s, t, max_depth=6), None), pairs)
+    print('2000 edges, depth 6: paths median {:.2f}ms, max {:.2f}ms'.format(median, worst))
+    median, worst = timed(small, lambda s, t: next(small.bfs(s, t, max_depth=6), None), pairs)
+    print('2000 edges, depth 6: bfs median {:.2f}ms, max {:.2f}ms'.format(median, worst))
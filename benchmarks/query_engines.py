@@ -0,0 +1,42 @@
+"""Compare the breadth-first and depth-first query engines on the Countries dataset.
+
+Usage (from the repo's root directory): `python benchmarks/query_engines.py`
+
+Both engines must produce the same answers; only the time differs.
+"""
+
+import time
+
+from zincbase import KB
+
+def build(engine):
+    kb = KB(engine=engine)
+    kb.from_csv('./assets/countries_s1_train.csv', delimiter='\t')
+    kb.store('in_region(X, R) :- locatedin(X, R)')
+    kb.store('two_hops(X, Z) :- neighbor(X, Y), neighbor(Y, Z)')
+    return kb
+
+def workload(kb):
+    countries = sorted(set(str(r.head.args[0]) for r in kb.rules
+                           if r.head.pred == 'neighbor' and not r.goals))
+    queries = ['locatedin({}, Where)'.format(c) for c in countries]
+    queries += ['in_region({}, Where)'.format(c) for c in countries]
+    queries += ['two_hops({}, Z)'.format(c) for c in countries[:40]]
+    queries += ['locatedin(X, europe)', 'neighbor(X, Y)']
+    return queries
+
+def run(kb, queries):
+    start = time.time()
+    answers = [sorted(map(str, kb.query(q))) for q in queries]
+    return time.time() - start, answers
+
+if __name__ == '__main__':
+    timings = {}
+    results = {}
+    for engine in ('bfs', 'dfs'):
+        kb = build(engine)
+        queries = workload(kb)
+        timings[engine], results[engine] = run(kb, queries)
+        print('{}: {} queries in {:.3f}s'.format(engine, len(queries), timings[engine]))
+    assert results['bfs'] == results['dfs'], 'Engines disagree'
+    print('Speedup of dfs over bfs: {:.1f}x'.format(timings['bfs'] / timings['dfs']))
@@ -0,0 +1,54 @@
+"""Time the game of life (see `examples/game_of_life.py`) stepped with `KB.simulate`,
+and stepped one node at a time, as the example used to, on a smaller grid.
+
+Usage (from the repo's root directory): `python benchmarks/simulate.py [size] [steps]`
+"""
+
+import random
+import sys
+import time
+
+from zincbase import KB
+
+def build(size):
+    kb = KB()
+    random.seed(0)
+    kb.from_triples([(str((y * size) + x), 'neighbors', str(((y + dy) * size) + x + dx))
+                     for y in range(size) for x in range(size)
+                     for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                     if (dy or dx) and 0 <= y + dy < size and 0 <= x + dx < size])
+    for name, attrs in kb.G.nodes(data=True):
+        attrs['state'] = int(random.random() < 0.4)
+    return kb
+
+def life(state, adjacency):
+    alive = state[:, 0] == 1
+    live = adjacency @ alive.astype(int)
+    return ((live == 3) | (alive & (live == 2))).astype(int)[:, None]
+
+def step_nodes(kb):
+    next_states = {}
+    for name in kb.G:
+        n = kb.node(name)
+        live = sum(1 for nn, _ in n.neighbors if kb.node(nn).state)
+        next_states[name] = int(live == 3 or (n.state == 1 and live == 2))
+    with kb.dont_propagate():
+        for name, state in next_states.items():
+            kb.node(name).state = state
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    kb = build(size)
+    start = time.time()
+    kb.simulate(life, ['state'], steps=steps)
+    elapsed = time.time() - start
+    print('{}x{} grid, {} steps with simulate: {:.2f}s ({:.0f} cell updates/s)'.format(
+        size, size, steps, elapsed, size * size * steps / elapsed))
+    small = build(100)
+    start = time.time()
+    for _ in range(2):
+        step_nodes(small)
+    elapsed = time.time() - start
+    print('100x100 grid, 2 steps a node at a time: {:.2f}s ({:.0f} cell updates/s)'.format(
+        elapsed, 100 * 100 * 2 / elapsed))
@@ -0,0 +1,38 @@
+"""Time saving a KB as a snapshot and loading it back, against re-storing every fact.
+
+Usage (from the repo's root directory): `python benchmarks/snapshot.py [facts]`
+
+Builds a KB of random (subject, predicate, object) facts over 15,000 entities and
+237 predicates, with a numeric attribute on every entity.
+"""
+
+import random
+import sys
+import tempfile
+import time
+
+from zincbase import KB
+
+if __name__ == '__main__':
+    facts = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(0)
+    kb = KB()
+    kb.bulk_load(('e{}'.format(random.randrange(15000)), 'r{}'.format(random.randrange(237)),
+                  'e{}'.format(random.randrange(15000))) for _ in range(facts))
+    for node in kb.G.nodes:
+        kb.G.nodes[node]['weight'] = random.random()
+    with tempfile.TemporaryDirectory() as dirname:
+        start = time.time()
+        kb.save_all(dirname)
+        saved = time.time() - start
+        start = time.time()
+        loaded = KB()
+        loaded.load_all(dirname)
+        elapsed = time.time() - start
+    start = time.time()
+    restored = KB()
+    for rule in kb.rules:
+        restored.store(str(rule.head))
+    restored_elapsed = time.time() - start
+    print('{} facts: saved in {:.2f}s, loaded in {:.2f}s ({:,.0f} facts/s); storing them again took {:.2f}s'.format(
+        len(loaded.rules), saved, elapsed, len(loaded.rules) / elapsed, restored_elapsed))
@@ -0,0 +1,35 @@
+"""Measure the memory taken by stored terms, and the speed of unifying them.
+
+Usage (from the repo's root directory): `python benchmarks/terms.py`
+"""
+
+import time
+import tracemalloc
+
+from zincbase import KB
+from zincbase.logic.common import build_term, unify
+
+N = 100000
+
+def make_facts():
+    return [build_term('likes', [build_term('person{}'.format(i), []),
+                                 build_term('thing{}'.format(i % 100), [])])
+            for i in range(N)]
+
+if __name__ == '__main__':
+    kb = KB()
+    tracemalloc.start()
+    facts = make_facts()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{} facts: {:.0f} bytes per fact'.format(N, size / N))
+
+    goal = build_term('likes', [build_term('X', []), build_term('thing7', [])])
+    start = time.time()
+    matches = 0
+    for fact in facts:
+        bindings = {}
+        if unify(fact, {}, goal, bindings):
+            matches += 1
+    assert matches == N // 100
+    print('{} unifications in {:.3f}s'.format(N, time.time() - start))
@@ -9,8 +9,9 @@ The defaults are 15 for both recursion and propagation. You'll see sandpiles of
 but increase too much and Python/your computer might not like it. Alternatively,
 set the values low like `1 1` if you prefer to watch the pretty animation.
 
-On a reasonable computer, limits of 100000 work ok, but if you change the grid
-size (MAX_Y & MAX_X in the code below), that's probably going to be too much.
+Changes propagate through a queue (see `KB.set_propagation_mode`) rather than
+by watch functions calling each other, so however high the limits, topplings
+don't pile up on the Python stack.
 """
 
 import random
@@ -26,6 +27,7 @@ import torch
 from zincbase import KB
 
 kb = KB()
+kb.set_propagation_mode('queue')
 
 MAX_Y = 100
 MAX_X = 100
@@ -126,10 +128,10 @@ while True:
     if q == 113: # 'q'
         cv2.destroyAllWindows()
         import sys; sys.exit(0)
-    unstable_nodes = list(kb.filter(lambda x: x.grains > 3))
-    # filter_fast can be up to ~2.5x faster than version above,
-    # depending on the size of the grid. Here's the alternative:
-    # unstable_nodes = list(kb.filter_fast(lambda x: x[:, 0] > 3, attributes=['grains']))
+    unstable_nodes = list(kb.filter_fast(lambda x: x[:, 0] > 3, attributes=['grains']))
+    # filter_fast tests every cell's grains at once, as a NumPy array. It's much
+    # faster than testing one node at a time, which would be:
+    # unstable_nodes = list(kb.filter(lambda x: x.grains > 3))
     try:
         toppler = random.choice(unstable_nodes)
     except IndexError:
@@ -1,5 +1,8 @@
 """This file simulates the famous Conway's Game of Life cellular automata.
 There's no pressing need to do this using Zincbase -- it's just a demo.
+
+It runs on `kb.simulate`, which steps every cell at once, so the grid can be
+made much bigger (MAX_Y & MAX_X) than if it stepped one node at a time.
 """
 
 import random
@@ -33,41 +36,25 @@ for y in range(MAX_Y):
             if y_n >= 0 and x_n >= 0 and y_n < MAX_Y and x_n < MAX_X:
                 kb.store(f'neighbors({(y * MAX_X) + x}, {(y_n * MAX_X) + x_n})')
 
-def graph_to_array():
-    arr = []
-    for y in range(MAX_Y):
-        for x in range(MAX_X):
-            arr.append(kb.node((y * MAX_X) + x).state)
-    return arr
-
-cv2.namedWindow("gol", cv2.WINDOW_NORMAL)
+def life(state, adjacency):
+    """One generation for every cell at once: `adjacency @ alive` counts each cell's live neighbors."""
+    alive = state[:, 0] == 1
+    live_neighbors = adjacency @ alive.astype(int)
+    return ((live_neighbors == 3) | (alive & (live_neighbors == 2))).astype(int)[:, None]
 
-while True:
-    arr = graph_to_array()
-    arr = torch.tensor(arr).view(MAX_Y, MAX_X)
-    arr = np.int8(arr) * 255
+def show(step, state):
+    # The cells were stored in order, so the state's rows are the grid's, row by row.
+    arr = np.int8(state[:, 0].reshape(MAX_Y, MAX_X)) * 255
     img = Image.fromarray(arr).convert('RGB')
     img = np.array(img)
     cv2.imshow("gol", img)
     q = cv2.waitKey(1)
     if q == 113: # 'q'
         cv2.destroyAllWindows()
-        import sys; sys.exit(0)
-    with kb.dont_propagate():
-        for node in range(MAX_Y*MAX_X):
-            n = kb.node(node)
-            live_neighbors = sum([1 if kb.node(nn[0]).state else 0 for nn in n.neighbors])
-            if n.state == 1:
-                if live_neighbors not in (2, 3):
-                    n.next_state = 0
-                else:
-                    n.next_state = n.state
-            else:
-                if live_neighbors == 3:
-                    n.next_state = 1
-                else:
-                    n.next_state = n.state
-        for node in range(MAX_Y*MAX_X):
-            n = kb.node(node)
-            n.state = n.next_state
-            n.next_state = None
\ No newline at end of file
+        return False
+
+cv2.namedWindow("gol", cv2.WINDOW_NORMAL)
+
+# The generations are computed with NumPy and shown as they go; the cells' `state`
+# attributes are set to the last one when the window is closed with 'q'.
+kb.simulate(life, ['state'], steps=10 ** 9, preds=['neighbors'], on_step=show)
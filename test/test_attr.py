@@ -70,6 +70,9 @@ assert len(tom.neighbors) == 1
 assert tom.neighbors[0][0] == 'shamala'
 assert len(tom.neighbors[0][1]) == 1
 assert tom.neighbors[0][1][0]['pred'] == 'knows'
+assert tom.out_neighbors == tom.neighbors
+assert tom.in_neighbors == []
+assert shamala.in_neighbors == [('tom', [{'pred': 'knows'}])]
 
 fn_was_called = False
 def watch_fn(node, prev_val):
@@ -107,6 +110,23 @@ assert kb.edge(3, 'connected_nodes', 4).power_level == 3
 kb.edge(3, 'connected_nodes', 4).power_level = 'high'
 assert kb.edge(3, 'connected_nodes', 4).power_level == 'high'
 
+# filter_fast agrees with filter, and keeps up with attributes as they change.
+def fast(fn, attributes=['grains']):
+    return sorted(map(str, kb.filter_fast(fn, attributes=attributes)))
+def slow(fn):
+    return sorted(map(str, kb.filter(fn)))
+assert fast(lambda x: x[:, 0] >= 3) == slow(lambda x: x.grains is not None and x.grains >= 3) == ['jeraca', 'shamala', 'tom']
+kb.node('tom').grains = 7
+kb.node('jeraca').grains = 'lots'
+assert fast(lambda x: x[:, 0] >= 3) == ['shamala', 'tom']
+del kb.node('shamala')['grains']
+kb.store('connected_nodes(5, 6)', node_attributes=[{'x': 5, 'grains': 9}, {'x': 6}])
+kb.from_triples([('7', 'connected_nodes', '8', [{'x': 7}, {'x': 8, 'grains': True}], {})])
+assert fast(lambda x: x[:, 0] >= 1) == ['5', '8', 'tom']
+assert fast(lambda x: x[:, 0] < x[:, 1], attributes=['x', 'grains']) == ['5']
+assert fast(lambda x: x[:, 0] > 0, attributes=['x']) == ['3', '4', '5', '6', '7', '8']
+assert fast(lambda x: x[:, 0] > 0, attributes=['nothing']) == []
+
 kb = KB()
 kb.from_csv('./assets/countries_s1_train.csv', delimiter='\t')
 kb.node('mali').zig = 123
@@ -122,6 +142,14 @@ assert len(mali) == 1
 assert mali[0].zig == 123
 assert 'zig' in mali[0]
 assert '_watches' not in mali[0]
+# A node reads and writes the graph's attribute dict itself.
+kb.G.nodes['mali']['zag'] = 1
+assert kb.node('mali').zag == 1
+kb.node('mali').zag = 2
+assert kb.G.nodes['mali']['zag'] == 2
+del kb.node('mali')['zag']
+assert 'zag' not in kb.G.nodes['mali']
+assert kb.node('mali').zag is None
 
 edges = list(kb.edges())
 assert len(edges) == 1111
@@ -131,4 +159,11 @@ kb.store('itisin(mali, western_africa)', edge_attributes={'def_want_visit': True
 edges = list(kb.edges(lambda x: x.pred == 'itisin' and x.nodes[0] == 'mali'))
 assert edges[0]['def_want_visit'] == True
 
+kb = KB()
+kb.from_triples([('tom', 'knows', 'shamala'), ('tom', 'likes', 'shamala'), ('jeraca', 'likes', 'shamala')])
+assert sorted((n, sorted(e['pred'] for e in edges)) for n, edges in kb.node('shamala').in_neighbors) == \
+    [('jeraca', ['likes']), ('tom', ['knows', 'likes'])]
+assert kb.out_neighbors('jeraca') == [('shamala', [{'pred': 'likes'}])]
+assert list(kb.bfs('shamala', 'jeraca', reverse=True)) == [[('likes', 'jeraca')]]
+
 print('All attribute tests passed.')
\ No newline at end of file
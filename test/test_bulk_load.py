@@ -0,0 +1,82 @@
+"""Test that bulk loading gives the same KB as storing one fact at a time."""
+
+import context
+
+from zincbase import KB
+
+rows = [('tom', 'knows', 'ann'), ('ann', 'knows', 'bob'), ('tom', 'likes', 'sushi'),
+        ('bob', 'knows', 'tom'), ('ann', 'has', '[cat, dog]'), ('bob', 'likes', 'new york'),
+        ('sushi', 'is', 'food', [{'tasty': True}, {'category': 1}], {'weight': 2}),
+        ('tom', 'hates', 'bob', [], {'truthiness': -1})]
+
+def build(bulk):
+    kb = KB()
+    kb.store('knows(tom, shamala)')
+    seen = []
+    kb.node('tom').watch_for_new_neighbor(lambda neighbor: seen.append(str(neighbor)))
+    if bulk:
+        stats = kb.bulk_load(rows, batch_size=3)
+        assert stats['rows'] == len(rows); assert stats['rows_per_sec'] > 0
+        assert kb.last_load_stats is stats
+    else:
+        for row in rows:
+            statement = '{}({}, {})'.format(row[1], row[0], row[2])
+            if len(row) > 3:
+                kb.store(statement, node_attributes=row[3], edge_attributes=row[4])
+            else:
+                kb.store(statement)
+    return kb, seen
+
+stored, stored_seen = build(False)
+loaded, loaded_seen = build(True)
+assert [str(r) for r in loaded.rules] == [str(r) for r in stored.rules]
+assert list(map(str, loaded._neg_examples)) == list(map(str, stored._neg_examples))
+nodes = lambda kb: [(n, {k: v for k, v in d.items() if k not in ('_watches', '_new_neighbor_fn')})
+                     for n, d in kb.G.nodes(data=True)]
+assert nodes(loaded) == nodes(stored)
+assert list(loaded.G.edges(keys=True, data=True)) == list(stored.G.edges(keys=True, data=True))
+assert sorted(loaded_seen) == sorted(stored_seen) == ['ann', 'sushi']
+for query in ('knows(X, Y)', 'has(ann, [X | _])', 'likes(bob, X)', 'is(sushi, food)'):
+    assert list(loaded.query(query)) == list(stored.query(query))
+assert loaded.node('sushi').tasty; assert loaded.edge('sushi', 'is', 'food').weight == 2
+
+# Ids for the KG model: every subject, then every object.
+kb = KB()
+kb.bulk_load([('a', 'r', 'b'), ('c', 's', 'a'), ('b', 'r', 'd')])
+assert list(kb._entity2id) == ['a', 'c', 'b', 'd']; assert list(kb._relation2id) == ['r', 's']
+
+# Loading makes earlier answers stale.
+kb = KB(query_cache_size=10)
+kb.table('reach')
+kb.store('reach(X, Y) :- edge(X, Y)')
+kb.store('reach(X, Y) :- reach(X, Z), edge(Z, Y)')
+kb.store('edge(a, b)')
+assert len(list(kb.query('reach(a, Y)'))) == 1
+kb.from_triples([('b', 'edge', 'c'), ('c', 'edge', 'a')])
+assert len(list(kb.query('reach(a, Y)'))) == 3
+
+# Streaming from_csv, with rows cleansed in this process or in a pool of workers.
+import os, tempfile
+with tempfile.TemporaryDirectory() as dirname:
+    csvfile = os.path.join(dirname, 'kb.csv')
+    with open(csvfile, 'w') as f:
+        f.write('subject,pred,object\n')
+        f.write('Tom,likes,Sushi\n')
+        f.write('ann,knows,tom,"{""age"": 30}","{}","{""since"": 2019}"\n')
+        f.write('bad one!,knows,tom\n')
+        for i in range(50):
+            f.write('person {},lives in,city{}\n'.format(i, i % 7))
+    kbs = []
+    for workers in (0, 2):
+        kb = KB()
+        kb.from_csv(csvfile, header=True, workers=workers, chunk_size=4)
+        kbs.append(kb)
+        assert len(kb.rules) == 52; assert str(kb.rules[0]) == 'likes(tom, sushi)'
+        assert kb.node('ann').age == 30; assert kb.edge('ann', 'knows', 'tom').since == 2019
+        assert list(kb.query('lives_in(person_3, X)')) == [{'X': 'city3'}]
+    assert [str(r) for r in kbs[0].rules] == [str(r) for r in kbs[1].rules]
+    kb = KB()
+    kb.from_csv(csvfile, header=True, start=2, size=5, workers=2, chunk_size=2)
+    assert [str(r) for r in kb.rules] == [str(r) for r in kbs[0].rules[1:7]]
+
+print('All bulk load tests passed.')
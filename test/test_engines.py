@@ -0,0 +1,56 @@
+"""Both query engines must give the same answers."""
+
+import context
+
+from zincbase import KB
+
+def build(engine):
+    kb = KB(engine=engine)
+    kb.store('parent(tom, bob)'); kb.store('parent(bob, ann)'); kb.store('parent(ann, joe)')
+    kb.store('ancestor(X, Y) :- parent(X, Y)')
+    kb.store('ancestor(X, Y) :- parent(X, Z), ancestor(Z, Y)')
+    kb.store('append([ ], List, List)')
+    kb.store('append([Head | Tail], List, [Head | Result]) :- append(Tail, List, Result)')
+    kb.store('endless(X):-endless(X)')
+    kb.store('likes(tom, X)')
+    return kb
+
+queries = ['ancestor(tom, X)', 'ancestor(X, joe)', 'ancestor(X, Y)', 'ancestor(bob, tom)',
+           'parent(_, X)', 'parent(tom, _)', 'append(X, Y, [a, b, c])',
+           'append([a], [b, c], X)', 'endless(zig)', 'likes(tom, sushi)', 'likes(tom, X)']
+
+bfs = build('bfs')
+dfs = build('dfs')
+for q in queries:
+    a = sorted(map(str, bfs.query(q)))
+    b = sorted(map(str, dfs.query(q)))
+    assert a == b, (q, a, b)
+
+# Storing into the first of several KBs works on its own graph.
+bfs.store('knows(zed, yan)')
+assert list(bfs.query('knows(zed, X)')) == [{'X': 'yan'}]
+bfs.node('yan').age = 3
+assert bfs.G.nodes['yan']['age'] == 3 and 'yan' not in dfs.G
+
+b = list(dfs.query('append(X, Y, [a, b])'))
+assert b == [{'X': '[]', 'Y': '[a,b]'}, {'X': '[a]', 'Y': '[b]'}, {'X': '[a,b]', 'Y': '[]'}]
+assert list(dfs.query('ancestor(tom, ann)')) == [True]
+assert list(dfs.query('endless(zig)')) == []
+assert dfs.last_query_stats.cutoff == 'max_steps'
+assert list(dfs.query('endless(zig)', max_steps=float('inf'), timeout_ms=10)) == []
+assert dfs.last_query_stats.cutoff == 'timeout'
+assert list(dfs.query('ancestor(tom, X)', limit=1)) == [{'X': 'bob'}]
+assert dfs.last_query_stats.cutoff == 'limit'
+
+# Unifying a variable with another term for the same variable mustn't bind it to itself.
+dfs.store('same(Y, Y)')
+assert list(dfs.query('same(X, X)')) == [True]
+assert list(dfs.query('same(a, X)')) == [{'X': 'a'}]
+
+try:
+    KB(engine='magic')
+    assert False
+except ValueError:
+    pass
+
+print('All engine tests passed.')
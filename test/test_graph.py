@@ -88,4 +88,69 @@ try:
 except KeyError:
     assert True
 
+# Many predicates between the same pair, and the same fact stored more than once.
+kb = KB()
+kb.from_triples([('hub', 'rel{}'.format(i), 'spoke') for i in range(100)])
+kb.from_triples([('hub', 'rel7', 'spoke', [{}, {}], {'weight': 7})])
+edge = kb.edge('hub', 'rel7', 'spoke')
+assert edge.weight is None # the first rel7 edge has no weight...
+assert edge.attrs == {'weight': 7} # ...the last does
+edge.weight = 8
+assert [d.get('weight') for d in kb.G['hub']['spoke'].values() if d['pred'] == 'rel7'] == [8, 8]
+kb.from_triples([('hub', 'rel7', 'spoke')])
+edge.weight = 9
+assert [d.get('weight') for d in kb.G['hub']['spoke'].values() if d['pred'] == 'rel7'] == [9, 9, 9]
+assert kb.edge('hub', 'rel8', 'spoke').weight is None
+assert kb.edge('hub', 'no_pred', 'spoke').weight is None
+assert kb.edge('hub', 'no_pred', 'spoke').attrs == False
+kb.edge('hub', 'no_pred', 'spoke').weight = 1
+assert kb._global_propagations == 0
+kb.store('no_pred(hub, spoke)')
+assert kb.edge('hub', 'no_pred', 'spoke').weight is None
+kb.edge('hub', 'no_pred', 'spoke').weight = 1
+assert kb.edge('hub', 'no_pred', 'spoke').attrs == {'weight': 1}
+
+# attrs is a read-only view, without the keys kept for internal use; attrs_copy is a copy.
+kb = KB()
+kb.store('likes(ann, tea)', node_attributes=[{'tags': ['x']}, {}], edge_attributes={'weight': 1})
+ann = kb.node('ann')
+ann.watch('tags', lambda node, prev: None)
+ann.watch_for_new_neighbor(lambda neighbor: None)
+view = ann.attrs
+copied = ann.attrs_copy()
+assert view == {'tags': ['x']} and copied == {'tags': ['x']}
+assert len(view) == 1 and list(view) == ['tags'] and '_watches' not in view
+assert repr(view) == "{'tags': ['x']}"
+ann.tags.append('y')
+ann.age = 30
+assert view == {'tags': ['x', 'y'], 'age': 30}
+assert copied == {'tags': ['x']}
+try:
+    view['age'] = 31
+    assert False
+except TypeError:
+    pass
+try:
+    view['_watches']
+    assert False
+except KeyError:
+    pass
+edge_view = kb.edge('ann', 'likes', 'tea').attrs
+assert edge_view == {'weight': 1} and 'pred' not in edge_view
+kb.edge('ann', 'likes', 'tea').weight = 2
+assert edge_view['weight'] == 2
+assert kb.edge('ann', 'likes', 'tea').attrs_copy() == {'weight': 2}
+assert type(kb.node('tea').attrs_copy()) is dict
+kb.store('likes(tea, ann)')
+assert kb.edge('tea', 'likes', 'ann').attrs_copy() == {}
+assert kb.edge('tea', 'nope', 'ann').attrs_copy() == False
+
+import csv, json, os, tempfile
+with tempfile.TemporaryDirectory() as dirname:
+    kb.to_csv(os.path.join(dirname, 'kb.csv'))
+    with open(os.path.join(dirname, 'kb.csv')) as f:
+        rows = list(csv.reader(f))
+assert rows[0][:3] == ['ann', 'likes', 'tea']
+assert [json.loads(x) for x in rows[0][3:]] == [{'tags': ['x', 'y'], 'age': 30}, {}, {'weight': 2}]
+
 print('All graph tests passed.')
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Test secondary indexes on node and edge attributes, and `where` filters."""
+
+import random
+import tempfile
+
+import numpy as np
+
+import context
+
+from zincbase import KB
+from zincbase.graph.AttributeIndex import AttributeIndexes, passes, conditions, select
+
+random.seed(0)
+kb = KB()
+kb.from_triples([('n{}'.format(i), 'next', 'n{}'.format(i + 1)) for i in range(200)])
+values = [0, 1, 2, 2.5, 3, True, False, 'a', 'b', 'zz', None, [1], (1, 2), float('nan')]
+for i in range(201):
+    if random.random() < 0.8:
+        kb.node('n{}'.format(i)).grains = random.choice(values)
+    if random.random() < 0.5:
+        kb.node('n{}'.format(i)).color = random.choice(['red', 'green', 'blue'])
+
+queries = [{'grains': 2}, {'grains': ('>', 1)}, {'grains': ('<=', 2)}, {'grains': ('>=', 'b')},
+           {'grains': ('!=', 2)}, {'grains': ('in', [1, 'a', (1, 2)])}, {'grains': ('in', 'zz')},
+           {'grains': [('>', 0), ('<', 3)]}, {'grains': ('==', [1])}, {'grains': True},
+           {'grains': ('>', 0), 'color': 'red'}, {'color': ('in', ('red', 'blue'))}, {'nothing': 1}]
+
+def brute(where):
+    conds = conditions(where)
+    return sorted(name for name, attrs in kb.G.nodes(data=True) if passes(attrs, conds))
+
+def check():
+    for where in queries:
+        assert sorted(map(str, kb.filter(where=where))) == brute(where), where
+        assert sorted(map(str, kb.nodes(where=where))) == brute(where), where
+
+check()
+kb.create_index('grains', sorted=True)
+check()
+kb.create_index('grains')
+kb.create_index('color')
+check()
+
+# Indexes keep up with every way of setting and deleting attributes.
+for i in range(300):
+    node = kb.node('n{}'.format(random.randrange(201)))
+    if random.random() < 0.2:
+        if 'grains' in node:
+            del node['grains']
+    else:
+        node.grains = random.choice(values)
+kb.store('next(n500, n501)', node_attributes=[{'grains': 2}, {'grains': 'a'}])
+kb.from_triples([('n600', 'next', 'n601', [{'grains': 1.5}, {'color': 'red'}], {})])
+check()
+
+# Filtering with candidates, and with a test function as well.
+assert sorted(map(str, kb.filter(where={'grains': ('<', 100)}, candidate_nodes=['n500', 'n501', 'n600']))) == ['n500', 'n600']
+assert list(map(str, kb.filter(lambda x: x.grains > 1.9, where={'grains': ('<', 100)}, candidate_nodes=['n500', 'n600']))) == ['n500']
+
+# An indexed condition is answered without looking at every node.
+indexes = AttributeIndexes()
+indexes.create('grains', True, [('a', {'grains': 1}), ('b', {'grains': 5}), ('c', {'grains': 'x'})])
+def every_key():
+    raise AssertionError('scanned')
+assert select({'grains': ('>', 2)}, indexes, every_key, {'a': {'grains': 1}, 'b': {'grains': 5}}.get) == ['b']
+indexes.create('g', True, [('a', {'g': np.int64(5)}), ('b', {'g': np.float32(2.5)}), ('c', {'g': 1})])
+assert select({'g': ('>', 2)}, indexes, every_key, {}.get) == ['b', 'a']
+
+# Edges, including by predicate.
+kb.store('likes(n1, n2)', edge_attributes={'weight': 3})
+kb.edge('n1', 'next', 'n2').weight = 1
+kb.create_index('pred', edges=True)
+kb.create_index('weight', sorted=True, edges=True)
+kb.edge('n2', 'next', 'n3').weight = 5
+kb.store('likes(n3, n4)', edge_attributes={'weight': 4})
+assert sorted(map(str, kb.edges(where={'pred': 'likes'}))) == ['n1___likes___n2', 'n3___likes___n4']
+assert sorted(map(str, kb.edges(where={'weight': ('>=', 3)}))) == ['n1___likes___n2', 'n2___next___n3', 'n3___likes___n4']
+assert list(map(str, kb.edges(where={'pred': 'next', 'weight': ('<', 2)}))) == ['n1___next___n2']
+del kb.edge('n2', 'next', 'n3')['weight']
+assert sorted(map(str, kb.edges(where={'weight': ('>=', 3)}))) == ['n1___likes___n2', 'n3___likes___n4']
+kb.drop_index('weight', edges=True)
+assert sorted(map(str, kb.edges(where={'weight': ('>=', 3)}))) == ['n1___likes___n2', 'n3___likes___n4']
+
+# Indexes declared before a KB is recovered from its log are filled as it's replayed.
+with tempfile.TemporaryDirectory() as dirname:
+    kb = KB()
+    kb.persist(dirname)
+    kb.store('a(b, c)', node_attributes=[{'size': 1}, {'size': 5}])
+    kb.node('b').size = 7
+    kb.edge('b', 'a', 'c').weight = 2
+    kb.close()
+    kb = KB()
+    kb.create_index('size', sorted=True)
+    kb.create_index('weight', edges=True)
+    kb.persist(dirname)
+    assert list(map(str, kb.filter(where={'size': ('>', 5)}))) == ['b']
+    assert list(map(str, kb.edges(where={'weight': 2}))) == ['b___a___c']
+
+# NumPy numbers are ordered with Python's, in an index as in a scan.
+numpy_kb = KB()
+numpy_kb.from_triples([('m{}'.format(i), 'next', 'm{}'.format(i + 1)) for i in range(30)])
+numpy_values = [1, 2.5, np.int64(5), np.int32(2), np.uint8(3), np.float64(1.5), np.float32(4.5),
+                np.float64('nan'), np.bool_(True), 'a']
+for i in range(31):
+    numpy_kb.node('m{}'.format(i)).g = random.choice(numpy_values)
+numpy_queries = [{'g': ('>', 3)}, {'g': ('<=', 2)}, {'g': 5}, {'g': [('>', 1), ('<', 5)]}, {'g': ('in', [2, 4.5])}]
+scanned = [sorted(map(str, numpy_kb.filter(where=where))) for where in numpy_queries]
+assert scanned[0]
+numpy_kb.create_index('g', sorted=True)
+assert [sorted(map(str, numpy_kb.filter(where=where))) for where in numpy_queries] == scanned
+
+print('All index tests passed.')
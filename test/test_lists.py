@@ -12,4 +12,23 @@ b = kb.query('append(X, Y, [a, b, c, d])'); b = list(b); assert len(b) == 5; ass
 assert b[1]['X'] == '[a]'; assert b[1]['Y'] == '[b,c,d]'; assert b[2]['X'] == '[a,b]'; assert b[2]['Y'] == '[c,d]'
 assert b[3]['X'] == '[a,b,c]'; assert b[3]['Y'] == '[d]'; assert b[4]['X'] == '[a,b,c,d]'; assert b[4]['Y'] == '[]'
 
+kb.store('first([X | _], X)')
+b = kb.query('first([a, b | c], X)'); b = list(b); assert b == [{'X': 'a'}]
+long_list = '[{}]'.format(','.join('e{}'.format(i) for i in range(3000)))
+kb.store('long({})'.format(long_list))
+assert str(kb.rules[-1].head) == 'long({})'.format(long_list)
+for bad in ('long([a, b)', 'long(a))', 'long(a)b', 'long(a,,b)', 'long([a | b | c])', 'a(X) :- '):
+    try:
+        kb.store(bad)
+        assert False, bad
+    except Exception as e:
+        assert str(e).startswith('Syntax error')
+
+from zincbase.logic.parser import parse_many
+fact, rule = parse_many(['edge(a,b)', 'path(X,Y):-edge(X,Z),path(Z,Y)'])
+assert str(fact[0]) == 'edge(a, b)'; assert not fact[1]
+assert str(rule[0]) == 'path(X, Y)'; assert [str(g) for g in rule[1]] == ['edge(X, Z)', 'path(Z, Y)']
+facts = parse_many(['edge(a,b)', 'edge(b,a)'])
+assert facts[0][0].args[0] is facts[1][0].args[1]
+
 print('All list tests passed.')
\ No newline at end of file
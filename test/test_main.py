@@ -86,4 +86,50 @@ assert len(b[0]) == 2; assert b[0][0] == ('gave_mono_to', 'jane')
 assert b[0][1] == ('gave_mono_to', 'phil'); assert b[1][0] == ('gave_mono_to', 'jane');
 assert b[1][1] == ('gave_mono_to', 'janice'); assert b[1][2] == ('gave_mono_to', 'phil')
 
+kb = KB()
+for i in range(20):
+    kb.store('in_row(cell{}, row{})'.format(i, i % 4))
+kb.store('in_row(X, row_any) :- in_row(X, row0)')
+assert len(kb._clause_index.candidates(kb.rules[0].head)) == 2
+assert len(kb._clause_index.candidates(kb.rule('in_row(X, row_any)').head)) == 1
+b = kb.query('in_row(cell5, X)'); b = list(b); assert len(b) == 1; assert b[0]['X'] == 'row1'
+b = kb.query('in_row(cell4, X)'); b = list(b); assert len(b) == 2; assert b[0]['X'] == 'row0'; assert b[1]['X'] == 'row_any'
+b = kb.query('in_row(X, row2)'); b = list(b); assert len(b) == 5
+b = kb.query('in_row(X, row_any)'); b = list(b); assert len(b) == 5
+assert kb.delete_rule(4); b = kb.query('in_row(cell4, X)'); b = list(b); assert not b
+assert len(kb._clause_index) == len(kb.rules)
+
+kb.store('endless(X):-endless(X)')
+b = kb.query('endless(zig)', max_steps=50); b = list(b); assert not b
+assert kb.last_query_stats.cutoff == 'max_steps'; assert kb.last_query_stats.steps == 51; assert not kb.last_query_stats.exhausted
+b = kb.query('endless(zig)', max_steps=float('inf'), timeout_ms=20); b = list(b); assert not b
+assert kb.last_query_stats.cutoff == 'timeout'; assert kb.last_query_stats.elapsed_ms >= 20
+b = kb.query('in_row(X, row1)', limit=2); stats = kb.last_query_stats; b = list(b); assert len(b) == 2
+assert stats.cutoff == 'limit'; assert stats.answers == 2
+b = kb.query('in_row(X, row1)'); stats = kb.last_query_stats; b = list(b); assert len(b) == 5
+assert stats.exhausted; assert stats.cutoff is None; assert stats.answers == 5; assert stats.steps > 0
+
+import copy
+head = kb.rule('in_row(X, row_any)').head
+assert head.args[0].is_var and not head.args[0].is_atom; assert head.args[1].is_atom
+assert not head.is_var and not head.is_atom; assert isinstance(head.args, tuple)
+assert head.pred is kb.rules[0].head.pred; assert copy.deepcopy(head) is head
+
+# Queries only read the graph: answering them must not add nodes, edges or rules.
+for engine in ('bfs', 'dfs'):
+    kb = KB(engine=engine)
+    kb.store('person(tom)')
+    kb.store('knows(tom, shamala)')
+    kb.store('knows(shamala, [ann, bob])')
+    kb.store('friend(X, Y) :- knows(X, Y)')
+    kb.store('friend(X, Z) :- knows(X, Y), friend(Y, Z)')
+    kb.store('pair(X, Y, f(X, [Y])) :- knows(X, Y)')
+    nodes = list(kb.G.nodes(data=True)); edges = list(kb.G.edges(keys=True, data=True))
+    variable_rules = list(kb._variable_rules)
+    for query in ('friend(tom, Who)', 'friend(X, Y)', 'pair(tom, Y, P)', 'knows(shamala, [A | B])',
+                  'friend(nobody, [x, y])', 'person(tom)', 'unknown(P, g(Q))'):
+        list(kb.query(query))
+    assert list(kb.G.nodes(data=True)) == nodes; assert list(kb.G.edges(keys=True, data=True)) == edges
+    assert kb._variable_rules == variable_rules
+
 print('All main KB tests passed.')
\ No newline at end of file
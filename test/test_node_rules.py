@@ -0,0 +1,48 @@
+"""Test that a node's types and the rules it affects follow stores and deletes."""
+
+import context
+
+from zincbase import KB
+
+kb = KB()
+kb.store('person(tom)')
+kb.store('likes(tom, sushi)')
+assert list(kb.node('tom').atom) == ['person']
+assert list(kb.node('tom').rules) == []
+
+rule_id = kb.store('happy(X) :- person(X), likes(X, sushi)')
+assert [str(r) for r in kb.node('tom').rules] == ['happy(X)']
+# Only the first rule for a predicate, and only its first goal, count.
+kb.store('happy(X) :- person(X), rich(X)')
+kb.store('fed(X) :- likes(X, Y), person(X)')
+assert [str(r) for r in kb.node('tom').rules] == ['happy(X)']
+assert list(kb.node('sushi').atom) == [] and list(kb.node('sushi').rules) == []
+
+kb.store('food(sushi)')
+kb.store('tasty(X) :- food(X)')
+assert list(kb.node('sushi').atom) == ['food']
+assert [str(r) for r in kb.node('sushi').rules] == ['tasty(X)']
+fish = kb.store('fish(sushi)')
+assert list(kb.node('sushi').atom) == ['food', 'fish']
+kb.delete_rule(fish)
+assert list(kb.node('sushi').atom) == ['food']
+
+kb.delete_rule(rule_id)
+assert [str(r) for r in kb.node('tom').rules] == ['happy(X)'] # the second happy rule
+assert list(kb.node('tom').rules)[0].goals[1].pred == 'rich'
+
+changes = []
+kb.rule('tasty(X)').on_change = lambda rule, affected, node, attr, value, prev: changes.append((str(node), attr, value))
+kb.node('sushi').price = 3
+assert changes == [('sushi', 'price', 3)]
+kb.delete_rule(len(kb.rules) - 1) # fish was deleted, so tasty is the last rule
+kb.node('sushi').price = 4
+assert changes == [('sushi', 'price', 3)]
+
+# Facts loaded in bulk still give their nodes types.
+kb = KB()
+kb.from_triples([('tom', 'likes', 'sushi')])
+kb.store('person(tom)')
+assert list(kb.node('tom').atom) == ['person']
+
+print('All node rules tests passed.')
@@ -0,0 +1,63 @@
+"""Test finding the shortest paths between nodes."""
+
+import random
+import time
+
+import context
+
+from zincbase import KB
+
+random.seed(1)
+kb = KB()
+names = ['n{}'.format(i) for i in range(25)]
+triples = [(random.choice(names), random.choice(['a', 'b', 'c']), random.choice(names)) for _ in range(60)]
+triples += triples[:5] # the same fact twice makes parallel edges
+kb.from_triples(triples)
+
+def brute(start, target, max_depth, reverse=False, preds=None, exclude_preds=None):
+    """The shortest of every walk that `bfs` finds, with the predicates allowed."""
+    walks = set()
+    for walk in kb.bfs(start, target, max_depth=max_depth, reverse=reverse):
+        if all((preds is None or p in preds) and (exclude_preds is None or p not in exclude_preds) for p, _ in walk):
+            walks.add(tuple(walk))
+    shortest = min(map(len, walks), default=None)
+    return sorted(walk for walk in walks if len(walk) == shortest)
+
+checked = 0
+for start in names[:12]:
+    for target in names[:12]:
+        if start == target or start not in kb.G or target not in kb.G:
+            continue
+        for options in ({}, {'reverse': True}, {'preds': ['a', 'b']}, {'exclude_preds': ['c']},
+                        {'preds': ['a'], 'exclude_preds': ['b'], 'reverse': True}):
+            found = sorted(tuple(path) for path in kb.paths(start, target, max_depth=4, **options))
+            assert found == brute(start, target, 4, **options), (start, target, options)
+            checked += 1
+assert checked > 100
+
+# Paths go target-wards from start, whichever end the search happens to reach the middle from.
+kb = KB()
+kb.from_triples([('a', 'r', 'b'), ('b', 's', 'c'), ('c', 't', 'd'), ('x', 'r', 'a'), ('y', 'r', 'a'), ('z', 'r', 'a')])
+assert list(kb.paths('a', 'd')) == [[('r', 'b'), ('s', 'c'), ('t', 'd')]]
+assert list(kb.paths('d', 'a', reverse=True)) == [[('t', 'c'), ('s', 'b'), ('r', 'a')]]
+assert list(kb.paths('d', 'a')) == []
+assert list(kb.paths('a', 'd', max_depth=2)) == []
+assert list(kb.paths('a', 'a')) == [[]]
+assert list(kb.paths('a', 'nowhere')) == []
+assert list(kb.paths('a', 'd', exclude_preds=['s'])) == []
+
+# A grid, with edges both ways: far too many walks for `bfs`, and shortest paths
+# (C(58, 29) of them, corner to corner) beyond counting.
+kb = KB()
+size = 30
+kb.from_triples([('{}_{}'.format(y, x), 'next', '{}_{}'.format(y + dy, x + dx))
+                 for y in range(size) for x in range(size) for dy, dx in ((0, 1), (1, 0), (0, -1), (-1, 0))
+                 if 0 <= y + dy < size and 0 <= x + dx < size])
+start = time.time()
+found = list(kb.paths('0_0', '29_29', max_depth=100, limit=5))
+assert time.time() - start < 2
+assert len(found) == 5 and len(set(map(tuple, found))) == 5
+assert all(len(path) == 58 and path[-1] == ('next', '29_29') for path in found)
+assert list(kb.paths('0_0', '29_29', max_depth=57)) == []
+
+print('All path tests passed.')
@@ -128,4 +128,93 @@ assert node_a.node_zig == 2
 assert node_b.node_zig == 3
 assert was_called
 
+# The same, with watchers queued rather than called from inside each change.
+kb = KB()
+kb.set_propagation_mode('queue')
+kb.store('connected(node1, node2)')
+kb.store('connected(node1, node3)')
+kb.store('connected(node3, node4)')
+def watch_fn(node, prev_val):
+    for n, predicate in node.neighbors:
+        kb.node(n).grains += 1
+for name in ('node1', 'node2', 'node3', 'node4'):
+    kb.node(name).grains = 0
+for name in ('node1', 'node2', 'node3'):
+    kb.node(name).watch('grains', watch_fn)
+kb.node('node1').grains += 1
+assert [kb.node(name).grains for name in ('node1', 'node2', 'node3', 'node4')] == [1, 1, 1, 1]
+assert len(kb._propagation_queue) == 0
+
+times_called = 0
+kb.store('connected(node_a, node_a)')
+node_a = kb.node('node_a')
+node_a.grains = 0
+node_a.watch('grains', cycle_watch_fn)
+node_a.grains = 1
+assert times_called == 2
+assert node_a.grains == 2
+kb.set_recursion_limit(2)
+node_a.grains = 5
+assert times_called == 5
+assert node_a.grains == 7
+
+kb = KB()
+kb.set_propagation_mode('queue')
+kb.from_triples([('node1', 'connected', 'node2'), ('node2', 'connected', 'node3')])
+def watch_fn(node, prev_val):
+    for n, pred in node.neighbors:
+        kb.node(n).value += 1
+for name in ('node1', 'node2', 'node3'):
+    kb.node(name).value = 0
+kb.node('node1').watch('value', watch_fn)
+kb.node('node2').watch('value', watch_fn)
+kb.set_propagation_limit(1)
+kb.node('node1').value += 1
+assert [kb.node(name).value for name in ('node1', 'node2', 'node3')] == [1, 1, 0]
+
+# Repeated changes to an attribute whose watchers are waiting are coalesced.
+kb = KB()
+kb.set_propagation_mode('queue')
+kb.from_triples([('a', 'to', 'b'), ('a', 'to', 'c'), ('b', 'to', 'd'), ('c', 'to', 'd')])
+for name in 'abcd':
+    kb.node(name).value = 0
+calls = []
+def watch_fn(node, prev_val):
+    calls.append((str(node), prev_val, node.value))
+    for n, pred in node.out_neighbors:
+        kb.node(n).value += 1
+for name in 'abcd':
+    kb.node(name).watch('value', watch_fn)
+kb.node('a').value = 1
+assert calls == [('a', 0, 1), ('b', 0, 1), ('c', 0, 1), ('d', 0, 2)]
+assert kb._propagation_queue.coalesced == 1
+
+# ...and with a priority, run in its order instead of first in, first out.
+kb.set_propagation_mode('queue', priority=lambda target, attr: -ord(str(target)))
+calls.clear()
+kb.node('a').value = 2
+assert calls == [('a', 1, 2), ('c', 1, 2), ('d', 2, 3), ('b', 1, 2), ('d', 3, 4)]
+
+# A cascade far longer than Python's recursion limit.
+kb = KB()
+kb.set_propagation_mode('queue')
+length = 20000
+kb.from_triples([(str(i), 'next', str(i + 1)) for i in range(length)])
+def watch_fn(node, prev_val):
+    for n, pred in node.out_neighbors:
+        kb.node(n).value = node.value + 1
+for i in range(length):
+    kb.node(str(i)).watch('value', watch_fn)
+kb.node('0').value = 0
+assert kb.node(str(length)).value == length
+
+kb = KB()
+kb.set_propagation_mode('queue')
+kb.store('is_linked(a,b)', edge_attributes={'zig': 1})
+edge = kb.edge('a', 'is_linked', 'b')
+kb.node('a').node_zig = 1
+edge.watch('zig', lambda edge, prev_val: setattr(edge.nodes[0], 'node_zig', prev_val + edge.zig))
+edge.zig += 1
+assert kb.node('a').node_zig == 3
+
 print('All propagation tests passed.')
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Test the query result cache and its invalidation, with both query engines."""
+
+import context
+
+from zincbase import KB
+
+for engine in ('bfs', 'dfs'):
+    kb = KB(engine=engine, query_cache_size=3)
+    kb.store('parent(tom, bob)')
+    kb.store('parent(bob, ann)')
+    kb.store('grandparent(X, Z) :- parent(X, Y), parent(Y, Z)')
+    kb.store('likes(ann, sushi)')
+
+    b = list(kb.query('grandparent(X, Y)')); assert b == [{'X': 'tom', 'Y': 'ann'}]
+    assert not kb.last_query_stats.cached
+    assert kb.query_cache.misses == 1 and kb.query_cache.hits == 0
+    # Same query up to variable names: a hit, with the caller's names.
+    b = list(kb.query('grandparent(P, Q)')); assert b == [{'P': 'tom', 'Q': 'ann'}]
+    stats = kb.last_query_stats
+    assert stats.cached and stats.exhausted and stats.steps == 0
+    assert kb.query_cache.hits == 1
+    b[0]['P'] = 'nobody'
+    b = list(kb.query('grandparent(P, Q)')); assert b == [{'P': 'tom', 'Q': 'ann'}]
+    b = list(kb.query('grandparent(P, Q)', limit=1)); assert len(b) == 1
+    assert kb.last_query_stats.cutoff == 'limit'
+    b = list(kb.query('grandparent(tom, ann)')); assert b == [True]
+    b = list(kb.query('grandparent(tom, ann)')); assert b == [True]; assert kb.last_query_stats.cached
+
+    # Storing a predicate the query doesn't depend on keeps the entry...
+    b = list(kb.query('likes(ann, X)')); assert b == [{'X': 'sushi'}]
+    hits = kb.query_cache.hits
+    kb.store('likes(tom, pizza)')
+    b = list(kb.query('grandparent(P, Q)')); assert kb.query_cache.hits == hits + 1
+    # ...but one it does depend on, even through a rule, drops it.
+    kb.store('parent(ann, joe)')
+    b = list(kb.query('grandparent(P, Q)')); assert len(b) == 2; assert not kb.last_query_stats.cached
+    assert kb.query_cache.invalidations >= 1
+    assert kb.delete_rule(len(kb.rules) - 1)
+    b = list(kb.query('grandparent(P, Q)')); assert len(b) == 1; assert not kb.last_query_stats.cached
+    kb.store('sibling(X, Y) :- parent(Z, X), parent(Z, Y)')
+    b = list(kb.query('sibling(bob, Y)')); assert b == [{'Y': 'bob'}]
+    kb.solidify('sibling')
+    b = list(kb.query('sibling(bob, Y)')); assert len(b) == 2; assert not kb.last_query_stats.cached
+
+    # Least recently used entries are evicted first.
+    kb.query_cache.resize(2)
+    assert len(kb.query_cache) == 2
+    evictions = kb.query_cache.evictions
+    list(kb.query('parent(X, Y)'))
+    list(kb.query('likes(X, Y)'))
+    list(kb.query('parent(X, Y)'))
+    list(kb.query('sibling(X, Y)'))
+    assert kb.query_cache.evictions == evictions + 3
+    list(kb.query('parent(A, B)')); assert kb.last_query_stats.cached
+    list(kb.query('likes(A, B)')); assert not kb.last_query_stats.cached
+
+    # Queries cut off before they finish aren't cached.
+    list(kb.query('sibling(ann, Y)', max_steps=1)); assert kb.last_query_stats.cutoff == 'max_steps'
+    list(kb.query('sibling(ann, Y)')); assert not kb.last_query_stats.cached
+
+    # Tabled predicates: the entry depends on what the table depends on.
+    kb = KB(engine=engine, query_cache_size=10)
+    kb.table('path')
+    kb.store('path(X, Y) :- path(X, Z), edge(Z, Y)')
+    kb.store('path(X, Y) :- edge(X, Y)')
+    kb.store('edge(a, b)')
+    kb.store('edge(b, a)')
+    b = list(kb.query('path(a, Y)')); assert len(b) == 2
+    b = list(kb.query('path(a, Y)')); assert kb.last_query_stats.cached
+    kb.store('edge(b, c)')
+    b = list(kb.query('path(a, Y)')); assert len(b) == 3; assert not kb.last_query_stats.cached
+
+kb = KB()
+list(kb.query('a(X)')); list(kb.query('a(X)'))
+assert kb.query_cache.hits == 0 and kb.query_cache.misses == 0 and len(kb.query_cache) == 0
+
+print('All query cache tests passed.')
@@ -0,0 +1,88 @@
+"""Test running vectorized simulations over the graph."""
+
+import random
+
+import numpy as np
+
+import context
+
+from zincbase import KB
+
+# The game of life, stepped one node at a time as in examples/game_of_life.py,
+# and with `simulate`, gives the same grids.
+MAX_Y, MAX_X = 12, 15
+kbs = []
+for _ in range(2):
+    random.seed(0)
+    kb = KB()
+    cells = [(y * MAX_X) + x for y in range(MAX_Y) for x in range(MAX_X)]
+    for cell in cells:
+        kb.store(f'cell({cell})', node_attributes=[{'state': int(random.random() < 0.4)}])
+    kb.from_triples([(str((y * MAX_X) + x), 'neighbors', str(((y + dy) * MAX_X) + x + dx))
+                     for y in range(MAX_Y) for x in range(MAX_X)
+                     for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                     if (dy or dx) and 0 <= y + dy < MAX_Y and 0 <= x + dx < MAX_X])
+    kb.store('likes(0, 100)') # not a neighbor
+    kbs.append(kb)
+
+slow, fast = kbs
+for _ in range(5):
+    next_states = {}
+    for cell in cells:
+        n = slow.node(cell)
+        live = sum(1 for nn, edges in n.neighbors
+                   if slow.node(nn).state and any(edge['pred'] == 'neighbors' for edge in edges))
+        next_states[cell] = int(live == 3 or (n.state == 1 and live == 2))
+    for cell in cells:
+        slow.node(cell).state = next_states[cell]
+
+def life(state, adjacency):
+    alive = state[:, 0] == 1
+    live = adjacency @ alive.astype(int)
+    return ((live == 3) | (alive & (live == 2))).astype(int)[:, None]
+
+frames = []
+final = fast.simulate(life, ['state'], steps=5, preds=['neighbors'], on_step=lambda step, state: frames.append(step))
+assert frames == [1, 2, 3, 4, 5]
+names = list(fast.G)
+assert [fast.node(cell).state for cell in cells] == [slow.node(cell).state for cell in cells]
+assert all(type(fast.node(cell).state) is int for cell in cells)
+assert final[names.index('7'), 0] == fast.node(7).state
+assert (sorted(map(str, fast.filter_fast(lambda x: x[:, 0] == 1, attributes=['state'])))
+        == sorted(map(str, fast.filter(lambda x: x.state == 1))))
+
+# Bools are written back as ints.
+def life_bools(state, adjacency):
+    return life(state, adjacency).astype(bool)
+final = fast.simulate(life_bools, ['state'], steps=1, preds=['neighbors'])
+assert final.dtype == bool
+assert [fast.node(cell).state for cell in cells] == final[[names.index(str(cell)) for cell in cells], 0].astype(int).tolist()
+assert all(type(fast.node(cell).state) is int for cell in cells)
+assert all(type(fast.G.nodes[str(cell)]['state']) is int for cell in cells)
+
+# Stopping early, and not writing back.
+before = [fast.node(cell).state for cell in cells]
+fast.simulate(life, ['state'], steps=100, preds=['neighbors'], on_step=lambda step, state: step < 3, write_back=False)
+assert [fast.node(cell).state for cell in cells] == before
+
+# Neighbors each way, missing values, and several attributes.
+kb = KB()
+kb.from_triples([('a', 'next', 'b'), ('b', 'next', 'c'), ('b', 'next', 'c'), ('c', 'other', 'a')])
+kb.node('a').level = 1
+kb.node('a').name = 'first'
+def down(state, adjacency):
+    return adjacency @ np.nan_to_num(state)
+state = kb.simulate(down, ['level'], steps=1, preds=['next'], write_back=False)
+assert state.tolist() == [[0], [0], [0]]
+state = kb.simulate(down, ['level'], steps=1, preds=['next'], reverse=True)
+assert state.tolist() == [[0], [1], [0]]
+assert kb.node('b').level == 1.0 and kb.node('a').level == 0.0
+state = kb.simulate(lambda state, adjacency: state * 2, ['level', 'name', 'size'])
+assert kb.node('b').level == 2.0 and kb.node('a').name == 'first' and kb.node('a').size is None
+try:
+    kb.simulate(lambda state, adjacency: state[:, 0], ['level'])
+    assert False
+except ValueError:
+    pass
+
+print('All simulate tests passed.')
@@ -0,0 +1,184 @@
+"""Test saving a KB as a columnar snapshot and loading it back."""
+
+import json
+import os
+import pickle
+import tempfile
+import warnings
+
+import context
+
+import numpy as np
+import torch
+
+from zincbase import KB
+from zincbase.storage import snapshot
+
+def rules(kb):
+    return [(str(r.head), [str(g) for g in r.goals]) for r in kb.rules]
+
+def nodes(kb):
+    return [(n, {k: v for k, v in d.items() if k not in ('_watches', '_new_neighbor_fn')})
+            for n, d in kb.G.nodes(data=True)]
+
+kb = KB()
+kb.store('knows(tom, ann)')
+kb.store('knows(ann, bob)')
+kb.store('friend(X, Y) :- knows(X, Y)')
+kb.store('has(ann, [cat, dog])')
+kb.store('likes(tom, sushi)', node_attributes=[{'age': 30}, {'tasty': True}], edge_attributes={'weight': 0.5})
+kb.store('knows(tom, ann)')
+kb.store('~hates(tom, bob)')
+kb.store('place(paris)')
+kb.node('bob').tags = ['a', {'b': 1}]
+kb.node('ann').age = 2 ** 70
+kb.node('tom').score = 1.5
+kb.node('ann').score = 2
+kb.edge('ann', 'knows', 'bob').since = 2019
+list(kb.G['tom']['ann'].values())[1]['weight'] = 7
+kb.node('tom').watch('age', lambda node, prev: None)
+
+with tempfile.TemporaryDirectory() as dirname:
+    assert kb.save_all(dirname)
+    manifest = json.load(open(os.path.join(dirname, 'manifest.json')))
+    assert manifest['version'] == 2; assert manifest['facts'] == 4; assert manifest['rules'] == 7
+    assert np.load(os.path.join(dirname, manifest['data'], 'subjects.npy')).dtype == np.int32
+    types = {c['name']: c['type'] for c in manifest['node_attributes']}
+    assert types == {'age': 'json', 'tasty': 'bool', 'score': 'json', 'tags': 'json'}
+    loaded = KB()
+    assert loaded.load_all(dirname)
+    assert rules(loaded) == rules(kb)
+    assert nodes(loaded) == nodes(kb)
+    assert sorted(loaded.G.edges(data=True), key=str) == sorted(kb.G.edges(data=True), key=str)
+    assert [d.get('weight') for d in loaded.G['tom']['ann'].values()] == [None, 7]
+    assert loaded._entity2id == kb._entity2id; assert loaded._relation2id == kb._relation2id
+    assert list(map(str, loaded._neg_examples)) == list(map(str, kb._neg_examples))
+    assert list(loaded.query('friend(ann, X)')) == [{'X': 'bob'}]
+    assert list(loaded.query('has(ann, [X|_])')) == [{'X': 'cat'}]
+    assert loaded.node('tom').age == 30; assert loaded.edge('tom', 'likes', 'sushi').weight == 0.5
+    assert loaded.edge('ann', 'knows', 'bob').since == 2019
+
+    # A snapshot from a newer version of ZincBase isn't misread.
+    manifest['version'] = 3
+    json.dump(manifest, open(os.path.join(dirname, 'manifest.json'), 'w'))
+    try:
+        KB().load_all(dirname)
+        assert False
+    except ValueError:
+        pass
+
+# The KG model's weights come back exactly.
+kb = KB()
+kb.seed(555)
+kb.from_triples([('person{}'.format(i), 'lives_in', 'city{}'.format(i % 3)) for i in range(20)])
+kb.build_kg_model(cuda=False, embedding_size=8)
+with tempfile.TemporaryDirectory() as dirname:
+    kb.save_all(dirname)
+    loaded = KB()
+    loaded.load_all(dirname)
+    assert loaded._embedding_size == 8; assert loaded._model_name == 'RotatE'
+    state, loaded_state = kb._kg_model.state_dict(), loaded._kg_model.state_dict()
+    assert list(state) == list(loaded_state)
+    for name in state:
+        assert torch.equal(state[name], loaded_state[name])
+    assert np.allclose(kb.get_embedding('person3'), loaded.get_embedding('person3'))
+
+    # Serving read-only, the embeddings are the snapshot's files, mapped rather than read.
+    serving = KB()
+    serving.load_all(dirname, read_only=True)
+    embedding = serving._kg_model.entity_embedding
+    assert not embedding.requires_grad
+    assert torch.equal(embedding, state['entity_embedding'])
+    assert torch.equal(serving._kg_model.relation_embedding, state['relation_embedding'])
+    assert torch.equal(serving.get_embedding('person3'), kb.get_embedding('person3'))
+    assert serving.estimate_triple_prob('person3', 'lives_in', 'city0') == kb.estimate_triple_prob('person3', 'lives_in', 'city0')
+    assert serving.get_most_likely('person3', 'lives_in', '?', k=2) == kb.get_most_likely('person3', 'lives_in', '?', k=2)
+    if os.path.exists('/proc/self/maps'):
+        data = json.load(open(os.path.join(dirname, 'manifest.json')))['data']
+        path = os.path.realpath(os.path.join(dirname, data, 'model', '{}.npy'.format(list(state).index('entity_embedding'))))
+        with open('/proc/self/maps') as f:
+            regions = [line.split() for line in f]
+        assert any(region[-1] == path and int(region[0].split('-')[0], 16) <= embedding.data_ptr() < int(region[0].split('-')[1], 16)
+                   for region in regions)
+    try:
+        serving.train_kg_model(steps=1, verbose=False)
+        assert False
+    except Exception as e:
+        assert 'read-only' in str(e)
+    try:
+        KB().load_all(os.path.join(dirname, 'nowhere'), read_only=True)
+        assert False
+    except ValueError:
+        pass
+
+# Directories saved by older versions, as a pickle, still load.
+old = KB()
+old.store('a(b, c)')
+with tempfile.TemporaryDirectory() as dirname:
+    with open(os.path.join(dirname, 'zb.pkl'), 'wb') as f:
+        pickle.dump({'model_name': 'RotatE', 'entity2id': {}, 'relation2id': {}, 'encoded_triples': [],
+                     'embedding_size': 256, 'gamma': 24, 'node_attributes': [], 'pred_attributes': [],
+                     'attr_loss_to_graph_loss': 1.0, 'pred_loss_to_graph_loss': 1.0, 'rules': old.rules}, f)
+    loaded = KB()
+    loaded.load_all(dirname)
+    assert list(loaded.query('a(b, X)')) == [{'X': 'c'}]
+
+# Attributes that JSON can't give back as they were are pickled, and ones that
+# can't be pickled either are left out, with a warning.
+kb = KB()
+kb.store('knows(tom, ann)')
+kb.node('tom').friends = {'ann', 'bob'}
+kb.node('ann').friends = ('tom',)
+kb.node('tom').point = (1, 2)
+kb.node('tom').callback = lambda: None
+kb.edge('tom', 'knows', 'ann').since = {2019}
+with tempfile.TemporaryDirectory() as dirname:
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        assert kb.save_all(dirname)
+    assert len([w for w in caught if 'callback' in str(w.message)]) == 1
+    loaded = KB()
+    loaded.load_all(dirname)
+    assert loaded.node('tom').friends == {'ann', 'bob'} and loaded.node('ann').friends == ('tom',)
+    assert loaded.node('tom').point == (1, 2) and loaded.node('tom').callback is None
+    assert loaded.edge('tom', 'knows', 'ann').since == {2019}
+
+    # Saving again replaces the snapshot's files; a save that fails leaves them be.
+    first = json.load(open(os.path.join(dirname, 'manifest.json')))['data']
+    kb.store('knows(ann, bob)')
+    kb.save_all(dirname)
+    second = json.load(open(os.path.join(dirname, 'manifest.json')))['data']
+    assert sorted(os.listdir(dirname)) == sorted(['manifest.json', second])
+    save_data = snapshot._save_data
+    def failing(kb, data):
+        save_data(kb, data)
+        raise OSError('disk full')
+    snapshot._save_data = failing
+    kb.store('knows(bob, tom)')
+    try:
+        kb.save_all(dirname)
+        assert False
+    except OSError:
+        pass
+    finally:
+        snapshot._save_data = save_data
+    assert sorted(os.listdir(dirname)) == sorted(['manifest.json', second])
+    loaded = KB()
+    loaded.load_all(dirname)
+    assert sorted(map(str, loaded.rules)) == ['knows(ann, bob)', 'knows(tom, ann)']
+
+    # Version 1 snapshots kept their files next to the manifest.
+    manifest = json.load(open(os.path.join(dirname, 'manifest.json')))
+    for name in os.listdir(os.path.join(dirname, second)):
+        os.rename(os.path.join(dirname, second, name), os.path.join(dirname, name))
+    os.rmdir(os.path.join(dirname, second))
+    del manifest['data']
+    manifest['version'] = 1
+    json.dump(manifest, open(os.path.join(dirname, 'manifest.json'), 'w'))
+    loaded = KB()
+    loaded.load_all(dirname)
+    assert sorted(map(str, loaded.rules)) == ['knows(ann, bob)', 'knows(tom, ann)']
+    kb.save_all(dirname)
+    assert sorted(os.listdir(dirname)) == sorted(['manifest.json', json.load(open(os.path.join(dirname, 'manifest.json')))['data']])
+
+print('All snapshot tests passed.')
@@ -0,0 +1,66 @@
+"""Test tabled evaluation of recursive rules, with both query engines."""
+
+import context
+
+from zincbase import KB
+
+for engine in ('bfs', 'dfs'):
+    kb = KB(engine=engine)
+    kb.table('path')
+    kb.store('path(X, Y) :- path(X, Z), edge(Z, Y)')
+    kb.store('path(X, Y) :- edge(X, Y)')
+    for i in range(30):
+        kb.store('edge(n{}, n{})'.format(i, (i + 1) % 30))
+
+    b = list(kb.query('path(n0, Y)')); assert len(b) == 30
+    stats = kb.last_query_stats; assert stats.exhausted; assert stats.tabled_steps > 0
+    b = list(kb.query('path(n0, Y)')); assert len(b) == 30
+    assert kb.last_query_stats.tabled_steps == 0; assert kb.last_query_stats.steps <= 2 * 30 + 1
+    b = list(kb.query('path(n3, n2)')); assert b == [True]
+    b = list(kb.query('path(X, n3)')); assert len(b) == 30; assert kb.last_query_stats.exhausted
+
+    kb.store('edge(n5, zz)')
+    b = list(kb.query('path(n0, Y)')); assert len(b) == 31; assert kb.last_query_stats.tabled_steps > 0
+    b = list(kb.query('path(zz, Y)')); assert b == []
+    assert kb.delete_rule(len(kb.rules) - 1)
+    b = list(kb.query('path(n0, zz)')); assert b == []
+
+    b = list(kb.query('path(n0, Y)', timeout_ms=0)); assert kb.last_query_stats.cutoff == 'timeout'
+
+    kb.untable('path')
+    b = list(kb.query('path(n0, Y)')); assert kb.last_query_stats.cutoff == 'max_steps'
+
+    # A table that isn't recursive is forgotten when its own clauses change.
+    kb = KB(engine=engine)
+    kb.table('p')
+    kb.store('p(X) :- q(X)')
+    kb.store('q(a)')
+    b = list(kb.query('p(X)')); assert b == [{'X': 'a'}]
+    kb.store('p(b)')
+    b = list(kb.query('p(X)')); assert sorted(x['X'] for x in b) == ['a', 'b']
+    assert kb.delete_rule(0)
+    b = list(kb.query('p(X)')); assert b == [{'X': 'b'}]
+
+    # Filling a table that never completes stops when the query's budget runs out,
+    # and the partial table carries on from there the next time.
+    kb = KB(engine=engine)
+    kb.table('nat')
+    kb.store('nat(z)')
+    kb.store('nat(s(X)) :- nat(X)')
+    assert next(kb.query('nat(X)', max_steps=100)) == {'X': 'z'}
+    b = list(kb.query('nat(X)', max_steps=100)); assert kb.last_query_stats.cutoff == 'max_steps'
+    assert not kb.last_query_stats.exhausted; assert b[0] == {'X': 'z'}
+    c = list(kb.query('nat(X)', max_steps=100)); assert len(c) > len(b)
+
+    # Answers that aren't ground can't be tabled; the goal is resolved as usual.
+    kb = KB(engine=engine)
+    kb.table('likes')
+    kb.store('likes(tom, X)')
+    kb.store('likes(ann, bob)')
+    b = list(kb.query('likes(tom, sushi)')); assert b == [True]
+    b = list(kb.query('likes(ann, X)')); assert b == [{'X': 'bob'}]
+    assert len(kb._tables) == 2
+    b = list(kb.query('likes(P, Q)')); assert len(b) == 2; assert b[0] == {'P': 'tom'}
+    assert len(kb._tables) == 2
+
+print('All tabling tests passed.')
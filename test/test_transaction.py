@@ -0,0 +1,103 @@
+"""Test batching attribute changes in transactions."""
+
+import context
+
+from zincbase import KB
+
+for mode in ('recursive', 'queue'):
+    kb = KB()
+    kb.set_propagation_mode(mode)
+    kb.from_triples([('a', 'to', 'b'), ('a', 'to', 'c'), ('b', 'to', 'd'), ('c', 'to', 'd')])
+    kb.store('is_linked(a,b)', edge_attributes={'zig': 1})
+    for name in 'abcd':
+        kb.node(name).value = 0
+    calls = []
+    def watch_fn(node, prev_val):
+        calls.append((str(node), prev_val, node.value))
+    for name in 'abcd':
+        kb.node(name).watch('value', watch_fn)
+
+    # Changes are seen through the node straight away, but made, and watched, at the end.
+    with kb.transaction():
+        for name in 'abcd':
+            kb.node(name).value += 1
+        kb.node('a').value += 1
+        assert kb.node('a').value == 2
+        assert kb.node('a').attrs['value'] == 0
+        assert list(kb.filter_fast(lambda x: x[:, 0] == 0, attributes=['value'])) != []
+        assert calls == []
+    assert sorted(calls) == [('a', 0, 2), ('b', 0, 1), ('c', 0, 1), ('d', 0, 1)]
+    assert kb.node('a').attrs['value'] == 2
+
+    # Watchers run after every change is made.
+    calls.clear()
+    def total(node, prev_val):
+        calls.append(sum(kb.node(name).attrs['value'] for name in 'abcd'))
+    kb.node('a').watch('total', total)
+    with kb.transaction():
+        kb.node('a').total = 1
+        for name in 'abcd':
+            kb.node(name).value = 10
+    assert calls.count(40) == 1
+
+    # Nested transactions take effect when the outermost one ends.
+    with kb.transaction():
+        with kb.transaction():
+            kb.node('b').value = 5
+        assert kb.node('b').attrs['value'] == 10
+    assert kb.node('b').attrs['value'] == 5
+
+    # An exception discards every change.
+    try:
+        with kb.transaction():
+            kb.node('b').value = 6
+            with kb.transaction():
+                kb.node('c').value = 6
+                raise ValueError
+    except ValueError:
+        pass
+    assert kb.node('b').value == 5 and kb.node('c').value == 10
+    assert kb._transaction is None
+
+    # An exception caught inside an outer transaction discards only the inner changes.
+    with kb.transaction():
+        kb.node('b').value = 6
+        kb.node('c').value = 6
+        try:
+            with kb.transaction():
+                kb.node('b').value = 7
+                kb.node('d').value = 7
+                raise ValueError
+        except ValueError:
+            pass
+        assert kb.node('b').value == 6 and kb.node('d').value == 10
+    assert kb.node('b').value == 6 and kb.node('c').value == 6 and kb.node('d').value == 10
+
+    # Deleting, and changes made without propagating.
+    calls.clear()
+    with kb.transaction():
+        del kb.node('d')['value']
+        assert kb.node('d').value is None
+        with kb.dont_propagate():
+            kb.node('c').value = 7
+            with kb.dont_propagate():
+                pass
+            assert kb._dont_propagate
+        try:
+            del kb.node('d')['nothing']
+            assert False
+        except KeyError:
+            pass
+    assert 'value' not in kb.node('d').attrs and kb.node('c').value == 7
+    assert calls == []
+
+    edge = kb.edge('a', 'is_linked', 'b')
+    edge_calls = []
+    edge.watch('zig', lambda edge, prev_val: edge_calls.append((prev_val, edge.zig)))
+    with kb.transaction():
+        edge.zig += 1
+        edge.zig += 1
+        assert edge.zig == 3 and edge.attrs['zig'] == 1
+    assert edge_calls == [(1, 3)]
+
+print('All transaction tests passed.')
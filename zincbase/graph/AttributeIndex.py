@@ -0,0 +1,216 @@
+"""Secondary indexes on node and edge attributes, and the `where` filters that use them \
+(see `KB.create_index` and `KB.filter`)."""
+
+import bisect
+import numbers
+import operator
+
+import numpy as np
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, operand: value in operand
+}
+
+# Operands of `in` that indexes can answer for; for a string, `in` finds substrings.
+_COLLECTIONS = (list, tuple, set, frozenset)
+
+def _family(value):
+    """Values in the same family can be ordered against each other."""
+    # numbers.Real takes in NumPy's integers and floats; complex numbers have no order.
+    if isinstance(value, (numbers.Real, np.bool_)):
+        return None if value != value else 'number' # NaN is in no order
+    if isinstance(value, str):
+        return 'str'
+    return None
+
+class HashIndex:
+    """Index for `==` and `in`: the keys having each value. Values that can't be \
+    hashed aren't indexed."""
+    def __init__(self):
+        self._buckets = {}
+        self._values = {}
+
+    def add(self, key, value):
+        self.remove(key)
+        try:
+            bucket = self._buckets.setdefault(value, {})
+        except TypeError:
+            return
+        bucket[key] = None
+        self._values[key] = value
+
+    def remove(self, key):
+        if key in self._values:
+            value = self._values.pop(key)
+            bucket = self._buckets[value]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[value]
+
+    def find(self, op, operand):
+        """The keys whose value passes `op operand`, or None if the index can't tell."""
+        try:
+            if op == '==':
+                return list(self._buckets.get(operand, ()))
+            if op == 'in' and isinstance(operand, _COLLECTIONS):
+                return list({key: None for value in set(operand) for key in self._buckets.get(value, ())})
+        except TypeError:
+            pass
+        return None
+
+class SortedIndex:
+    """Index for ranges (and `==`): keys sorted by value, found by binary search. \
+    Numbers and strings are kept apart, as they can't be compared with each other; \
+    other values aren't indexed."""
+    def __init__(self):
+        self._sorted = {} # family -> ([values], [keys]), in order of value
+        self._values = {}
+
+    def add(self, key, value):
+        self.remove(key)
+        family = _family(value)
+        if family is None:
+            return
+        values, keys = self._sorted.setdefault(family, ([], []))
+        i = bisect.bisect_right(values, value)
+        values.insert(i, value)
+        keys.insert(i, key)
+        self._values[key] = value
+
+    def remove(self, key):
+        if key in self._values:
+            value = self._values.pop(key)
+            values, keys = self._sorted[_family(value)]
+            i = keys.index(key, bisect.bisect_left(values, value), bisect.bisect_right(values, value))
+            del values[i]
+            del keys[i]
+
+    def find(self, op, operand):
+        """The keys whose value passes `op operand`, or None if the index can't tell."""
+        if op == 'in':
+            if not isinstance(operand, _COLLECTIONS):
+                return None
+            try:
+                found = [self.find('==', value) for value in set(operand)]
+            except TypeError:
+                return None
+            if any(keys is None for keys in found):
+                return None
+            return [key for keys in found for key in keys]
+        family = _family(operand)
+        if family is None or op == '!=':
+            return None
+        values, keys = self._sorted.get(family, ([], []))
+        if op == '==':
+            return keys[bisect.bisect_left(values, operand):bisect.bisect_right(values, operand)]
+        if op == '<':
+            return keys[:bisect.bisect_left(values, operand)]
+        if op == '<=':
+            return keys[:bisect.bisect_right(values, operand)]
+        if op == '>':
+            return keys[bisect.bisect_right(values, operand):]
+        if op == '>=':
+            return keys[bisect.bisect_left(values, operand):]
+        return None
+
+class AttributeIndexes:
+    """The indexes declared on the attributes of one kind of element (nodes or edges), \
+    kept up to date by the KB as attributes are set and deleted."""
+    def __init__(self):
+        self._indexes = {} # attribute -> {'hash': HashIndex, 'sorted': SortedIndex}
+
+    def __bool__(self):
+        return bool(self._indexes)
+
+    def __contains__(self, attribute):
+        return attribute in self._indexes
+
+    def create(self, attribute, sorted, items):
+        """Index `attribute` of each (key, attribute dict) in `items`."""
+        index = SortedIndex() if sorted else HashIndex()
+        for key, attrs in items:
+            if attribute in attrs:
+                index.add(key, attrs[attribute])
+        self._indexes.setdefault(attribute, {})['sorted' if sorted else 'hash'] = index
+
+    def drop(self, attribute):
+        self._indexes.pop(attribute, None)
+
+    def set(self, key, attribute, value):
+        for index in self._indexes.get(attribute, {}).values():
+            index.add(key, value)
+
+    def update(self, key, attrs):
+        if self._indexes:
+            for attribute, value in attrs.items():
+                self.set(key, attribute, value)
+
+    def delete(self, key, attribute):
+        for index in self._indexes.get(attribute, {}).values():
+            index.remove(key)
+
+    def find(self, attribute, op, operand):
+        for index in self._indexes.get(attribute, {}).values():
+            keys = index.find(op, operand)
+            if keys is not None:
+                return keys
+        return None
+
+def conditions(where):
+    """`where` as a list of (attribute, operator, operand). Each attribute's condition \
+    is a value it must equal, an `(operator, operand)` tuple, or a list of them."""
+    parsed = []
+    for attribute, condition in where.items():
+        for cond in (condition if isinstance(condition, list) else [condition]):
+            if isinstance(cond, tuple) and len(cond) == 2 and cond[0] in OPERATORS:
+                parsed.append((attribute, cond[0], cond[1]))
+            else:
+                parsed.append((attribute, '==', cond))
+    return parsed
+
+def passes(attrs, conds):
+    """Whether an attribute dict meets every condition. An attribute it doesn't \
+    have, or can't be compared with the operand, fails."""
+    for attribute, op, operand in conds:
+        if attribute not in attrs:
+            return False
+        try:
+            if not OPERATORS[op](attrs[attribute], operand):
+                return False
+        except TypeError:
+            return False
+    return True
+
+def select(where, indexes, keys, attrs_of):
+    """The keys whose attributes meet the conditions in `where`.
+
+    Conditions on indexed attributes are answered by the indexes, and the rest \
+    are checked only against what those let through. With no index to use, \
+    every one of `keys` is checked.
+
+    :param dict where: Conditions (see `conditions`)
+    :param AttributeIndexes indexes: Indexes to use
+    :param function keys: Called for all the keys, in order, if need be
+    :param function attrs_of: Gets the attribute dict of a key
+    """
+    conds = conditions(where)
+    found = None
+    unindexed = []
+    for attribute, op, operand in conds:
+        hits = indexes.find(attribute, op, operand) if op in OPERATORS else None
+        if hits is None:
+            unindexed.append((attribute, op, operand))
+        elif found is None:
+            found = hits
+        else:
+            hits = set(hits)
+            found = [key for key in found if key in hits]
+    if found is None:
+        return [key for key in keys() if passes(attrs_of(key), conds)]
+    return [key for key in found if passes(attrs_of(key), unindexed)]
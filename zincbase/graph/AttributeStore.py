@@ -0,0 +1,101 @@
+"""Columns of numeric node attributes, for vectorized filtering (see `KB.filter_fast`)."""
+
+import numpy as np
+
+from zincbase.graph.AttributeIndex import AttributeIndexes
+
+def _number(value):
+    if isinstance(value, (bool, int, float, np.number, np.bool_)):
+        try:
+            return float(value)
+        except OverflowError:
+            pass
+    return np.nan
+
+class AttributeStore:
+    """Node attributes as NumPy arrays, one per attribute, indexed by a dense id \
+    given to each node as it first appears. Values are kept as floats; values \
+    that aren't numbers, and nodes without the attribute, are NaN.
+
+    A column is only built, from the graph, the first time it's asked for, and \
+    from then on is kept up to date by the KB as attributes are set and deleted \
+    (through `Node`, `store`, bulk loads and the like). Changes made to the \
+    graph's attribute dicts directly aren't seen.
+
+    The indexes declared on node attributes (see `KB.create_index`) are kept up \
+    to date along with the columns.
+
+    :ivar dict ids: Node name -> id
+    :ivar list names: Node name of each id
+    :ivar AttributeIndexes indexes: Indexes on node attributes
+    """
+    def __init__(self, G):
+        self.G = G
+        self.indexes = AttributeIndexes()
+        self.ids = {}
+        self.names = []
+        self._columns = {}
+        self._capacity = 0
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def _id(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+            if i >= self._capacity:
+                self._grow()
+        return i
+
+    def _grow(self):
+        self._capacity = max(1024, 2 * self._capacity)
+        for key, column in self._columns.items():
+            grown = np.full(self._capacity, np.nan)
+            grown[:len(column)] = column
+            self._columns[key] = grown
+
+    def column(self, key):
+        """The values of an attribute, by node id."""
+        if key not in self._columns:
+            self._columns[key] = np.full(self._capacity, np.nan)
+            for name, value in self.G.nodes(data=key):
+                if value is not None:
+                    self.set(name, key, value)
+        return self._columns[key][:len(self.names)]
+
+    def matrix(self, keys):
+        """An array with a row for each node id and a column for each of `keys`."""
+        for key in keys:
+            # Building one column can give new nodes ids, and so grow the others.
+            self.column(key)
+        n = len(self.names)
+        return np.stack([self._columns[key][:n] for key in keys], axis=1)
+
+    def rows(self, names, keys):
+        """Like `matrix`, but with a row for each of `names`, in order (all NaN for \
+        nodes that don't have ids)."""
+        matrix = self.matrix(keys)
+        ids = np.fromiter((self.ids.get(name, -1) for name in names), dtype=np.int64, count=len(names))
+        rows = np.full((len(names), len(keys)), np.nan)
+        known = ids >= 0
+        rows[known] = matrix[ids[known]]
+        return rows
+
+    def set(self, name, key, value):
+        if key in self._columns:
+            i = self._id(name)
+            self._columns[key][i] = _number(value)
+        if key in self.indexes:
+            self.indexes.set(name, key, value)
+
+    def update(self, name, attributes):
+        for key, value in attributes.items():
+            self.set(name, key, value)
+
+    def delete(self, name, key):
+        if key in self._columns and name in self.ids:
+            self._columns[key][self.ids[name]] = np.nan
+        if key in self.indexes:
+            self.indexes.delete(name, key)
@@ -0,0 +1,39 @@
+from collections.abc import Mapping
+import copy
+
+class AttrsView(Mapping):
+    """Read-only view of the attributes of a node or edge, straight from its \
+    attribute dict in the graph, less the keys ZincBase keeps there for itself. \
+    Nothing is copied, so it stays up to date as the attributes change; for a \
+    copy that doesn't, use `attrs_copy()` on the node or edge (or `copy()` here).
+
+    :param dict attrs: The attribute dict in the graph
+    :param frozenset hidden: Keys to leave out
+    """
+    __slots__ = ('_attrs', '_hidden')
+
+    def __init__(self, attrs, hidden):
+        self._attrs = attrs
+        self._hidden = hidden
+
+    def __getitem__(self, key):
+        if key in self._hidden:
+            raise KeyError(key)
+        return self._attrs[key]
+
+    def __contains__(self, key):
+        return key in self._attrs and key not in self._hidden
+
+    def __iter__(self):
+        hidden = self._hidden
+        return (key for key in self._attrs if key not in hidden)
+
+    def __len__(self):
+        return sum(1 for key in self._attrs if key not in self._hidden)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        """The attributes as a new dict, copied deeply."""
+        return copy.deepcopy(dict(self))
@@ -1,9 +1,9 @@
 from collections import defaultdict
-import copy
-
-import networkx as nx
 
 from zincbase import context
+from zincbase.graph.AttrsView import AttrsView
+
+_HIDDEN = frozenset(('pred', '_watches'))
 
 class Edge:
     """Class representing an edge in the KB.
@@ -13,9 +13,13 @@ class Edge:
         super().__setattr__('_sub', str(sub))
         super().__setattr__('_pred', str(pred))
         super().__setattr__('_ob', str(ob))
+        super().__setattr__('_triple', (self._sub, self._pred, self._ob))
         super().__setattr__('_recursion_depth', 0)
         super().__setattr__('_watches', defaultdict(list))
         super().__setattr__('_edge', context.kb.G[self._sub][self._ob])
+        # The keys of the edges (usually one) between sub and ob with this predicate,
+        # so that their attribute dicts needn't be searched for.
+        super().__setattr__('_keys', context.kb._edge_keys_of(self._sub, self._pred, self._ob))
         for watch in watches:
             self._watches[watch[0]].append(watch[1])
     
@@ -34,28 +38,64 @@ class Edge:
 
     def __getattr__(self, key):
         try:
-            for _, edge in self._edge.items():
-                if edge['pred'] == self._pred:
-                    return edge[key]
-        except KeyError as e:
+            transaction = context.kb._transaction
+            if transaction is not None and transaction.has(self._triple, key):
+                return transaction.get(self._triple, key)
+            return self._edge[self._keys[0]][key]
+        except (KeyError, IndexError):
             return None
 
     def __setattr__(self, key, value):
-        if context.kb._global_propagations > context.kb._PROPAGATION_LIMIT:
+        kb = context.kb
+        queue = kb._propagation_queue
+        if queue is not None:
+            if not queue.admits(self._triple, kb):
+                return False
+        elif kb._global_propagations > kb._PROPAGATION_LIMIT:
             return False
-        if self._recursion_depth > context.kb._MAX_RECURSION:
+        elif self._recursion_depth > kb._MAX_RECURSION:
             return False
-        context.kb._global_propagations += 1
-        super().__setattr__('_recursion_depth', self._recursion_depth + 1)
-        for _, attrs in self._edge.items():
-            if attrs['pred'] == self._pred:
+        if kb._transaction is not None:
+            kb._transaction.set(self._triple, self, key, value, not kb._dont_propagate)
+            return
+        prev_val = self._write(key, value)
+        if kb._dont_propagate:
+            return
+        if queue is not None:
+            queue.schedule(self._triple, self, key, prev_val)
+            return
+        self._propagate(key, value, prev_val)
+
+    def _write(self, key, value):
+        """Set attribute `key` to `value` on every edge between the nodes with the \
+        predicate, without running watches, and return its previous value on the first."""
+        kb = context.kb
+        if kb._wal is not None:
+            kb._wal.append(['edge', self._sub, self._pred, self._ob, key, value])
+        prev_val = None
+        for i, edge_key in enumerate(self._keys):
+            attrs = self._edge[edge_key]
+            if i == 0:
                 prev_val = attrs.get(key, None)
-                attrs.update({key: value})
-                if not context.kb._dont_propagate:
-                    for watch_fn in self._watches.get(key, []):
-                        watch_fn(self, prev_val)
-                super().__setattr__('_recursion_depth', self._recursion_depth - 1)
-                context.kb._global_propagations -= 1
+            attrs[key] = value
+            kb._edge_indexes.set((self._sub, self._ob, edge_key), key, value)
+        return prev_val
+
+    def _propagate(self, key, value, prev_val):
+        """Run the watches of attribute `key` there and then, counting towards the KB's limits."""
+        kb = context.kb
+        kb._global_propagations += 1
+        super().__setattr__('_recursion_depth', self._recursion_depth + 1)
+        try:
+            self._fire(key, value, prev_val)
+        finally:
+            super().__setattr__('_recursion_depth', self._recursion_depth - 1)
+            kb._global_propagations -= 1
+
+    def _fire(self, key, value, prev_val):
+        """Run the watches of attribute `key`, changed from `prev_val` to `value`."""
+        for watch_fn in self._watches.get(key, []):
+            watch_fn(self, prev_val)
 
     def __getitem__(self, key):
         return self.__getattr__(key)
@@ -64,9 +104,25 @@ class Edge:
         return self.__setattr__(key, value)
     
     def __delitem__(self, attr):
-        for _, attrs in self._edge.items():
-            if attrs['pred'] == self._pred:
-                del attrs[attr]
+        transaction = context.kb._transaction
+        if transaction is not None:
+            if transaction.has(self._triple, attr) or all(attr in self._edge[key] for key in self._keys):
+                return transaction.delete(self._triple, self, attr)
+            raise KeyError(attr)
+        for edge_key in self._keys:
+            del self._edge[edge_key][attr]
+            context.kb._edge_indexes.delete((self._sub, self._ob, edge_key), attr)
+        if context.kb._wal is not None:
+            context.kb._wal.append(['del_edge', self._sub, self._pred, self._ob, attr])
+
+    def _delete(self, attr):
+        """Delete attribute `attr` from the edges that have it."""
+        for edge_key in self._keys:
+            if attr in self._edge[edge_key]:
+                del self._edge[edge_key][attr]
+                context.kb._edge_indexes.delete((self._sub, self._ob, edge_key), attr)
+        if context.kb._wal is not None:
+            context.kb._wal.append(['del_edge', self._sub, self._pred, self._ob, attr])
     
     def get(self, attr, default):
         try:
@@ -82,20 +138,21 @@ class Edge:
 
     @property
     def attrs(self):
-        """Returns attributes of the edge stored in the KB
+        """Returns attributes of the edge stored in the KB, as a read-only view \
+        that follows them as they change (see `AttrsView`); False if there's no such edge.
         """
-        attributes = None
-        for _, edge in self._edge.items():
-            if edge['pred'] == self._pred:
-                attributes = copy.deepcopy(edge)
-        if attributes is None:
+        if not self._keys:
             return False
-        try:
-            del attributes['pred']
-            del attributes['_watches']
-        except:
-            pass
-        return attributes
+        return AttrsView(self._edge[self._keys[-1]], _HIDDEN)
+
+    def attrs_copy(self):
+        """Returns a deep copy of the edge's attributes, which later changes \
+        to the edge don't affect (and vice versa); False if there's no such edge.
+        """
+        attributes = self.attrs
+        if attributes is False:
+            return False
+        return attributes.copy()
     
     def watch(self, attribute, fn):
         """Execute user-defined function when the value of attribute changes.
@@ -1,9 +1,9 @@
 from collections import defaultdict
-import copy
-
-import networkx as nx
 
 from zincbase import context
+from zincbase.graph.AttrsView import AttrsView
+
+_HIDDEN = frozenset(('_watches', '_new_neighbor_fn'))
 
 class Node:
     """Class representing a node in the KB.
@@ -11,8 +11,10 @@ class Node:
     def __init__(self, name, data, watches=[]):
         super().__setattr__('_name', name)
         super().__setattr__('_recursion_depth', 0)
-        nx.set_node_attributes(context.kb.G, {self._name: data})
-        self._watches = defaultdict(list)
+        # `data` is the node's attribute dict in its KB's graph, held on to so that
+        # getting and setting attributes doesn't have to look it up each time.
+        super().__setattr__('_attrs', data)
+        data['_watches'] = defaultdict(list)
         for watch in watches:
             self._watches[watch[0]].append(watch[1])
     
@@ -31,31 +33,65 @@ class Node:
 
     def __getattr__(self, key):
         try:
-            if key in ('__getstate__', '__deepcopy__', '__setstate__'):
+            if key in ('__getstate__', '__deepcopy__', '__setstate__', '_attrs'):
                 raise AttributeError
-            # TODO this is a bit of a hack
-            return context.kb.G.nodes(data=True)[self._name][key]
-        except KeyError as e:
+            transaction = context.kb._transaction
+            if transaction is not None and transaction.has(self._name, key):
+                return transaction.get(self._name, key)
+            return self._attrs[key]
+        except KeyError:
             return None
 
     def __setattr__(self, key, value):
-        if context.kb._global_propagations > context.kb._PROPAGATION_LIMIT:
+        kb = context.kb
+        queue = kb._propagation_queue
+        if queue is not None:
+            if not queue.admits(self._name, kb):
+                return False
+        elif kb._global_propagations > kb._PROPAGATION_LIMIT:
             return False
-        if self._recursion_depth > context.kb._MAX_RECURSION:
+        elif self._recursion_depth > kb._MAX_RECURSION:
             return False
-        context.kb._global_propagations += 1
-        super().__setattr__('_recursion_depth', self._recursion_depth + 1)
-        attrs = context.kb.G.nodes(data=True)[self._name]
+        if kb._transaction is not None:
+            kb._transaction.set(self._name, self, key, value, not kb._dont_propagate)
+            return
+        prev_val = self._write(key, value)
+        if kb._dont_propagate:
+            return
+        if queue is not None:
+            queue.schedule(self._name, self, key, prev_val)
+            return
+        self._propagate(key, value, prev_val)
+
+    def _write(self, key, value):
+        """Set attribute `key` to `value`, without running watches, and return its previous value."""
+        kb = context.kb
+        if kb._wal is not None and key not in ('_watches', '_new_neighbor_fn'):
+            kb._wal.append(['node', self._name, key, value])
+        attrs = self._attrs
         prev_val = attrs.get(key, None)
-        attrs.update({key: value})
-        nx.set_node_attributes(context.kb.G, {self._name: attrs})
-        if not context.kb._dont_propagate:
-            for watch_fn in self._watches.get(key, []):
-                watch_fn(self, prev_val)
-            for rule in self.rules:
-                rule.execute_change(self, key, value, prev_val)
-        super().__setattr__('_recursion_depth', self._recursion_depth - 1)
-        context.kb._global_propagations -= 1
+        attrs[key] = value
+        kb._attributes.set(self._name, key, value)
+        return prev_val
+
+    def _propagate(self, key, value, prev_val):
+        """Run the watches of attribute `key` there and then, counting towards the KB's limits."""
+        kb = context.kb
+        kb._global_propagations += 1
+        super().__setattr__('_recursion_depth', self._recursion_depth + 1)
+        try:
+            self._fire(key, value, prev_val)
+        finally:
+            super().__setattr__('_recursion_depth', self._recursion_depth - 1)
+            kb._global_propagations -= 1
+
+    def _fire(self, key, value, prev_val):
+        """Run the watches of attribute `key`, changed from `prev_val` to `value`, and the rules the node affects."""
+        kb = context.kb
+        for watch_fn in self._watches.get(key, []):
+            watch_fn(self, prev_val)
+        for rule in kb._node_rules.affected(self._name, kb._variable_rules):
+            rule.execute_change(self, key, value, prev_val)
 
     def __getitem__(self, key):
         return self.__getattr__(key)
@@ -64,20 +100,36 @@ class Node:
         return self.__setattr__(key, value)
     
     def __delitem__(self, key):
-        del context.kb.G.nodes[self._name][key]
+        transaction = context.kb._transaction
+        if transaction is not None:
+            if transaction.has(self._name, key) or key in self._attrs:
+                return transaction.delete(self._name, self, key)
+            raise KeyError(key)
+        if key not in self._attrs:
+            raise KeyError(key)
+        self._delete(key)
+
+    def _delete(self, key):
+        """Delete attribute `key`, if the node has it."""
+        if key not in self._attrs:
+            return
+        del self._attrs[key]
+        context.kb._attributes.delete(self._name, key)
+        if context.kb._wal is not None:
+            context.kb._wal.append(['del_node', self._name, key])
     
     @property
     def attrs(self):
-        """Returns attributes of the node stored in the KB
+        """Returns attributes of the node stored in the KB, as a read-only view \
+        that follows them as they change (see `AttrsView`).
         """
-        attributes = context.kb.G.nodes(data=True)[self._name]
-        attributes = copy.deepcopy(attributes)
-        try:
-            del attributes['_watches']
-            del attributes['_new_neighbor_fn']
-        except:
-            pass
-        return attributes
+        return AttrsView(self._attrs, _HIDDEN)
+
+    def attrs_copy(self):
+        """Returns a deep copy of the node's attributes, which later changes \
+        to the node don't affect (and vice versa).
+        """
+        return self.attrs.copy()
     
     @property
     def neighbors(self):
@@ -85,6 +137,18 @@ class Node:
         [(neighbor_name, [{'pred': predicate aka edge_relation}])]
         """
         return context.kb.neighbors(self._name)
+
+    @property
+    def out_neighbors(self):
+        """Returns the nodes this node has edges to, in the same format as `neighbors`.
+        """
+        return context.kb.out_neighbors(self._name)
+
+    @property
+    def in_neighbors(self):
+        """Returns the nodes that have edges to this node, in the same format as `neighbors`.
+        """
+        return context.kb.in_neighbors(self._name)
     
     @property
     def atom(self):
@@ -96,27 +160,13 @@ class Node:
         >>> kb.node('simpsons').atom
         [tv_show]
         """
-        # TODO cache this once computed the first time, although,
-        # beware when a new rule is added afterwards (invalidate)
-        for rule in context.kb.rules:
-            if len(rule.head.args) == 1 and rule.head.args[0].pred == self._name:
-                yield rule.head.pred
+        return iter(context.kb._node_rules.types(self._name))
     
     @property
     def rules(self):
         """Yield the rules that are impacted by this node."""
-        already = []
-        for rule in context.kb._variable_rules:
-            if not rule.goals:
-                continue
-            for goal in rule.goals:
-                if rule.head.pred in already:
-                    continue
-                already.append(str(rule.head.pred))
-                for _type in self.atom:
-                    if _type in goal.pred:
-                        yield rule
-
+        kb = context.kb
+        return iter(kb._node_rules.affected(self._name, kb._variable_rules))
     
     def watch(self, attribute, fn):
         """Execute user-defined function when the value of attribute changes.
@@ -0,0 +1,65 @@
+"""The types of nodes, and the rules that changes to them affect.
+
+A node's types (`Node.atom`) are the predicates of the rules with it as their
+only argument, like `human(socrates)`, and the rules it affects (`Node.rules`)
+are the rules with a body that mentions one of its types. Both are asked for
+on every change to a node's attributes, so rather than scanning the KB's rules
+each time, `NodeRules` keeps each node's types as rules are stored and deleted,
+and remembers the rules each node affects until a rule with a body, or one of
+the node's types, is stored or deleted.
+"""
+
+class NodeRules:
+    """Types of, and rules affected by, each node in a KB."""
+    def __init__(self):
+        self._types = {}
+        self._affects = {}
+
+    def add(self, rule):
+        """Note a rule that has just been stored in the KB."""
+        head = rule.head
+        if len(head.args) == 1:
+            name = head.args[0].pred
+            self._types.setdefault(name, []).append(head.pred)
+            self._affects.pop(name, None)
+        if rule.goals:
+            self._affects.clear()
+
+    def remove(self, rule):
+        """Note a rule that has just been deleted from the KB."""
+        head = rule.head
+        if len(head.args) == 1:
+            name = head.args[0].pred
+            types = self._types.get(name)
+            if types and head.pred in types:
+                types.remove(head.pred)
+                if not types:
+                    del self._types[name]
+            self._affects.pop(name, None)
+        if rule.goals:
+            self._affects.clear()
+
+    def types(self, name):
+        """The types of node `name`, in the order their rules were stored."""
+        return self._types.get(name, ())
+
+    def affected(self, name, variable_rules):
+        """The rules (of `variable_rules`, the KB's rules with bodies) that a change \
+        to node `name` affects."""
+        rules = self._affects.get(name)
+        if rules is None:
+            rules = self._affects[name] = tuple(self._affected(name, variable_rules))
+        return rules
+
+    def _affected(self, name, variable_rules):
+        # Only the first rule for each predicate counts, and only its first goal.
+        types = self.types(name)
+        already = set()
+        for rule in variable_rules:
+            if not rule.goals or rule.head.pred in already:
+                continue
+            already.add(rule.head.pred)
+            goal = rule.goals[0]
+            for _type in types:
+                if _type in goal.pred:
+                    yield rule
@@ -0,0 +1,96 @@
+"""Queued propagation of attribute changes to watch functions.
+
+By default, setting an attribute on a node or edge runs its watch functions
+(and the `on_change` of the rules it affects) there and then, so a cascade of
+changes is a chain of nested calls, as deep as the cascade is long. With
+`KB.set_propagation_mode('queue')`, a change instead puts its watchers on a
+queue, which the outermost change works through in a loop, so a cascade of
+any length runs at a constant depth of the Python stack.
+
+Changes to an attribute whose watchers are already waiting to run are
+coalesced with it: they run once, with the value from before the first change.
+The KB's limits still apply, counted rather than taken from the stack: in one
+cascade, a node or edge accepts no more changes once its watchers have run more
+than the recursion limit, and a change made more than the propagation limit
+steps away from the one that set off the cascade is rejected.
+"""
+
+from collections import deque
+from itertools import count
+import heapq
+
+class PropagationQueue:
+    """Runs watchers of changed attributes in FIFO order or, given `priority`, \
+    in order of priority.
+
+    :param function priority: Optional; takes a node or edge and the name of \
+    its attribute that changed, and returns a key to run its watchers in order \
+    of, lowest first. Ties run in the order they were queued.
+    :ivar int runs: Times watchers have been run from the queue
+    :ivar int coalesced: Changes merged into ones whose watchers were already queued
+    """
+    def __init__(self, priority=None):
+        self.priority = priority
+        self.runs = 0
+        self.coalesced = 0
+        self.draining = False
+        self._queue = deque() if priority is None else []
+        self._seq = count()
+        self._pending = {}
+        self._runs_of = {}
+        self._step = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __repr__(self):
+        return '<PropagationQueue {} queued, {} runs, {} coalesced>'.format(
+            len(self), self.runs, self.coalesced)
+
+    def admits(self, target_key, kb):
+        """Whether the node or edge known by `target_key` may change now, \
+        within `kb`'s recursion and propagation limits."""
+        if not self.draining:
+            return True
+        return (self._runs_of.get(target_key, 0) <= kb._MAX_RECURSION
+                and self._step + 1 <= kb._PROPAGATION_LIMIT)
+
+    def schedule(self, target_key, target, attribute, prev_val, drain=True):
+        """Queue the watchers of `target`'s `attribute`, which was `prev_val` \
+        before it changed, and, if `drain`, run the queue unless it's already being run."""
+        key = (target_key, attribute)
+        step = self._step + 1 if self.draining else 0
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry[2] = min(entry[2], step)
+            self.coalesced += 1
+        else:
+            self._pending[key] = [target, prev_val, step]
+            if self.priority is None:
+                self._queue.append(key)
+            else:
+                heapq.heappush(self._queue, (self.priority(target, attribute), next(self._seq), key))
+        if drain and not self.draining:
+            self.drain()
+
+    def drain(self):
+        """Run queued watchers, and the ones they queue in turn, until none are left."""
+        if self.draining:
+            return
+        self.draining = True
+        try:
+            while self._queue:
+                if self.priority is None:
+                    key = self._queue.popleft()
+                else:
+                    key = heapq.heappop(self._queue)[2]
+                target, prev_val, self._step = self._pending.pop(key)
+                self._runs_of[key[0]] = self._runs_of.get(key[0], 0) + 1
+                self.runs += 1
+                target._fire(key[1], target[key[1]], prev_val)
+        finally:
+            self.draining = False
+            self._queue.clear()
+            self._pending.clear()
+            self._runs_of.clear()
+            self._step = 0
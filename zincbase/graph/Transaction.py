@@ -0,0 +1,68 @@
+"""Batches of attribute changes, applied all at once (see `KB.transaction`).
+
+Inside a transaction, setting or deleting an attribute of a node or edge only
+notes the change. Reading the attribute back from the node or edge sees it,
+but nothing else does (not `attrs`, nor the KB's attribute columns and indexes)
+until the transaction commits. Then the changes are all made, and only after
+that are watchers run, once for each attribute changed, however many times it
+was set. A transaction inside another is part of it, but if its block raises,
+the changes made in that block are rolled back (see `savepoint`).
+"""
+
+_DELETED = object()
+
+class Transaction:
+    """Attribute changes held back until they're committed."""
+    def __init__(self):
+        self._changes = {}
+
+    def __len__(self):
+        return len(self._changes)
+
+    def __repr__(self):
+        return '<Transaction {} changes>'.format(len(self))
+
+    def set(self, target_key, target, attribute, value, propagate):
+        """Note that `target`, a node or edge known by `target_key`, had `attribute` \
+        set to `value`; if `propagate`, its watchers are to run when it's committed."""
+        change = self._changes.get((target_key, attribute))
+        if change is None:
+            self._changes[(target_key, attribute)] = [target, value, propagate]
+        else:
+            change[1] = value
+            change[2] = change[2] or propagate
+
+    def delete(self, target_key, target, attribute):
+        """Note that `target` had `attribute` deleted."""
+        self.set(target_key, target, attribute, _DELETED, False)
+
+    def has(self, target_key, attribute):
+        """Whether the transaction changes the attribute of the node or edge known by `target_key`."""
+        return (target_key, attribute) in self._changes
+
+    def get(self, target_key, attribute):
+        """The value the transaction gives the attribute (None if it deletes it)."""
+        value = self._changes[(target_key, attribute)][1]
+        return None if value is _DELETED else value
+
+    def savepoint(self):
+        """The changes noted so far, to go back to with `rollback`."""
+        return {key: list(change) for key, change in self._changes.items()}
+
+    def rollback(self, savepoint):
+        """Forget the changes noted since `savepoint` was taken."""
+        self._changes = savepoint
+
+    def commit(self):
+        """Make the changes, and return those whose watchers should run, \
+        as tuples of (target_key, target, attribute, value, previous value)."""
+        to_propagate = []
+        for (target_key, attribute), (target, value, propagate) in self._changes.items():
+            if value is _DELETED:
+                target._delete(attribute)
+                continue
+            prev_val = target._write(attribute, value)
+            if propagate:
+                to_propagate.append((target_key, target, attribute, value, prev_val))
+        self._changes.clear()
+        return to_propagate
@@ -0,0 +1,94 @@
+"""Path search over the KB's graph (see `KB.paths` and `KB.bfs`)."""
+
+def unwind(step):
+    """The path ending in `step`, which is `(pred, node, previous step or None)`, \
+    as a list of `(pred, node)`."""
+    path = []
+    while step is not None:
+        path.append(step[:2])
+        step = step[2]
+    path.reverse()
+    return path
+
+def _expand(adjacency, frontier, parents, preds, exclude_preds):
+    """Visit the nodes one edge on from `frontier` that haven't been visited yet, \
+    noting, for each, every (pred, node) in `frontier` it can be reached from."""
+    layer = {}
+    for node in frontier:
+        for neighbor, edges in adjacency[node].items():
+            if neighbor in parents:
+                continue
+            for data in edges.values():
+                pred = data['pred']
+                if preds is not None and pred not in preds:
+                    continue
+                if exclude_preds is not None and pred in exclude_preds:
+                    continue
+                layer.setdefault(neighbor, {})[(pred, node)] = None
+    parents.update(layer)
+    return layer
+
+def _to(parents, node):
+    """Every path from where the search started to `node`, following its parents."""
+    if not parents[node]:
+        yield []
+        return
+    for pred, parent in parents[node]:
+        for path in _to(parents, parent):
+            path.append((pred, node))
+            yield path
+
+def _from(children, node):
+    """Every path on from `node` to where the search started, following its children."""
+    if not children[node]:
+        yield []
+        return
+    for pred, child in children[node]:
+        for path in _from(children, child):
+            yield [(pred, child)] + path
+
+def shortest_paths(G, start_node, target_node, max_depth=10, reverse=False, preds=None, exclude_preds=None):
+    """Yield every shortest path from start_node to target_node, of at most `max_depth` \
+    edges, as lists of `(pred, node)` (the format of `KB.bfs`).
+
+    The search is breadth first from both ends at once, each time going a step \
+    further from whichever end has fewer nodes left to expand, until they meet. \
+    Each node is visited at most once from each end, and nodes keep pointers to \
+    those they were reached from rather than copies of paths, so a search touches \
+    only the part of the graph within about half the path's length of either end.
+
+    :param G: The graph
+    :param bool reverse: Follow edges from object to subject
+    :param preds: If given, only follow edges with these predicates
+    :param exclude_preds: If given, never follow edges with these predicates
+    """
+    if start_node not in G or target_node not in G:
+        return
+    if start_node == target_node:
+        yield []
+        return
+    if preds is not None:
+        preds = set(preds)
+    if exclude_preds is not None:
+        exclude_preds = set(exclude_preds)
+    forward, backward = (G.pred, G.succ) if reverse else (G.succ, G.pred)
+    parents, children = {start_node: {}}, {target_node: {}}
+    ahead, behind = [start_node], [target_node]
+    depth = 0
+    while ahead and behind and depth < max_depth:
+        depth += 1
+        if len(ahead) <= len(behind):
+            layer = _expand(forward, ahead, parents, preds, exclude_preds)
+            ahead = list(layer)
+        else:
+            layer = _expand(backward, behind, children, preds, exclude_preds)
+            behind = list(layer)
+        # The first nodes reached from both ends all lie on shortest paths, at the
+        # same distance from each end.
+        meeting = [node for node in layer if node in parents and node in children]
+        if meeting:
+            for node in meeting:
+                for head in _to(parents, node):
+                    for tail in _from(children, node):
+                        yield head + tail
+            return
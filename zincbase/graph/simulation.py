@@ -0,0 +1,36 @@
+"""Synchronous, vectorized simulation on the KB's graph (see `KB.simulate`)."""
+
+import numpy as np
+from scipy import sparse
+
+def adjacency(G, index, preds=None, reverse=False):
+    """The graph as a SciPy CSR matrix, with a 1 at (i, j) where node i has an \
+    edge to node j (with `reverse`, from node j to node i), and 0 elsewhere.
+
+    :param G: The graph
+    :param dict index: Node name -> its row and column in the matrix
+    :param preds: If given, only edges with these predicates count
+    """
+    if preds is not None:
+        preds = set(preds)
+    rows, cols = [], []
+    for sub, ob, pred in G.edges(data='pred'):
+        if preds is not None and pred not in preds:
+            continue
+        rows.append(index[sub])
+        cols.append(index[ob])
+    if reverse:
+        rows, cols = cols, rows
+    n = len(index)
+    matrix = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n)).tocsr()
+    # Parallel edges make one neighbor, as for `KB.neighbors`.
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def changed_cells(before, after):
+    """(row, column) of each value of `after` that differs from `before`, ignoring NaNs in `after`."""
+    changed = after != before
+    if after.dtype.kind == 'f':
+        changed &= ~np.isnan(after)
+    return zip(*np.nonzero(changed))
@@ -0,0 +1,104 @@
+"""Clause index for ZincBase's Prolog-like rules.
+
+Rules are indexed by (predicate, arity) and, for the first two arguments of
+their head, by the principal functor of that argument. A goal like
+`locatedin(fiji, X)` then only has to be tried against the clauses whose
+first argument is `fiji` (or a variable), instead of every rule in the KB.
+"""
+
+import heapq
+from itertools import count
+
+from zincbase.utils.type_checks import isVar
+
+_INDEXED_ARGS = 2
+
+def arg_key(term):
+    """Index key of an argument: its functor and arity, or None for anything
+    that can match any argument (variables and the `_` wildcard)."""
+    if term is None or term.pred == '_' or isVar(term):
+        return None
+    return (term.pred, len(term.args))
+
+class ClauseIndex:
+    """Keeps rules findable by predicate/arity and bound argument."""
+    def __init__(self):
+        self._seq = count()
+        self._seqs = {}
+        self._by_pred = {}
+        self._by_arg = {}
+        self._unbound = {}
+
+    def __len__(self):
+        return len(self._seqs)
+
+    def add(self, rule):
+        """Index a rule. Rules are returned by lookups in the order they were added."""
+        seq = next(self._seq)
+        self._seqs[id(rule)] = seq
+        head = rule.head
+        functor = (head.pred, len(head.args))
+        self._by_pred.setdefault(functor, {})[seq] = rule
+        for pos, key in self._head_keys(head):
+            if key is None:
+                self._unbound.setdefault(functor + (pos,), {})[seq] = rule
+            else:
+                self._by_arg.setdefault(functor + (pos, key), {})[seq] = rule
+
+    def remove(self, rule):
+        """Drop a rule from the index. Returns False if it wasn't indexed."""
+        seq = self._seqs.pop(id(rule), None)
+        if seq is None:
+            return False
+        head = rule.head
+        functor = (head.pred, len(head.args))
+        self._discard(self._by_pred, functor, seq)
+        for pos, key in self._head_keys(head):
+            if key is None:
+                self._discard(self._unbound, functor + (pos,), seq)
+            else:
+                self._discard(self._by_arg, functor + (pos, key), seq)
+        return True
+
+    def candidates(self, term, resolve=None):
+        """Rules whose head may unify with `term`, in the order they were stored.
+
+        :param Term term: The goal to find clauses for
+        :param function resolve: Optional; maps a variable argument of `term` to \
+        the term it is currently bound to (or None if it is unbound).
+        """
+        functor = (term.pred, len(term.args))
+        best = None
+        for pos in range(min(len(term.args), _INDEXED_ARGS)):
+            arg = term.args[pos]
+            if resolve is not None and isVar(arg):
+                arg = resolve(arg)
+            key = arg_key(arg)
+            if key is None:
+                continue
+            bound = self._by_arg.get(functor + (pos, key), {})
+            unbound = self._unbound.get(functor + (pos,), {})
+            if best is None or len(bound) + len(unbound) < len(best[0]) + len(best[1]):
+                best = (bound, unbound)
+        if best is None:
+            return list(self._by_pred.get(functor, {}).values())
+        bound, unbound = best
+        if not unbound:
+            return list(bound.values())
+        if not bound:
+            return list(unbound.values())
+        return [rule for _, rule in heapq.merge(bound.items(), unbound.items(), key=lambda x: x[0])]
+
+    @staticmethod
+    def _head_keys(head):
+        for pos in range(min(len(head.args), _INDEXED_ARGS)):
+            yield pos, arg_key(head.args[pos])
+
+    @staticmethod
+    def _discard(buckets, key, seq):
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.pop(seq, None)
+        if not bucket:
+            del buckets[key]
@@ -0,0 +1,159 @@
+"""Bottom-up, semi-naive evaluation of the Datalog subset of ZincBase's rules.
+
+Facts are kept as sets of argument tuples per predicate, with hash indexes on
+each argument position for joins. Every round only joins rules against the
+facts that were new in the previous round (the "delta"), so each derivation is
+found once rather than once per round, and duplicates are dropped by set
+membership.
+
+Only rules whose terms are all atoms or variables, and whose head variables
+all appear in the body, can be evaluated this way; `add_rule` refuses others.
+Likewise only ground, flat facts are considered.
+"""
+
+from zincbase.utils.type_checks import isVar
+
+def _flat(term):
+    return all(not arg.args for arg in term.args)
+
+def fact_of(rule):
+    """The (predicate, args) tuple for a stored fact, or None if it isn't a ground, flat fact."""
+    head = rule.head
+    if rule.goals or not _flat(head):
+        return None
+    if any(isVar(arg) or arg.pred == '_' for arg in head.args):
+        return None
+    return (head.pred, tuple(arg.pred for arg in head.args))
+
+class Relation:
+    __slots__ = ('tuples', 'index')
+
+    def __init__(self):
+        self.tuples = {} # Used as an ordered set, so that evaluation is deterministic.
+        self.index = {}
+
+    def add(self, args):
+        if args in self.tuples:
+            return False
+        self.tuples[args] = None
+        for pos, value in enumerate(args):
+            self.index.setdefault((pos, value), []).append(args)
+        return True
+
+    def discard(self, args):
+        if args not in self.tuples:
+            return False
+        del self.tuples[args]
+        for pos, value in enumerate(args):
+            self.index[(pos, value)].remove(args)
+        return True
+
+    def lookup(self, pattern):
+        """Tuples that agree with pattern, where None matches anything."""
+        best = None
+        for pos, value in enumerate(pattern):
+            if value is not None:
+                bucket = self.index.get((pos, value), ())
+                if best is None or len(bucket) < len(best):
+                    best = bucket
+        if best is None:
+            best = self.tuples
+        for args in best:
+            if all(v is None or v == a for v, a in zip(pattern, args)):
+                yield args
+
+class Datalog:
+    def __init__(self):
+        self.relations = {}
+        self.rules = []
+
+    def add_rule(self, rule):
+        """Add a rule to evaluate. Returns False, and ignores it, if it is
+        outside the Datalog subset this evaluator handles."""
+        if not rule.goals or not _flat(rule.head) or not all(_flat(g) for g in rule.goals):
+            return False
+        body_vars = set(arg.pred for goal in rule.goals for arg in goal.args if isVar(arg))
+        if any((isVar(arg) and arg.pred not in body_vars) or arg.pred == '_' for arg in rule.head.args):
+            return False
+        self.rules.append(rule)
+        return True
+
+    def add_fact(self, pred, args):
+        """Add a fact. Returns False if it was already known."""
+        return self.relations.setdefault((pred, len(args)), Relation()).add(args)
+
+    def remove_fact(self, pred, args):
+        relation = self.relations.get((pred, len(args)))
+        return relation is not None and relation.discard(args)
+
+    def run(self, delta=None):
+        """Evaluate the rules to a fixpoint.
+
+        :param list delta: (predicate, args) facts that are new since the last \
+        run; the default treats every known fact as new.
+        :return: List of the newly derived (predicate, args) facts, in the order \
+        they were derived.
+        """
+        if delta is None:
+            delta = [(key[0], args) for key, rel in self.relations.items() for args in rel.tuples]
+        derived = []
+        while delta:
+            new_delta = {}
+            for pred, args in delta:
+                new_delta.setdefault((pred, len(args)), Relation()).add(args)
+            delta = []
+            for rule in self.rules:
+                for i, goal in enumerate(rule.goals):
+                    key = (goal.pred, len(goal.args))
+                    if key not in new_delta:
+                        continue
+                    for bindings in self._join(rule.goals, i, new_delta[key]):
+                        args = tuple(bindings[a.pred] if isVar(a) else a.pred for a in rule.head.args)
+                        if self.add_fact(rule.head.pred, args):
+                            delta.append((rule.head.pred, args))
+            derived.extend(delta)
+        return derived
+
+    def _join(self, goals, first, delta):
+        """Bindings satisfying all goals, with goal `first` matched against delta only."""
+        order = [first] + [i for i in range(len(goals)) if i != first]
+        stack = [(0, {})]
+        while stack:
+            depth, bindings = stack.pop()
+            if depth == len(order):
+                yield bindings
+                continue
+            goal = goals[order[depth]]
+            relation = delta if depth == 0 else self.relations.get((goal.pred, len(goal.args)))
+            if relation is None:
+                continue
+            pattern = tuple(self._value(arg, bindings) for arg in goal.args)
+            matches = []
+            for args in relation.lookup(pattern):
+                extended = self._match(goal, args, bindings)
+                if extended is not None:
+                    matches.append((depth + 1, extended))
+            stack.extend(reversed(matches))
+
+    @staticmethod
+    def _value(arg, bindings):
+        if isVar(arg):
+            return bindings.get(arg.pred)
+        if arg.pred == '_':
+            return None
+        return arg.pred
+
+    @staticmethod
+    def _match(goal, args, bindings):
+        extended = None
+        for arg, value in zip(goal.args, args):
+            if not isVar(arg):
+                continue
+            bound = (extended or bindings).get(arg.pred)
+            if bound is None:
+                if extended is None:
+                    extended = dict(bindings)
+                extended[arg.pred] = value
+            elif bound != value:
+                return None
+        return bindings if extended is None else extended
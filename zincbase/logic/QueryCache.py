@@ -0,0 +1,108 @@
+"""A size-bounded cache of complete query results.
+
+Queries are keyed by their normalized form, with variables renamed in order of
+appearance, so `a(X, Y)` and `a(P, Q)` share an entry. Each entry remembers the
+predicates its answers depended on (see `QueryStats.predicates`), and is
+dropped as soon as a fact or rule for one of them is stored or deleted.
+"""
+
+from collections import OrderedDict
+
+from zincbase.logic.common import build_term
+from zincbase.utils.type_checks import isVar
+
+class QueryCache:
+    """Least-recently-used cache of the answers to exhausted queries.
+
+    :param int maxsize: Most entries to keep; 0 disables the cache
+    :ivar int hits: Queries answered from the cache
+    :ivar int misses: Queries that had to be searched
+    :ivar int evictions: Entries dropped to make room for newer ones
+    :ivar int invalidations: Entries dropped because a predicate they depend on changed
+    """
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.version = 0
+        self._entries = OrderedDict()
+        self._dependents = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '<QueryCache {}/{} entries, {} hits, {} misses, {} evictions>'.format(
+            len(self), self.maxsize, self.hits, self.misses, self.evictions)
+
+    @staticmethod
+    def key(term):
+        """The normalized form of a query, and its variable names in order of appearance."""
+        names = []
+        def rename(term):
+            if isVar(term):
+                if term.pred not in names:
+                    names.append(term.pred)
+                return build_term('V{}'.format(names.index(term.pred)), [])
+            if not term.args:
+                return term
+            return build_term(term.pred, [rename(arg) for arg in term.args])
+        return str(rename(term)), names
+
+    def get(self, key, names):
+        """The cached answers for a query, with its own variable names, or None."""
+        if not self.maxsize:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return [{names[i]: value for i, value in answer} if answer is not True else True
+                for answer in entry[0]]
+
+    def put(self, key, names, answers, predicates, version):
+        """Remember the answers to a query, unless the KB changed (its `version` moved on) while they were found."""
+        if not self.maxsize or version != self.version:
+            return
+        positions = {name: i for i, name in enumerate(names)}
+        answers = [tuple((positions[k], v) for k, v in answer.items()) if answer is not True else True
+                   for answer in answers]
+        self._entries[key] = (answers, frozenset(predicates))
+        self._entries.move_to_end(key)
+        for pred in predicates:
+            self._dependents.setdefault(pred, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, predicate):
+        """Forget every entry whose answers could change when `predicate` does."""
+        self.version += 1
+        for key in list(self._dependents.pop(predicate, ())):
+            if key in self._entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.version += 1
+        self._entries = OrderedDict()
+        self._dependents = {}
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._entries) > maxsize:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        _, predicates = self._entries.pop(key)
+        for pred in predicates:
+            dependents = self._dependents.get(pred)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[pred]
@@ -0,0 +1,94 @@
+"""Budget and bookkeeping for a single KB query."""
+
+import time
+
+class QueryStats:
+    """How far a query got, and why it stopped.
+
+    Filled in as the query's generator is consumed, so it is only final once
+    the generator is exhausted (or abandoned).
+
+    :ivar str statement: The query
+    :ivar int steps: Resolution steps taken so far
+    :ivar int tabled_steps: Steps spent filling tables for tabled predicates \
+    (see `KB.table`)
+    :ivar int answers: Answers yielded so far
+    :ivar bool exhausted: True once every answer has been found
+    :ivar str cutoff: None, or why the query stopped early: 'max_steps', \
+    'timeout' or 'limit'
+    :ivar float elapsed_ms: Wall-clock time since the query started
+    :ivar set predicates: The predicates the query has looked up clauses for
+    :ivar bool cached: True if the answers came from the KB's query cache
+    """
+    def __init__(self, statement, max_steps, timeout_ms=None, limit=None, max_tabled_steps=None):
+        self.statement = statement
+        self.max_steps = max_steps
+        self.max_tabled_steps = max_tabled_steps
+        self.timeout_ms = timeout_ms
+        self.limit = limit
+        self.steps = 0
+        self.tabled_steps = 0
+        self.answers = 0
+        self.exhausted = False
+        self.cutoff = None
+        self.elapsed_ms = 0.
+        self.predicates = set()
+        self.cached = False
+        self._start = None
+        self._deadline = None
+
+    def __repr__(self):
+        if self.exhausted:
+            status = 'exhausted' + (', cached' if self.cached else '')
+        elif self.cutoff:
+            status = 'cut off by ' + self.cutoff
+        else:
+            status = 'running'
+        return '<QueryStats {}: {} answers, {} steps, {}>'.format(
+            self.statement, self.answers, self.steps, status)
+
+    def start(self):
+        self._start = time.monotonic()
+        if self.timeout_ms is not None:
+            self._deadline = self._start + self.timeout_ms / 1000.
+
+    def for_tables(self, statement):
+        """Stats for filling tables on behalf of this query, with what's left of \
+        its budget for that: `max_tabled_steps` if it has one, and otherwise \
+        `max_steps`, less the steps it has taken of either kind."""
+        if self.max_tabled_steps is None:
+            budget = self.max_steps - self.steps - self.tabled_steps
+        else:
+            budget = self.max_tabled_steps - self.tabled_steps
+        stats = QueryStats(statement, max(budget, 0))
+        stats._start = self._start
+        stats._deadline = self._deadline
+        return stats
+
+    def step(self):
+        """Count one resolution step. Returns False if the query is out of budget."""
+        self.steps += 1
+        if self.steps > self.max_steps:
+            self.cutoff = 'max_steps'
+            return False
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self.cutoff = 'timeout'
+            return False
+        return True
+
+    def found(self):
+        """Count one answer. Returns False if no more answers should be searched for."""
+        self.answers += 1
+        self._tick()
+        if self.limit is not None and self.answers >= self.limit:
+            self.cutoff = 'limit'
+            return False
+        return True
+
+    def finish(self):
+        self._tick()
+        if self.cutoff is None:
+            self.exhausted = True
+
+    def _tick(self):
+        self.elapsed_ms = (time.monotonic() - self._start) * 1000.
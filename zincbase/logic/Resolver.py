@@ -0,0 +1,139 @@
+"""Depth-first, copy-free resolution for ZincBase's Prolog-like queries.
+
+Rather than copying bindings for every goal (as the breadth-first `KB._search`
+does), a `Resolver` keeps a single binding store for the whole query and
+records every binding on a trail, in the style of the Warren Abstract Machine.
+Each clause activation gets its own frame number, so clause variables are
+renamed by (name, frame) instead of by copying terms, and backtracking simply
+unwinds the trail back to the choice point.
+"""
+
+from itertools import count
+
+from zincbase.logic.common import build_term
+
+class Resolver:
+    """:param function candidates: Given a goal, a function that resolves its \
+    variables and the query's `QueryStats`, returns the clauses to try for the \
+    goal (see `Tables.candidates`)."""
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.bindings = {}
+        self.trail = []
+
+    def solve(self, query, stats, as_terms=False):
+        """Generator of answers to `query`, in SLD (Prolog) order: dicts of
+        variable name to value, or True for a ground query that holds.
+
+        :param Term query: The goal to prove
+        :param QueryStats stats: Counts each clause tried as one step, and \
+        stops the search when it is out of budget
+        :param bool as_terms: Instead yield `query` with its variables filled \
+        in by each answer (None for an answer that leaves `query` non-ground).
+        """
+        query_vars = []
+        self._collect_vars(query, query_vars)
+        frames = count(1)
+        goals = (query, 0, None)
+        choicepoints = []
+        while True:
+            if goals is None:
+                if as_terms:
+                    yield self._resolve(query, 0)
+                else:
+                    yield self._answer(query_vars)
+            else:
+                term, frame, rest = goals
+                resolve = lambda var: self._deref(var, frame)[0]
+                alternatives = iter(self.candidates(term, resolve, stats))
+                choicepoints.append((term, frame, rest, alternatives, len(self.trail)))
+            goals = False
+            while choicepoints and goals is False:
+                term, frame, rest, alternatives, mark = choicepoints[-1]
+                self._undo(mark)
+                for rule in alternatives:
+                    if not stats.step():
+                        return
+                    rule_frame = next(frames)
+                    if self._unify(term, frame, rule.head, rule_frame):
+                        goals = rest
+                        for goal in reversed(rule.goals):
+                            goals = (goal, rule_frame, goals)
+                        break
+                    self._undo(mark)
+                else:
+                    choicepoints.pop()
+            if goals is False:
+                return
+
+    def _deref(self, term, frame):
+        while term.is_var:
+            bound = self.bindings.get((term.pred, frame))
+            if bound is None:
+                break
+            term, frame = bound
+        return term, frame
+
+    def _bind(self, var, frame, value):
+        key = (var.pred, frame)
+        self.bindings[key] = value
+        self.trail.append(key)
+
+    def _undo(self, mark):
+        trail = self.trail
+        bindings = self.bindings
+        while len(trail) > mark:
+            del bindings[trail.pop()]
+
+    def _unify(self, a, frame_a, b, frame_b):
+        stack = [(a, frame_a, b, frame_b)]
+        while stack:
+            a, frame_a, b, frame_b = stack.pop()
+            if a.pred == '_' or b.pred == '_':
+                continue
+            a, frame_a = self._deref(a, frame_a)
+            b, frame_b = self._deref(b, frame_b)
+            if a.is_var:
+                if not (b.is_var and a.pred == b.pred and frame_a == frame_b):
+                    self._bind(a, frame_a, (b, frame_b))
+                continue
+            if b.is_var:
+                self._bind(b, frame_b, (a, frame_a))
+                continue
+            if a.pred != b.pred or len(a.args) != len(b.args):
+                return False
+            for i in range(len(a.args)):
+                stack.append((a.args[i], frame_a, b.args[i], frame_b))
+        return True
+
+    def _resolve(self, term, frame):
+        """Build the value of term under the current bindings, or None if
+        it is not ground. Only answers are built; clause terms are never copied."""
+        term, frame = self._deref(term, frame)
+        if term.is_var:
+            return None
+        if not term.args:
+            return term
+        args = []
+        for arg in term.args:
+            arg = self._resolve(arg, frame)
+            if arg is None:
+                return None
+            args.append(arg)
+        return build_term(term.pred, args)
+
+    def _answer(self, query_vars):
+        answer = {}
+        for var in query_vars:
+            value = self._resolve(var, 0)
+            if value is not None:
+                answer[var.pred] = str(value)
+        return answer or True
+
+    @classmethod
+    def _collect_vars(cls, term, found):
+        if term.is_var:
+            if term.pred not in [v.pred for v in found]:
+                found.append(term)
+        for arg in term.args:
+            cls._collect_vars(arg, found)
@@ -1,21 +1,16 @@
-from zincbase.utils.string_utils import split_on
-
 from zincbase import context
-from zincbase.logic.Term import Term
+from zincbase.logic.parser import parse_rule
 
 class Rule(dict):
     
-    def __init__(self, expr, on_change=None):
-        parts = split_on(expr, ':-')
-        self.head = Term(parts[0])
-        self.goals = []
+    def __init__(self, expr, on_change=None, parsed=None):
+        """:param tuple parsed: The (head, goals) of `expr`, if it has already \
+        been parsed (see `parse_many`)"""
+        head, goals = parsed or parse_rule(expr)
+        self.head = head
+        self.goals = list(goals)
         self.on_change = on_change
         self._locked = False
-        if len(parts) == 2:
-            context.kb._variable_rules.append(self)
-            sub_goals = split_on(parts[1], ',')
-            for sub_goal in sub_goals:
-                self.goals.append(Term(sub_goal))
     
     def __repr__(self):
         return str(self.head)
@@ -0,0 +1,182 @@
+"""Tabled (memoized) evaluation for ZincBase's Prolog-like rules.
+
+For a tabled predicate, each call pattern (the goal with its unbound arguments
+abstracted away) gets a table holding all of its answers. A table is filled by
+evaluating the predicate's clauses, with every tabled subgoal answered from
+its own (possibly still incomplete) table, over and over until no table gains
+an answer. Like SLG resolution, this terminates on cyclic data and
+left-recursive rules, and later calls with the same pattern are answered
+straight from the table.
+"""
+
+from zincbase.logic.Resolver import Resolver
+from zincbase.logic.common import build_term
+from zincbase.utils.type_checks import isVar
+
+class Answer:
+    """A tabled answer, shaped like a fact so either query engine can resolve against it."""
+    __slots__ = ('head', 'goals')
+
+    def __init__(self, head):
+        self.head = head
+        self.goals = ()
+
+    def __repr__(self):
+        return str(self.head)
+
+class Table:
+    __slots__ = ('pattern', 'answers', 'seen', 'complete', 'predicates')
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.answers = []
+        self.seen = set()
+        self.complete = False
+        self.predicates = set()
+
+class _Untableable(Exception):
+    pass
+
+class _OutOfBudget(Exception):
+    pass
+
+def _is_ground(term):
+    if isVar(term) or term.pred == '_':
+        return False
+    return all(_is_ground(arg) for arg in term.args)
+
+class Tables:
+    """The source of clauses for KB queries: answer tables for tabled predicates,
+    and the clause index for everything else.
+
+    Filling tables counts against the query's budget (see `QueryStats.for_tables`). \
+    If that runs out, filling stops and the query is cut off: the goal gets the \
+    answers found so far, and the tables being filled keep them, incomplete, to \
+    carry on from when they are next needed. If an answer is not ground, the \
+    tables being filled are abandoned and the goal is resolved against its \
+    clauses as if it weren't tabled.
+
+    :param ClauseIndex clause_index: The KB's clauses
+    """
+    def __init__(self, clause_index):
+        self.clause_index = clause_index
+        self.tabled = set()
+        self._tables = {}
+        self._dependents = {}
+        self._pending = None
+        self._changed = False
+
+    def __len__(self):
+        return len(self._tables)
+
+    def add(self, predicate):
+        self.tabled.add(predicate)
+        self.clear()
+
+    def remove(self, predicate):
+        self.tabled.discard(predicate)
+        self.clear()
+
+    def clear(self):
+        self._tables = {}
+        self._dependents = {}
+
+    def invalidate(self, predicate):
+        """Forget every table whose answers could change when `predicate` does."""
+        for key in self._dependents.pop(predicate, ()):
+            self._tables.pop(key, None)
+
+    def candidates(self, term, resolve, stats):
+        """Clauses to try for the goal `term` (see `ClauseIndex.candidates`).
+
+        :param QueryStats stats: The budget of the query the goal belongs to, \
+        which also records the predicates its answers depend on
+        """
+        stats.predicates.add(term.pred)
+        if term.pred in self.tabled:
+            answers = self._answers(term, resolve, stats)
+            if answers is not None:
+                return answers
+        return self.clause_index.candidates(term, resolve)
+
+    def _answers(self, term, resolve, stats):
+        key, pattern = self._call_pattern(term, resolve)
+        table = self._tables.get(key)
+        if table is not None and table.complete:
+            stats.predicates.update(table.predicates)
+            return list(table.answers)
+        if self._pending is not None:
+            # A call pattern met while filling other tables, that isn't complete yet,
+            # gets filled in the same fixpoint (carrying on from any answers it has).
+            if table is None:
+                table = self._tables[key] = Table(pattern)
+            if key not in self._pending:
+                self._pending.append(key)
+                self._changed = True
+            return list(table.answers)
+        return self._fill(key, pattern, stats)
+
+    def _fill(self, key, pattern, query_stats):
+        stats = query_stats.for_tables(str(pattern))
+        if key not in self._tables:
+            self._tables[key] = Table(pattern)
+        self._pending = [key]
+        complete = True
+        try:
+            self._changed = True
+            while self._changed:
+                self._changed = False
+                i = 0
+                while i < len(self._pending):
+                    self._evaluate(self._tables[self._pending[i]], stats)
+                    i += 1
+        except _Untableable:
+            for filled in self._pending:
+                del self._tables[filled]
+            return None
+        except _OutOfBudget:
+            query_stats.cutoff = stats.cutoff
+            complete = False
+        finally:
+            query_stats.tabled_steps += stats.steps
+            query_stats.predicates.update(stats.predicates)
+            pending = self._pending
+            self._pending = None
+        for filled in pending:
+            self._tables[filled].complete = complete
+            self._tables[filled].predicates = stats.predicates
+        for dep in stats.predicates:
+            self._dependents.setdefault(dep, set()).update(pending)
+        return list(self._tables[key].answers)
+
+    def _evaluate(self, table, stats):
+        # The table's own clauses are looked up directly, so they are a dependency
+        # here rather than through `candidates`.
+        stats.predicates.add(table.pattern.pred)
+        clauses = [self.clause_index.candidates(table.pattern)]
+        candidates = lambda term, resolve, stats: clauses.pop() if clauses else self.candidates(term, resolve, stats)
+        for answer in Resolver(candidates).solve(table.pattern, stats, as_terms=True):
+            if answer is None:
+                raise _Untableable()
+            as_string = str(answer)
+            if as_string not in table.seen:
+                table.seen.add(as_string)
+                table.answers.append(Answer(answer))
+                self._changed = True
+        if stats.cutoff:
+            raise _OutOfBudget()
+
+    @staticmethod
+    def _call_pattern(term, resolve):
+        key = [term.pred]
+        args = []
+        for i, arg in enumerate(term.args):
+            if resolve is not None and isVar(arg):
+                arg = resolve(arg)
+            if arg is not None and _is_ground(arg):
+                key.append(str(arg))
+                args.append(arg)
+            else:
+                key.append(None)
+                args.append(build_term('T{}'.format(i), []))
+        return tuple(key), build_term(term.pred, args)
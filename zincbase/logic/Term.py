@@ -1,77 +1,67 @@
 """A base unit for ZincBase's Prolog-like implementation of 'facts'"""
 
-from zincbase import context
-from zincbase.utils.string_utils import split_on
+import sys
+
+def symbol(name):
+    """The interned copy of a predicate or atom name. Every Term with the same name \
+    shares one string, so a symbol costs one pointer per Term and symbols compare by identity."""
+    return sys.intern(name)
 
 class Term:
+    """A predicate or atom, and its arguments (a tuple of Terms).
+
+    Terms are immutable once made: copying one returns it unchanged. Whether it \
+    is a variable or an atom is worked out once, in `is_var` and `is_atom`. \
+    Making a Term doesn't touch the KB; `KB.store` adds what it stores to the graph.
+    """
+    __slots__ = ('pred', 'args', 'is_var', 'is_atom')
+
     def __init__(self, expr, args=None):
         if args:
-            self.pred = expr
-            self.args = args
-        elif expr[-1] == ']':
-            arr = split_on(expr[1:-1], ',')
-            headtail = split_on(expr[1:-1], '|')
-            if len(headtail) > 1:
-                self.args = [Term(f) for f in headtail]
-                self.pred = '__list__'
-            else:
-                arr.reverse()
-                first = Term('__list__', [])
-                for part in arr:
-                    first = Term('__list__', [Term(part), first])
-                self.pred = first.pred
-                self.args = first.args
-        elif expr[-1] == ')':
-            sub_exprs = split_on(expr, '(', all=False)
-            if len(sub_exprs) != 2:
-                raise Exception('Syntax error')
-            self.args = [Term(sub_expr) for sub_expr in split_on(sub_exprs[1][:-1], ',')]
-            self.pred = sub_exprs[0]
+            self._set(expr, args)
         else:
-            self.pred = expr
-            self.args = []
-
-        for i, arg in enumerate(self.args):
-            if arg:
-                str_arg = str(arg)
-                added_node_1 = False
-                if not context.kb.G.has_node(str_arg):
-                    context.kb.G.add_node(str_arg)
-                    added_node_1 = True
-                for arg2 in self.args[i+1:]:
-                    added_node_2 = False
-                    if not context.kb.G.has_node(str(arg2)):
-                        context.kb.G.add_node(str(arg2))
-                        added_node_2 = True
-                    context.kb.G.add_edge(str_arg, str(arg2), pred=self.pred)
-                    if added_node_1:
-                        node = context.kb.node(str(arg2))
-                        try:
-                            if not context.kb._dont_propagate:
-                                node._new_neighbor_fn(str(arg))
-                        except Exception as e:
-                            pass
-                    if added_node_2:
-                        node = context.kb.node(str_arg)
-                        try:
-                            if not context.kb._dont_propagate:
-                                node._new_neighbor_fn(str(arg2))
-                        except Exception as e:
-                            pass
-
+            from zincbase.logic.parser import parse_term
+            term = parse_term(expr)
+            self._set(term.pred, term.args)
 
     def __repr__(self):
-        if self.pred == '__list__':
-            if not self.args:
-                return '[]'
-            first = self.args[1]
-            if first.pred == '__list__' and first.args == []:
-                return '[{}]'.format(str(self.args[0]))
-            elif first.pred == '__list__':
-                return '[{},{}]'.format(str(self.args[0]), str(self.args[1])[1:-1])
-            else:
-                return '[{}|{}]'.format(str(self.args[0]), str(self.args[1]))
+        if self.pred == '__list__' and len(self.args) in (0, 2):
+            items = []
+            term = self
+            while term.pred == '__list__' and len(term.args) == 2:
+                items.append(str(term.args[0]))
+                term = term.args[1]
+            if term.pred == '__list__' and not term.args:
+                return '[{}]'.format(','.join(items))
+            return '[{}|{}]'.format(','.join(items), str(term))
         elif self.args:
             return '{}({})'.format(self.pred, ', '.join(map(str,self.args)))
         else:
             return self.pred
+
+    def _set(self, pred, args):
+        self.pred = symbol(pred)
+        self.args = tuple(args)
+        self.is_var = not self.args and self.pred[:1].isupper()
+        self.is_atom = not self.args and not self.is_var
+
+    @classmethod
+    def _make(cls, pred, args):
+        term = cls.__new__(cls)
+        term._set(pred, args)
+        return term
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (Term._make, (self.pred, self.args))
+
+    def __setstate__(self, state):
+        # Terms pickled before Term had __slots__ carry their attributes in a dict.
+        if isinstance(state, tuple):
+            state = state[1]
+        self._set(state['pred'], state['args'])
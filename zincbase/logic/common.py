@@ -1,20 +1,21 @@
 """Under-the-hood details of ZincBase's Prolog-like implementation"""
 
-import copy
-
 from zincbase.logic.Term import Term
-from zincbase.utils.type_checks import isVar, isAtom
+
+def build_term(pred, args):
+    """Make a Term from its parts, without parsing anything (unlike `Term(pred)` with no args)."""
+    return Term._make(pred, args)
 
 def unify(src, src_bindings, dest, dest_bindings):
     if src.pred == '_' or dest.pred == '_':
         return True
-    if isVar(src):
+    if src.is_var:
         tmp_src = process(src, src_bindings)
         if not tmp_src:
             return True
         else:
             return unify(tmp_src, src_bindings, dest, dest_bindings)
-    if isVar(dest):
+    if dest.is_var:
         tmp_dest = process(dest, dest_bindings)
         if tmp_dest:
             return unify(src, src_bindings, tmp_dest, dest_bindings)
@@ -26,7 +27,7 @@ def unify(src, src_bindings, dest, dest_bindings):
     elif src.pred != dest.pred:
         return False
     else:
-        dest_bindings_copy = copy.deepcopy(dest_bindings)
+        dest_bindings_copy = dict(dest_bindings)
         for i in range(len(src.args)):
             if not unify(src.args[i], src_bindings, dest.args[i], dest_bindings_copy):
                 return False
@@ -34,9 +35,9 @@ def unify(src, src_bindings, dest, dest_bindings):
         return True
 
 def process(term, bindings, graph=None):
-    if isAtom(term):
+    if term.is_atom:
         return term
-    if isVar(term):
+    if term.is_var:
         ans = bindings.get(term.pred, None)
         if not ans:
             return None
@@ -0,0 +1,114 @@
+"""A single-pass parser for ZincBase's Prolog-like statements.
+
+A statement is split into names and punctuation once, by one regular expression,
+and the tokens are read left to right with an explicit stack for nested terms
+and lists. Parsing is linear in the length of the statement, and deep nesting or
+long lists can't hit Python's recursion limit.
+
+The terms made here don't touch the graph (see `Term`).
+"""
+
+import re
+
+from zincbase.logic.Term import Term
+
+_TOKENS = re.compile(r'(:-|[()\[\],|])')
+_EMPTY_LIST = '__list__'
+
+def _syntax_error(text):
+    return Exception('Syntax error: {}'.format(text))
+
+def _parse(text, leaves, allow_body):
+    tokens = _TOKENS.split(text)
+    make = Term._make
+    stack = [] # [opening bracket, predicate, args, index of the tail in a list after '|']
+    head = None
+    goals = []
+    done = None # The last term completed at the current position.
+
+    def value(name):
+        if done is not None:
+            if name:
+                raise _syntax_error(text)
+            return done
+        if not name:
+            raise _syntax_error(text)
+        if leaves is None:
+            return make(name, ())
+        term = leaves.get(name)
+        if term is None:
+            term = leaves[name] = make(name, ())
+        return term
+
+    for i in range(1, len(tokens), 2):
+        name, token = tokens[i - 1], tokens[i]
+        if token == '(':
+            if done is not None or not name:
+                raise _syntax_error(text)
+            stack.append(['(', name, [], None])
+        elif token == '[':
+            if done is not None or name:
+                raise _syntax_error(text)
+            stack.append(['[', None, [], None])
+        elif token == ',':
+            if stack:
+                stack[-1][2].append(value(name))
+            elif head is not None:
+                goals.append(value(name))
+            else:
+                raise _syntax_error(text)
+        elif token == '|':
+            if not stack or stack[-1][0] != '[' or stack[-1][3] is not None:
+                raise _syntax_error(text)
+            stack[-1][2].append(value(name))
+            stack[-1][3] = len(stack[-1][2])
+        elif token == ')' or token == ']':
+            if not stack or stack[-1][0] != ('(' if token == ')' else '['):
+                raise _syntax_error(text)
+            bracket, pred, args, tail = stack.pop()
+            if args or done is not None or name or tail is not None:
+                args.append(value(name))
+            if bracket == '(':
+                done = make(pred, args)
+                continue
+            if tail is None:
+                rest = make(_EMPTY_LIST, ())
+            elif len(args) == tail + 1:
+                rest = args.pop()
+            else:
+                raise _syntax_error(text)
+            for arg in reversed(args):
+                rest = make(_EMPTY_LIST, (arg, rest))
+            done = rest
+            continue
+        else: # ':-'
+            if stack or head is not None or not allow_body:
+                raise _syntax_error(text)
+            head = value(name)
+        done = None
+    last = value(tokens[-1])
+    if stack:
+        raise _syntax_error(text)
+    if head is None:
+        return last, goals
+    goals.append(last)
+    return head, goals
+
+def parse_term(text):
+    """Parse a single term, such as a fact or a query."""
+    return _parse(text, None, False)[0]
+
+def parse_rule(text):
+    """Parse a fact or rule into its head term and list of goal terms."""
+    return _parse(text, None, True)
+
+def parse_many(statements):
+    """Parse many facts or rules, as `parse_rule` does. Atoms and variables with \
+    the same name are shared between the terms made, which saves memory when \
+    the same entities appear in many statements.
+
+    :param iterable statements: Strings, each one fact or rule
+    :return: List of (head, goals) tuples, in the same order
+    """
+    leaves = {}
+    return [_parse(text, leaves, True) for text in statements]
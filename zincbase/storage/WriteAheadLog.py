@@ -0,0 +1,235 @@
+"""An append-only log of changes to a KB, compacted into snapshots from time to time.
+
+The log's directory holds numbered generations: `snapshot-N/` (see
+`zincbase.storage.snapshot`) and `log-N.jsonl`, the changes made since that
+snapshot was written, one JSON record per line. Attribute values that JSON
+wouldn't give back as they were (by the same rule as the snapshot's columns)
+are written as base64 pickles, tagged as such. The file `CURRENT` names the
+generation in use. Compacting writes the next generation's snapshot, starts an
+empty log beside it and only then moves `CURRENT` on, so a crash at any point
+leaves one complete generation to recover from.
+"""
+
+import base64
+import json
+import os
+import pickle
+import shutil
+import threading
+
+from zincbase.storage.snapshot import _json_safe, is_snapshot, load_snapshot, save_snapshot
+
+_CURRENT = 'CURRENT'
+_PICKLED = '__pickled__'
+
+def _encode(value):
+    if _json_safe(value) and not (type(value) is dict and _PICKLED in value):
+        return value
+    try:
+        return {_PICKLED: base64.b64encode(pickle.dumps(value)).decode('ascii')}
+    except Exception as e:
+        raise TypeError('{!r} can not be written to the log ({})'.format(value, e))
+
+def _decode(value):
+    if type(value) is dict and _PICKLED in value:
+        return pickle.loads(base64.b64decode(value[_PICKLED]))
+    return value
+
+def _map_attributes(fn, attributes):
+    if isinstance(attributes, dict):
+        return {key: fn(value) for key, value in attributes.items()}
+    return attributes
+
+def _map_values(fn, record):
+    """`record` with `fn` applied to each attribute value in it."""
+    op = record[0]
+    if op == 'store':
+        return [op, record[1], [_map_attributes(fn, attributes) for attributes in record[2] or []],
+                _map_attributes(fn, record[3])]
+    if op == 'node':
+        return record[:3] + [fn(record[3])]
+    if op == 'edge':
+        return record[:5] + [fn(record[5])]
+    return record
+
+class WriteAheadLog:
+    """The durable record of a KB's changes: its `store`s and bulk loads, \
+    `delete_rule`s, and the setting and deleting of node and edge attributes.
+
+    Records are written through to the operating system as they are appended, \
+    and forced to disk at most `fsync_interval` seconds later, so a crash of the \
+    machine loses no more than that much. Every `compact_every` records, the KB \
+    is compacted into a new snapshot and the log starts over.
+
+    :param KB kb: The KB whose changes are logged
+    :param str dirname: Directory for the snapshots and logs
+    :param float fsync_interval: Most seconds a record may wait to be forced to disk; \
+    0 forces every record as it's written.
+    :param int compact_every: Records after which to compact; 0 or None never compacts automatically.
+    :ivar int generation: The generation being appended to
+    :ivar int records: Records in the current generation's log
+    """
+    def __init__(self, kb, dirname, fsync_interval=1.0, compact_every=100000):
+        self.kb = kb
+        self.dirname = dirname
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.generation = None
+        self.records = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __repr__(self):
+        return '<WriteAheadLog {} generation {}, {} records>'.format(self.dirname, self.generation, self.records)
+
+    def _path(self, name, generation=None):
+        if generation is None:
+            return os.path.join(self.dirname, name)
+        return os.path.join(self.dirname, '{}-{}{}'.format(name, generation, '.jsonl' if name == 'log' else ''))
+
+    def open(self):
+        """Recover the KB from the directory, if it has been logged to before, and \
+        start logging its changes. Otherwise, the KB as it is now is the first snapshot."""
+        os.makedirs(self.dirname, exist_ok=True)
+        current = self._path(_CURRENT)
+        if not os.path.exists(current):
+            self._start_generation(1)
+            return self
+        with open(current) as f:
+            self.generation = int(f.read())
+        snapshot = self._path('snapshot', self.generation)
+        if is_snapshot(snapshot):
+            load_snapshot(self.kb, snapshot)
+        self.records = self.replay(self._path('log', self.generation))
+        self._file = open(self._path('log', self.generation), 'a')
+        return self
+
+    def replay(self, path):
+        """Apply the records in a log to the KB, without logging them again or \
+        running watches: whatever the watches did was logged too. A last record \
+        that was cut short by a crash is dropped from the log.
+
+        :return: The number of records replayed"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Records are written whole, newline last, so only the last one can be cut short.
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        count = 0
+        with self.kb.dont_propagate():
+            for line in data[:end].splitlines():
+                if line:
+                    self._apply(_map_values(_decode, json.loads(line.decode('utf-8'))))
+                    count += 1
+        return count
+
+    def _apply(self, record):
+        kb = self.kb
+        G = kb.G
+        op = record[0]
+        if op == 'store':
+            kb._store(record[1], None, record[2], record[3])
+        elif op == 'delete':
+            kb.delete_rule(record[1])
+        elif op == 'node':
+            G.nodes[record[1]][record[2]] = record[3]
+            kb._attributes.set(record[1], record[2], record[3])
+        elif op == 'del_node':
+            del G.nodes[record[1]][record[2]]
+            kb._attributes.delete(record[1], record[2])
+        elif op == 'edge' or op == 'del_edge':
+            sub, pred, ob, key = record[1:5]
+            # As `Edge` does, every edge between them with the predicate is changed.
+            for edge_key in kb._edge_keys_of(sub, pred, ob):
+                attrs = G[sub][ob][edge_key]
+                if op == 'edge':
+                    attrs[key] = record[5]
+                    kb._edge_indexes.set((sub, ob, edge_key), key, record[5])
+                else:
+                    attrs.pop(key, None)
+                    kb._edge_indexes.delete((sub, ob, edge_key), key)
+        else:
+            raise ValueError('Unknown log record {}'.format(record))
+
+    def append(self, record):
+        """Write one record to the log. It can be read back as soon as this returns, \
+        and is on disk within `fsync_interval` seconds."""
+        self.extend([record])
+        self.compact_if_due()
+
+    def extend(self, records):
+        """Write many records to the log at once, as `append` does, but without compacting."""
+        lines = ''.join(json.dumps(_map_values(_encode, record), separators=(',', ':')) + '\n' for record in records)
+        if not lines:
+            return
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            self.records += lines.count('\n')
+            if not self.fsync_interval:
+                os.fsync(self._file.fileno())
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def compact_if_due(self):
+        if self.compact_every and self.records >= self.compact_every:
+            self.compact()
+
+    def sync(self):
+        """Force everything logged so far to disk."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is not None and not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def compact(self):
+        """Write the KB as the next generation's snapshot, and start its log empty."""
+        self._start_generation(self.generation + 1)
+
+    def _start_generation(self, generation):
+        snapshot = self._path('snapshot', generation)
+        save_snapshot(self.kb, snapshot)
+        open(self._path('log', generation), 'w').close()
+        for dirpath, _, filenames in os.walk(snapshot):
+            for filename in filenames:
+                with open(os.path.join(dirpath, filename), 'rb+') as f:
+                    os.fsync(f.fileno())
+        self._fsync_dir()
+        previous = self.generation
+        self.close()
+        current = self._path(_CURRENT)
+        with open(current + '.tmp', 'w') as f:
+            f.write(str(generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current + '.tmp', current)
+        self._fsync_dir()
+        self.generation = generation
+        self.records = 0
+        self._file = open(self._path('log', generation), 'a')
+        if previous is not None:
+            shutil.rmtree(self._path('snapshot', previous), ignore_errors=True)
+            os.remove(self._path('log', previous))
+
+    def _fsync_dir(self):
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.dirname, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        """Force the log to disk and stop writing to it."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,339 @@
+"""A versioned, columnar snapshot of a KB on disk.
+
+A snapshot is a directory with a `manifest.json` -- the format version, counts, \
+the KG model's settings, which attribute columns there are, and the name of the \
+subdirectory that holds the rest:
+
+* `entities.json`, `relations.json` -- dictionaries of every node and predicate \
+name. A name's id is its position; the first ids are the ones the KG model uses.
+* `subjects.npy`, `predicates.npy`, `objects.npy` -- int32 columns with one row \
+per fact of two atoms, in terms of those ids.
+* `rules.json` -- every other rule and fact as text, with its position among \
+`kb.rules`, and `negatives.json` for negative examples.
+* `node_attrs/`, `edge_attrs/` -- one column per attribute: the ids of the nodes \
+(or edges) that have it, and their values, as a NumPy array when they are all \
+bools, ints or floats, as JSON when JSON gives them back as they were, and \
+pickled otherwise. Columns that can't be pickled are skipped, with a warning.
+* `model/` -- each tensor of the KG model's state, as a raw float array. The \
+embeddings can be served from these files directly (see `KB.load_all`).
+
+Saving writes everything into a new subdirectory, then replaces the manifest \
+with one pointing to it, and only then deletes the old subdirectory; so if \
+saving fails part way, the snapshot that was there before is still intact. \
+(Version 1 snapshots, which had no subdirectory, still load.)
+
+Loading memory maps the arrays and builds the facts straight from the ids, \
+without parsing them.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import uuid
+import warnings
+
+import numpy as np
+import torch
+
+from zincbase.logic.common import build_term
+from zincbase.logic.parser import parse_rule
+from zincbase.utils.string_utils import strip_all_whitespace
+
+FORMAT = 'zincbase-snapshot'
+VERSION = 2
+MANIFEST = 'manifest.json'
+
+_BATCH_SIZE = 10000
+# What version 1 snapshots kept directly in their directory.
+_V1_FILES = ('entities.json', 'relations.json', 'subjects.npy', 'predicates.npy', 'objects.npy',
+             'rules.json', 'negatives.json', 'node_attrs', 'edge_attrs', 'model')
+_HIDDEN_ATTRIBUTES = ('_watches', '_new_neighbor_fn')
+_EMBEDDINGS = ('entity_embedding', 'relation_embedding')
+_MODEL_SETTINGS = ('model_name', 'embedding_size', 'gamma', 'node_attributes', 'pred_attributes',
+                   'attr_loss_to_graph_loss', 'pred_loss_to_graph_loss')
+
+def is_snapshot(dirname):
+    return os.path.exists(os.path.join(dirname, MANIFEST))
+
+def save_snapshot(kb, dirname):
+    """Write `kb` to `dirname` as a snapshot, creating the directory if need be, \
+    and replacing any snapshot already there once the new one is complete."""
+    os.makedirs(dirname, exist_ok=True)
+    manifest_path = os.path.join(dirname, MANIFEST)
+    previous = _read_json(manifest_path) if os.path.exists(manifest_path) else None
+    data = 'data-{}'.format(uuid.uuid4().hex)
+    try:
+        manifest = _save_data(kb, os.path.join(dirname, data))
+        manifest['data'] = data
+        _write_json(manifest_path + '.tmp', manifest)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    except BaseException:
+        shutil.rmtree(os.path.join(dirname, data), ignore_errors=True)
+        if os.path.exists(manifest_path + '.tmp'):
+            os.remove(manifest_path + '.tmp')
+        raise
+    if previous is not None:
+        if previous.get('data'):
+            shutil.rmtree(os.path.join(dirname, previous['data']), ignore_errors=True)
+        else:
+            for name in _V1_FILES:
+                path = os.path.join(dirname, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(path):
+                    os.remove(path)
+    return True
+
+def _save_data(kb, dirname):
+    """Write the files of a snapshot of `kb` to `dirname`, and return its manifest."""
+    for sub_dir in ('', 'node_attrs', 'edge_attrs', 'model'):
+        os.makedirs(os.path.join(dirname, sub_dir), exist_ok=True)
+    entities = _Dictionary(kb._entity2id)
+    relations = _Dictionary(kb._relation2id)
+    for node in kb.G.nodes:
+        entities[node]
+    columns = ([], [], [])
+    rules = []
+    for i, rule in enumerate(kb.rules):
+        head = rule.head
+        if not rule.goals and len(head.args) == 2 and head.args[0].is_atom and head.args[1].is_atom:
+            columns[0].append(entities[head.args[0].pred])
+            columns[1].append(relations[head.pred])
+            columns[2].append(entities[head.args[1].pred])
+        else:
+            rules.append([i, rule_text(rule)])
+    for name, column in zip(('subjects', 'predicates', 'objects'), columns):
+        np.save(os.path.join(dirname, name + '.npy'), np.array(column, dtype=np.int32))
+
+    node_rows = {}
+    for node, data in kb.G.nodes(data=True):
+        for key, value in data.items():
+            if key not in _HIDDEN_ATTRIBUTES:
+                node_rows.setdefault(key, ([], []))
+                node_rows[key][0].append(entities[node])
+                node_rows[key][1].append(value)
+    edge_rows = {}
+    occurrences = {}
+    for sub, ob, data in kb.G.edges(data=True):
+        pred = relations[data['pred']]
+        ids = (entities[sub], entities[ob], pred)
+        # Edges with the same ends and predicate are told apart by the order they were added in.
+        occurrence = occurrences[ids] = occurrences.get(ids, -1) + 1
+        for key, value in data.items():
+            if key != 'pred':
+                edge_rows.setdefault(key, ([], []))
+                edge_rows[key][0].append(ids + (occurrence,))
+                edge_rows[key][1].append(value)
+
+    model = None
+    if kb._kg_model:
+        model = {setting: getattr(kb, '_' + setting) for setting in _MODEL_SETTINGS}
+        model['tensors'] = []
+        for i, (name, tensor) in enumerate(kb._kg_model.state_dict().items()):
+            np.save(os.path.join(dirname, 'model', '{}.npy'.format(i)), tensor.detach().cpu().numpy())
+            model['tensors'].append(name)
+
+    _write_json(os.path.join(dirname, 'entities.json'), entities.names)
+    _write_json(os.path.join(dirname, 'relations.json'), relations.names)
+    _write_json(os.path.join(dirname, 'rules.json'), rules)
+    _write_json(os.path.join(dirname, 'negatives.json'), [str(neg) for neg in kb._neg_examples])
+    manifest = {
+        'format': FORMAT,
+        'version': VERSION,
+        'entities': len(entities.names),
+        'relations': len(relations.names),
+        'model_entities': len(kb._entity2id),
+        'model_relations': len(kb._relation2id),
+        'facts': len(columns[0]),
+        'rules': len(kb.rules),
+        'node_attributes': _write_columns(os.path.join(dirname, 'node_attrs'), node_rows),
+        'edge_attributes': _write_columns(os.path.join(dirname, 'edge_attrs'), edge_rows),
+        'model': model
+    }
+    return manifest
+
+def load_snapshot(kb, dirname, cuda=False, read_only=False):
+    """Load the snapshot in `dirname` into `kb`. If `read_only`, the KG model's \
+    embeddings stay in their memory-mapped files (see `KB.load_all`)."""
+    with open(os.path.join(dirname, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT:
+        raise ValueError('{} is not a ZincBase snapshot'.format(dirname))
+    if manifest['version'] > VERSION:
+        raise ValueError('Snapshot version {} is newer than this version of ZincBase can read ({})'.format(
+            manifest['version'], VERSION))
+    dirname = os.path.join(dirname, manifest.get('data', ''))
+    entities = _read_json(os.path.join(dirname, 'entities.json'))
+    relations = _read_json(os.path.join(dirname, 'relations.json'))
+    columns = [np.load(os.path.join(dirname, name + '.npy'), mmap_mode='r')
+               for name in ('subjects', 'predicates', 'objects')]
+    rules = _read_json(os.path.join(dirname, 'rules.json'))
+    kb._load_batches(_rule_batches(entities, relations, columns, rules, manifest['rules']))
+    for neg in _read_json(os.path.join(dirname, 'negatives.json')):
+        kb.store('~' + strip_all_whitespace(neg))
+
+    G = kb.G
+    for column in manifest['node_attributes']:
+        for node, value in _read_column(os.path.join(dirname, 'node_attrs'), column):
+            # The node may only have been part of a rule that has since been deleted.
+            G.add_node(entities[node])
+            G.nodes[entities[node]][column['name']] = value
+            kb._attributes.set(entities[node], column['name'], value)
+    for column in manifest['edge_attributes']:
+        for (sub, ob, pred, occurrence), value in _read_column(os.path.join(dirname, 'edge_attrs'), column):
+            sub, ob, pred = entities[sub], entities[ob], relations[pred]
+            keys = kb._edge_keys_of(sub, pred, ob)
+            while len(keys) <= occurrence:
+                # The edge of a rule that has since been deleted.
+                kb._add_edge(sub, ob, pred)
+            G.edges[sub, ob, keys[occurrence]][column['name']] = value
+            kb._edge_indexes.set((sub, ob, keys[occurrence]), column['name'], value)
+
+    kb._entity2id = {name: i for i, name in enumerate(entities[:manifest['model_entities']])}
+    kb._relation2id = {name: i for i, name in enumerate(relations[:manifest['model_relations']])}
+    model = manifest['model']
+    if model and read_only:
+        _map_kg_model(kb, dirname, model, cuda)
+    elif model:
+        kb.build_kg_model(cuda, **{setting: model[setting] for setting in _MODEL_SETTINGS})
+        kb._kg_model.load_state_dict({
+            name: torch.from_numpy(np.load(os.path.join(dirname, 'model', '{}.npy'.format(i))))
+            for i, name in enumerate(model['tensors'])})
+    return True
+
+def _map_kg_model(kb, dirname, model, cuda):
+    """Make `kb`'s KG model for serving only, with its embeddings backed by the \
+    snapshot's files rather than by memory of its own."""
+    for setting in _MODEL_SETTINGS:
+        setattr(kb, '_' + setting, model[setting])
+    # An empty model, so as not to make and fill embeddings only to throw them away.
+    kb._init_kg_model(cuda, 0, 0)
+    kg_model = kb._kg_model
+    state = {}
+    for i, name in enumerate(model['tensors']):
+        # Copy-on-write, so the arrays are writable as torch expects but the file is never changed.
+        array = np.load(os.path.join(dirname, 'model', '{}.npy'.format(i)), mmap_mode='c')
+        if name in _EMBEDDINGS:
+            embedding = torch.from_numpy(array).to(kg_model.gamma.device)
+            setattr(kg_model, name, torch.nn.Parameter(embedding, requires_grad=False))
+        else:
+            state[name] = torch.from_numpy(np.array(array))
+    kg_model.load_state_dict(state, strict=False)
+    kg_model.nentity, kg_model.nrelation = len(kg_model.entity_embedding), len(kg_model.relation_embedding)
+    kg_model.eval()
+    kb._kg_model_read_only = True
+
+def rule_text(rule):
+    """The text of a rule, which `store` would turn back into the same rule."""
+    text = str(rule.head)
+    if rule.goals:
+        text += ':-' + ','.join(str(goal) for goal in rule.goals)
+    return strip_all_whitespace(text)
+
+def _rule_batches(entities, relations, columns, rules, count):
+    """Batches of parsed rules for `KB._load_batches`, in their original order. \
+    Facts are built from the columns of ids, with one term per entity."""
+    leaves = {}
+    others = dict(rules)
+    fact = 0
+    for start in range(0, count, _BATCH_SIZE):
+        end = min(count, start + _BATCH_SIZE)
+        n = end - start - sum(1 for i in range(start, end) if i in others)
+        subjects, preds, objects = (column[fact:fact + n].tolist() for column in columns)
+        fact += n
+        facts = iter(zip(subjects, preds, objects))
+        batch = []
+        for i in range(start, end):
+            if i in others:
+                batch.append((others[i], parse_rule(others[i]), [], {}))
+                continue
+            sub, pred, ob = next(facts)
+            args = []
+            for entity in (sub, ob):
+                leaf = leaves.get(entity)
+                if leaf is None:
+                    leaf = leaves[entity] = build_term(entities[entity], ())
+                args.append(leaf)
+            pred = relations[pred]
+            batch.append(('{}({},{})'.format(pred, args[0].pred, args[1].pred), (build_term(pred, args), []), [], {}))
+        yield batch
+
+def _write_columns(dirname, rows):
+    columns = []
+    for i, (name, (ids, values)) in enumerate(sorted(rows.items())):
+        kind = _kind(values)
+        if kind == 'pickle':
+            path = os.path.join(dirname, '{}.values.pkl'.format(i))
+            try:
+                with open(path, 'wb') as f:
+                    pickle.dump(values, f)
+            except Exception as e:
+                os.remove(path)
+                warnings.warn('Attribute {} not saved, as it has values that cannot be pickled ({})'.format(name, e))
+                continue
+        elif kind == 'json':
+            _write_json(os.path.join(dirname, '{}.values.json'.format(i)), values)
+        else:
+            np.save(os.path.join(dirname, '{}.values.npy'.format(i)), np.array(values, dtype=kind))
+        np.save(os.path.join(dirname, '{}.ids.npy'.format(i)), np.array(ids, dtype=np.int32))
+        columns.append({'name': name, 'file': i, 'type': kind, 'rows': len(ids)})
+    return columns
+
+def _read_column(dirname, column):
+    ids = np.load(os.path.join(dirname, '{}.ids.npy'.format(column['file'])), mmap_mode='r').tolist()
+    if column['type'] == 'json':
+        values = _read_json(os.path.join(dirname, '{}.values.json'.format(column['file'])))
+    elif column['type'] == 'pickle':
+        with open(os.path.join(dirname, '{}.values.pkl'.format(column['file'])), 'rb') as f:
+            values = pickle.load(f)
+    else:
+        values = np.load(os.path.join(dirname, '{}.values.npy'.format(column['file'])), mmap_mode='r').tolist()
+    if ids and isinstance(ids[0], list):
+        ids = [tuple(row) for row in ids]
+    return zip(ids, values)
+
+def _kind(values):
+    """The NumPy type that holds all of `values` exactly, or 'json' if JSON does, or 'pickle'."""
+    for kind, types in (('bool', (bool, np.bool_)), ('int64', (int, np.integer)), ('float64', (float, np.floating))):
+        if all(isinstance(value, types) and (kind != 'int64' or not isinstance(value, bool)) for value in values):
+            if kind == 'int64' and not all(-2 ** 63 <= value < 2 ** 63 for value in values):
+                break
+            return kind
+    if all(_json_safe(value) for value in values):
+        return 'json'
+    return 'pickle'
+
+def _json_safe(value):
+    """Whether `value` comes back from JSON just as it was."""
+    if value is None or isinstance(value, (bool, str)):
+        return True
+    if isinstance(value, (int, float)):
+        return type(value) in (int, float)
+    if type(value) is list:
+        return all(_json_safe(item) for item in value)
+    if type(value) is dict:
+        return all(type(key) is str and _json_safe(item) for key, item in value.items())
+    return False
+
+def _write_json(path, obj):
+    with open(path, 'w') as f:
+        json.dump(obj, f)
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+class _Dictionary(dict):
+    """Ids of names, starting from an existing name -> id mapping. Looking up a \
+    name it doesn't have yet gives it the next id."""
+    def __init__(self, ids):
+        super().__init__(ids)
+        self.names = [None] * len(ids)
+        for name, i in ids.items():
+            self.names[i] = name
+
+    def __missing__(self, name):
+        i = self[name] = len(self.names)
+        self.names.append(name)
+        return i
@@ -1,3 +1,4 @@
+import json
 import re
 
 def strip_all_whitespace(line):
@@ -6,21 +7,26 @@ def strip_all_whitespace(line):
 def split_on(line, separator, all=True):
     nesting = 0
     separator_length = len(separator)
-    if not line:
-        return []
-    for i in range(len(line)):
+    parts = []
+    start = i = 0
+    while i < len(line):
+        if nesting <= 0 and line.startswith(separator, i):
+            parts.append(line[start:i])
+            i = start = i + separator_length
+            nesting = 0
+            if not all:
+                parts.append(line[start:])
+                return parts
+            continue
         c = line[i]
-        if nesting <= 0 and line[i:i + separator_length] == separator:
-            if all:
-                return [line[:i]] + split_on(line[i + separator_length:], separator)
-            else:
-                return [line[:i], line[i + separator_length:]]
         if c in ('[', '('):
             nesting += 1
         elif c in (']', ')'):
             nesting -= 1
-            continue
-    return [line]
+        i += 1
+    if start < len(line):
+        parts.append(line[start:])
+    return parts
 
 def split_to_parts(line):
     sub_exprs = split_on(line, '(', all=False)
@@ -31,4 +37,29 @@ def split_to_parts(line):
 
 def cleanse(line):
     line = re.sub('[ ./()-]', '_', line)
-    return line[0].lower() + line[1:]
\ No newline at end of file
+    return line[0].lower() + line[1:]
+
+def cleanse_rows(rows):
+    """Turn CSV rows into `(subject, pred, object)` tuples for `KB.bulk_load`, cleansing \
+    each name and skipping rows whose subject or object isn't alphanumeric. Rows \
+    with attribute columns also get their `node_attributes` and `edge_attributes`, \
+    decoded from JSON.
+
+    This is the per-row work of `KB.from_csv`, so it can be run in worker processes.
+    """
+    cleansed = {}
+    out = []
+    for row in rows:
+        for name in row[:3]:
+            if name not in cleansed:
+                cleansed[name] = cleanse(name)
+        pred = cleansed[row[1]]
+        sub = cleansed[row[0]]
+        ob = cleansed[row[2]]
+        if not (sub.replace('_','').isalnum() and ob.replace('_','').isalnum()):
+            continue
+        if len(row) > 3:
+            out.append((sub, pred, ob, [json.loads(row[3]), json.loads(row[4])], json.loads(row[5])))
+        else:
+            out.append((sub, pred, ob))
+    return out
@@ -1,5 +1,5 @@
 def isVar(term):
-    return term.args == [] and term.pred[0].isupper()
+    return term.is_var
 
 def isAtom(term):
-    return term.args == [] and not term.pred[0].isupper()
+    return term.is_atom
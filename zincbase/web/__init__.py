@@ -43,7 +43,8 @@ class GraphCaster:
         to send updates together and re-render only once.
         """
         attrs = { 'id': str(node) }
-        attrs.update({ 'attributes': node.attrs })
+        # Deferred updates are sent later, so take the attributes as they are now.
+        attrs.update({ 'attributes': node.attrs_copy() if defer else dict(node.attrs) })
         if not defer:
             self.socketio.emit('updateNode', attrs, json=True)
         else:
@@ -58,7 +59,10 @@ class GraphCaster:
         re-rendering on the client.) If True, batch and wait until `batch_update()`
         to send updates together and re-render only once.
         """
-        attrs = { 'attributes': edge.attrs }
+        attributes = edge.attrs
+        if attributes is not False:
+            attributes = edge.attrs_copy() if defer else dict(attributes)
+        attrs = { 'attributes': attributes }
         attrs.update({'from': edge._sub, 'pred': edge._pred, 'to': edge._ob})
         if not defer:
             self.socketio.emit('updateEdge', attrs, json=True)
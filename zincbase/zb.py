@@ -2,13 +2,17 @@ from collections import deque, defaultdict
 from contextlib import contextmanager
 import copy
 import csv
+import gc
+import itertools
 import json
 import math
+import multiprocessing
 import os
 import pickle
 import random
 import re
 import sys
+import time
 
 import matplotlib.pyplot as plt
 import networkx as nx
@@ -20,30 +24,72 @@ from torch.utils.data import DataLoader
 import torch
 from tqdm import tqdm
 
+from zincbase.graph.AttributeIndex import AttributeIndexes, select
+from zincbase.graph.AttributeStore import AttributeStore
 from zincbase.graph.Edge import Edge
 from zincbase.graph.Node import Node
+from zincbase.graph.NodeRules import NodeRules
+from zincbase.graph.PropagationQueue import PropagationQueue
+from zincbase.graph.Transaction import Transaction
+from zincbase.graph.paths import shortest_paths, unwind
+from zincbase.graph.simulation import adjacency, changed_cells
+from zincbase.logic.ClauseIndex import ClauseIndex
+from zincbase.logic.Datalog import Datalog, fact_of
 from zincbase.logic.Goal import Goal
 from zincbase.logic.Negative import Negative
+from zincbase.logic.QueryCache import QueryCache
+from zincbase.logic.QueryStats import QueryStats
 from zincbase.logic.Term import Term
+from zincbase.logic.Resolver import Resolver
 from zincbase.logic.Rule import Rule
-from zincbase.logic.common import unify, process
+from zincbase.logic.Tables import Tables
+from zincbase.logic.common import build_term, unify, process
+from zincbase.logic.parser import parse_many
 from zincbase.nn.dataloader import NegDataset, TrainDataset, BidirectionalOneShotIterator
 from zincbase.nn.rotate import KGEModel
-from zincbase.utils.string_utils import strip_all_whitespace, split_to_parts, cleanse
+from zincbase.storage.WriteAheadLog import WriteAheadLog
+from zincbase.storage.snapshot import is_snapshot, load_snapshot, save_snapshot
+from zincbase.utils.string_utils import strip_all_whitespace, split_to_parts, cleanse_rows
+
+_PLAIN_NAME = re.compile(r'[^\s()\[\],|:]+\Z') # A name that parses as itself.
 
 class KB():
     """Knowledge Base Class
 
+    :param str engine: How queries are resolved. 'bfs' (the default) searches \
+    breadth-first, copying bindings as it goes. 'dfs' uses a depth-first engine \
+    with a trail of bindings, which is much faster and yields answers in Prolog \
+    order, but like Prolog it can spend its whole budget on a left-recursive rule.
+    :param int query_cache_size: How many complete query results to remember \
+    (see `QueryCache`), which are answered again without searching until a \
+    predicate they depend on is stored to or deleted from. 0 (the default) turns \
+    caching off. The cache's `hits`, `misses` and `evictions` are on `kb.query_cache`.
+
     >>> kb = KB()
     >>> kb.__class__
     <class 'zb.KB'>
+    >>> kb = KB(engine='dfs')
     """
-    def __init__(self):
+    def __init__(self, engine='bfs', query_cache_size=0):
+        if engine not in ('bfs', 'dfs'):
+            raise ValueError('engine {} not supported'.format(engine))
+        self._engine = engine
         self.G = nx.MultiDiGraph()
+        self._attributes = AttributeStore(self.G)
+        self._edge_indexes = AttributeIndexes()
+        self._edge_keys = None # (sub, pred, ob) -> [key of each such edge in G], once needed
         self.rules = []
+        self._clause_index = ClauseIndex()
+        self._tables = Tables(self._clause_index)
+        self._datalog = None
+        self.query_cache = QueryCache(query_cache_size)
         self._dont_propagate = False
+        self._propagation_queue = None
+        self._transaction = None
         self._MAX_RECURSION = 1
         self._PROPAGATION_LIMIT = math.inf
+        self._MAX_TABLED_STEPS = 100000
+        self._PARSE_BATCH_SIZE = 10000
         self._global_propagations = 0
         self._neg_examples = []
         self._entity2id = {}
@@ -52,8 +98,13 @@ class KB():
         self._encoded_neg_examples = []
         self._node_cache = {}
         self._edge_cache = {}
+        self._node_rules = NodeRules()
         self._variable_rules = [] # Anything with :- in it.
+        self.last_query_stats = None
+        self.last_load_stats = None
         self._kg_model = None
+        self._kg_model_read_only = False
+        self._wal = None
         self._knn = None
         self._knn_index = []
         self._cuda = False
@@ -127,11 +178,50 @@ class KB():
         """
         self._PROPAGATION_LIMIT = propagations
 
-    def nodes(self, filter_fn=None):
+    def set_propagation_mode(self, mode, priority=None):
+        """Choose how changes to node and edge attributes propagate to watch functions \
+        (and to the rules the nodes affect).
+
+        In 'recursive' mode (the default), a change runs its watchers at once, \
+        so every change they make in turn is a nested call, and a long cascade \
+        can exhaust the Python stack. In 'queue' mode, changes queue their watchers \
+        to be run in a loop once the change that started the cascade is made, \
+        coalescing repeated changes to the same attribute while its watchers wait \
+        (see `PropagationQueue`). The recursion and propagation limits are counted \
+        instead of being the depth of the stack, so they can be set high without \
+        raising Python's own recursion limit.
+
+        :param str mode: 'recursive' or 'queue'
+        :param function priority: In 'queue' mode, optionally, a function of the \
+        node or edge and the name of its attribute that changed, giving the order \
+        to run watchers in, lowest first. Otherwise they're run first in, first out.
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.set_propagation_mode('queue')
+        >>> kb.store('a(b)')
+        0
+        >>> kb.node('b').watch('x', lambda node, prev_val: print(prev_val, node.x))
+        ('x', 0)
+        >>> kb.node('b').x = 1
+        None 1
+        """
+        if mode == 'recursive':
+            if priority is not None:
+                raise ValueError('priority is only for queue mode')
+            self._propagation_queue = None
+        elif mode == 'queue':
+            self._propagation_queue = PropagationQueue(priority)
+        else:
+            raise ValueError('propagation mode {} not supported'.format(mode))
+
+    def nodes(self, filter_fn=None, where=None):
         """Returns the nodes in the current KB, optionally filtered by filter_fn.
         
         :param filter_fn: Function which is passed each of the nodes; only
         nodes for which it returns True will be returned.
+        :param dict where: Conditions on the nodes' attributes, as for `filter`.
         
         :Example:
 
@@ -151,8 +241,11 @@ class KB():
         True
         
         """
-        nodes = self.G.nodes(data=True)
-        for node_name, node_attrs in nodes:
+        if where:
+            node_names = self._select_nodes(where)
+        else:
+            node_names = self.G.nodes
+        for node_name in node_names:
             node = self.node(node_name)
             if filter_fn:
                 if filter_fn(node):
@@ -185,9 +278,14 @@ class KB():
             self._edge_cache[(sub, pred, ob)] = edge
         return edge
     
-    def edges(self, filter_fn=None):
+    def edges(self, filter_fn=None, where=None):
         """Returns edges in the KB, optionally filtered by filter_fn.
 
+        :param filter_fn: Function which is passed each of the edges; only \
+        edges for which it returns True will be returned.
+        :param dict where: Conditions on the edges' attributes, as for `filter`. \
+        `pred` may be one of them.
+
         :Example:
 
         >>> kb = KB()
@@ -200,8 +298,15 @@ class KB():
         >>> kb.edge('tom', 'eats', 'rice').alot = 'every_day_almost'
         >>> list(kb.edges(lambda x: x.alot == 'every_day_almost'))
         [tom___eats___rice]
+        >>> list(kb.edges(where={'alot': 'every_day_almost'}))
+        [tom___eats___rice]
         """
-        edges = self.G.edges(data=True)
+        G = self.G
+        if where:
+            edges = select(where, self._edge_indexes, lambda: G.edges(keys=True), lambda key: G.edges[key])
+            edges = ((sub, ob, G.edges[sub, ob, key]) for sub, ob, key in edges)
+        else:
+            edges = G.edges(data=True)
         for edge in edges:
             edge = self.edge(edge[0], edge[-1]['pred'], edge[1])
             if filter_fn:
@@ -212,9 +317,65 @@ class KB():
     
     @contextmanager
     def dont_propagate(self):
+        was = self._dont_propagate
         self._dont_propagate = True
-        yield self._dont_propagate
-        self._dont_propagate = False
+        try:
+            yield self._dont_propagate
+        finally:
+            self._dont_propagate = was
+
+    @contextmanager
+    def transaction(self):
+        """Make changes to node and edge attributes all at once, when the block ends.
+
+        Until then, changes are only seen by reading attributes from the nodes and \
+        edges themselves (not from `attrs`, or by `filter_fast` or `where`), and no \
+        watch functions run. Then every \
+        change is made, and only after that does each attribute that changed have \
+        its watchers run, once, with the value it had before the transaction. If \
+        the block raises an exception, none of the changes are made. A transaction \
+        inside another is part of it, so takes effect when the outer one ends; if \
+        its block raises, only the changes made in that block are discarded.
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.store('a(b)')
+        0
+        >>> b = kb.node('b')
+        >>> b.x = 1
+        >>> b.watch('x', lambda node, prev_val: print(prev_val, node.x))
+        ('x', 0)
+        >>> with kb.transaction():
+        ...     b.x += 1
+        ...     b.x += 1
+        ...     print(b.x, b.attrs['x'])
+        3 1
+        1 3
+        """
+        if self._transaction is not None:
+            transaction = self._transaction
+            savepoint = transaction.savepoint()
+            try:
+                yield transaction
+            except BaseException:
+                transaction.rollback(savepoint)
+                raise
+            return
+        transaction = self._transaction = Transaction()
+        try:
+            yield transaction
+        finally:
+            self._transaction = None
+        changes = transaction.commit()
+        queue = self._propagation_queue
+        if queue is not None:
+            for target_key, target, attribute, value, prev_val in changes:
+                queue.schedule(target_key, target, attribute, prev_val, drain=False)
+            queue.drain()
+        else:
+            for target_key, target, attribute, value, prev_val in changes:
+                target._propagate(attribute, value, prev_val)
 
     def rule(self, id_or_definition):
         """Get a rule by its id or definition.
@@ -256,16 +417,17 @@ class KB():
         try:
             node = self._node_cache[node_name]
         except KeyError:
-            node = Node(node_name, self.G.nodes(data=True)[node_name])
+            node = Node(node_name, self.G.nodes[node_name])
             self._node_cache[node_name] = node
         return node
 
     def _valid_neighbors(self, node, reverse=False):
+        # The graph keeps the predecessors of each node as well as its successors,
+        # so going against the edges needs no reversed copy of it.
         if reverse:
-            graph = self.G.reverse()
+            neighbors = self.G.pred[node]
         else:
-            graph = self.G
-        neighbors = graph[node]
+            neighbors = self.G[node]
         return [x for x in neighbors.items()]
     
     def neighbors(self, node):
@@ -281,20 +443,47 @@ class KB():
         0
         >>> kb.neighbors('tom')
         [('shamala', [{'pred': 'knows'}])]"""
-        neighbors = self._valid_neighbors(node)
-        l = []
-        for n in neighbors:
-            how = []
-            for rel in n[1]:
-                how.append(n[1][rel])
-            l.append((n[0], how))
-        return l
+        return self.out_neighbors(node)
+
+    def out_neighbors(self, node):
+        """Return the nodes that node has edges to, and the predicates of those \
+        edges. The same as `neighbors`.
+
+        :param str node: Name of the node
+        :return: List[(node_name, List[predicate])]"""
+        return [(n, list(edges.values())) for n, edges in self._valid_neighbors(node)]
+
+    def in_neighbors(self, node):
+        """Return the nodes that have edges to node, and the predicates of those \
+        edges. Like `neighbors`, this takes time in proportion to how many there are.
+
+        :param str node: Name of the node
+        :return: List[(node_name, List[predicate])]
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.store('knows(tom, shamala)')
+        0
+        >>> kb.in_neighbors('shamala')
+        [('tom', [{'pred': 'knows'}])]
+        >>> kb.in_neighbors('tom')
+        []"""
+        return [(n, list(edges.values())) for n, edges in self._valid_neighbors(node, reverse=True)]
     
-    def filter(self, filter_condition, candidate_nodes=None):
+    def filter(self, filter_condition=None, candidate_nodes=None, where=None):
         """Filter (ie query) nodes by attributes.
 
-        :param function filter_condition: Test function
+        Conditions in `where` are declarative, so that attributes with an index \
+        (see `create_index`) are looked up in it rather than tested node by node. \
+        Each attribute's condition is either a value for it to equal, an \
+        `(operator, value)` tuple, with operator one of `==`, `!=`, `<`, `<=`, `>`, \
+        `>=` and `in`, or a list of such tuples, all of which must hold. Nodes \
+        without the attribute don't pass.
+
+        :param function filter_condition: Test function (optional)
         :param List candidate_nodes: Nodes to test (optional; defaults to whole graph)
+        :param dict where: Conditions on attributes (optional)
 
         :Example:
 
@@ -303,9 +492,20 @@ class KB():
         0
         >>> kb.node('tom').cats = 0
         >>> list(kb.filter(lambda x: x['cats'] < 1))
+        [tom]
+        >>> kb.create_index('cats', sorted=True)
+        >>> list(kb.filter(where={'cats': ('<', 1)}))
+        [tom]
+        >>> list(kb.filter(where={'cats': [('>=', 0), ('<', 5)]}))
         [tom]"""
-        if candidate_nodes is None:
+        if where:
+            candidate_nodes = self._select_nodes(where, candidate_nodes)
+        elif candidate_nodes is None:
             candidate_nodes = self.G.nodes
+        if filter_condition is None:
+            for node in candidate_nodes:
+                yield self.node(node)
+            return
         for node in candidate_nodes:
             node = self.node(node)
             try:
@@ -315,23 +515,199 @@ class KB():
                 # maybe node doesn't have the attr set
                 pass
 
+    def _select_nodes(self, where, candidate_nodes=None):
+        G = self.G
+        names = select(where, self._attributes.indexes, lambda: G.nodes, lambda name: G.nodes[name])
+        if candidate_nodes is not None:
+            candidates = set(str(node) for node in candidate_nodes)
+            names = [name for name in names if name in candidates]
+        return names
+
+    def create_index(self, attribute, sorted=False, edges=False):
+        """Index an attribute of nodes (or of edges), so that conditions on it in \
+        `where` filters (see `filter`, `nodes` and `edges`) are found in the \
+        index rather than by testing every node. The index is kept up to date as \
+        the attribute is set and deleted.
+
+        :param str attribute: Attribute to index
+        :param bool sorted: A sorted index, which finds ranges (`<`, `>=` and so on) \
+        by binary search, rather than a hash index, which only finds equal values. \
+        Only numbers and strings are kept in a sorted index.
+        :param bool edges: Index the attribute of edges rather than of nodes
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.from_triples([('tom', 'knows', 'ann'), ('ann', 'knows', 'bob')])
+        >>> kb.node('tom').age = 30
+        >>> kb.node('ann').age = 20
+        >>> kb.create_index('age', sorted=True)
+        >>> kb.node('bob').age = 40
+        >>> list(kb.filter(where={'age': ('>', 25)}))
+        [tom, bob]
+        >>> kb.create_index('pred', edges=True)
+        >>> list(kb.edges(where={'pred': 'knows'}))
+        [tom___knows___ann, ann___knows___bob]"""
+        if edges:
+            G = self.G
+            self._edge_indexes.create(attribute, sorted,
+                                      (((sub, ob, key), data) for sub, ob, key, data in G.edges(keys=True, data=True)))
+        else:
+            self._attributes.indexes.create(attribute, sorted, self.G.nodes(data=True))
+
+    def drop_index(self, attribute, edges=False):
+        """Drop the indexes on an attribute of nodes (or of edges)."""
+        if edges:
+            self._edge_indexes.drop(attribute)
+        else:
+            self._attributes.indexes.drop(attribute)
+
+    def filter_fast(self, filter_fn, attributes):
+        """Filter nodes by numeric attributes, testing all of them at once rather \
+        than one node at a time, as `filter` does.
+
+        The attributes are kept as NumPy arrays, a column for each one (see \
+        `AttributeStore`). `filter_fn` is passed a 2D array with a row for each \
+        node and a column for each of `attributes`, in order, and should return \
+        an array of booleans, one for each row. Only nodes with a number (or \
+        bool) for every one of `attributes` are considered.
+
+        :param function filter_fn: Vectorized test function
+        :param list attributes: Names of the attributes that `filter_fn` tests
+        :return: Generator of the nodes that pass the test
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.from_triples([('tom', 'likes', 'sushi'), ('ann', 'likes', 'tofu')])
+        >>> kb.node('tom').cats = 2
+        >>> kb.node('ann').cats = 0
+        >>> kb.node('ann').dogs = 1
+        >>> list(kb.filter_fast(lambda x: x[:, 0] < 1, attributes=['cats']))
+        [ann]
+        >>> list(kb.filter_fast(lambda x: x[:, 0] + x[:, 1] > 0, attributes=['cats', 'dogs']))
+        [ann]"""
+        if not attributes:
+            raise ValueError('filter_fast needs at least one attribute')
+        values = self._attributes.matrix(attributes)
+        passed = np.asarray(filter_fn(values), dtype=bool) & ~np.isnan(values).any(axis=1)
+        names = self._attributes.names
+        return (self.node(names[i]) for i in np.flatnonzero(passed))
+
+    def simulate(self, step_fn, attributes, steps=1, preds=None, reverse=False, on_step=None, write_back=True):
+        """Run a synchronous simulation over the graph, such as a cellular automaton, \
+        updating every node at once each step with NumPy rather than one at a time.
+
+        The nodes' `attributes` are read into `state`, a 2D array with a row for \
+        each node, in the order of `kb.G`'s nodes, and a column for each attribute. \
+        As for `filter_fast`, values are floats, NaN where a node doesn't have a \
+        number. The graph becomes `adjacency`, a SciPy CSR matrix with a 1 at (i, j) \
+        where node i has an edge to node j, so that, for instance, \
+        `adjacency @ state[:, 0]` sums the first attribute over each node's neighbors. \
+        Each step is then `state = step_fn(state, adjacency)`.
+
+        Nothing is written to the KB until the last step, when the attributes that \
+        changed are set on their nodes (as ints if `step_fn` returns an array of \
+        ints or bools; NaNs are left unset). Watch functions aren't run.
+
+        :param function step_fn: Takes the state and the adjacency matrix and \
+        returns the next state, an array of the same shape
+        :param list attributes: Names of the node attributes in the state
+        :param int steps: Most steps to run
+        :param list preds: If given, only edges with these predicates make neighbors
+        :param bool reverse: Make neighbors of the nodes with edges to each node, \
+        rather than from it
+        :param function on_step: Optional; called with the number of each step, \
+        from 1, and the state after it, e.g. to draw frames. If it returns False, \
+        the simulation stops there.
+        :param bool write_back: Set the final state on the nodes (default True)
+        :return: The final state
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.from_triples([('a', 'next', 'b'), ('b', 'next', 'c')])
+        >>> kb.node('a').level = 1
+        >>> kb.simulate(lambda state, adjacency: (adjacency @ np.nan_to_num(state)).astype(int),
+        ...             ['level'], steps=2, reverse=True).tolist()
+        [[0], [0], [1]]
+        >>> kb.node('c').level
+        1"""
+        if not attributes:
+            raise ValueError('simulate needs at least one attribute')
+        names = list(self.G)
+        initial = state = self._attributes.rows(names, attributes)
+        neighbors = adjacency(self.G, {name: i for i, name in enumerate(names)}, preds=preds, reverse=reverse)
+        for step in range(1, steps + 1):
+            state = np.asarray(step_fn(state, neighbors))
+            if state.shape != initial.shape:
+                raise ValueError('step_fn returned a state of shape {}, not {}'.format(state.shape, initial.shape))
+            if on_step is not None and on_step(step, state) is False:
+                break
+        if write_back:
+            # Bools are written back as ints, like the attributes they usually replace.
+            values = state.astype(int) if state.dtype.kind == 'b' else state
+            for i, j in changed_cells(initial, state):
+                name, key, value = names[i], attributes[j], values[i, j].item()
+                if self._wal is not None:
+                    self._wal.append(['node', name, key, value])
+                self.G.nodes[name][key] = value
+                self._attributes.set(name, key, value)
+        return state
+
 
     def bfs(self, start_node, target_node, max_depth=10, reverse=False):
-        """Find a path from start_node to target_node"""
-        stack = [(start_node, 0, [])]
-        answers = []
-        while stack:
-            node, depth, path = stack.pop(0)
+        """Find a path from start_node to target_node
+
+        Yields every walk of up to `max_depth` edges between them, shortest first, \
+        as lists of `(pred, node)`; nodes may be revisited, so in a graph with \
+        cycles the walks multiply quickly with `max_depth`. To find the shortest \
+        paths, `paths` is much faster."""
+        # Each step links back to the one before, so paths are only built for answers.
+        queue = deque([(start_node, 0, None)])
+        while queue:
+            node, depth, step = queue.popleft()
             if depth >= max_depth:
-                return answers
+                return
             for n, pred in self._valid_neighbors(node, reverse=reverse):
                 if n == target_node:
                     for final_edge in pred:
-                        yield path + [(pred[final_edge]['pred'], n)]
+                        yield unwind((pred[final_edge]['pred'], n, step))
                 else:
                     for edge in pred:
-                        stack.append((n, depth+1, path + [(pred[edge]['pred'], n)]))
-        return answers
+                        queue.append((n, depth+1, (pred[edge]['pred'], n, step)))
+
+    def paths(self, start_node, target_node, max_depth=10, reverse=False, preds=None,
+              exclude_preds=None, limit=None):
+        """Find the shortest paths from start_node to target_node.
+
+        The search runs from both ends at once and visits each node at most once \
+        from each, so it only explores the graph near the two ends, even when the \
+        graph is large and has cycles.
+
+        :param str start_node: Name of the node to start from
+        :param str target_node: Name of the node to get to
+        :param int max_depth: Longest path, in edges, to look for
+        :param bool reverse: Follow edges backwards, from object to subject
+        :param list preds: If given, only follow edges with these predicates
+        :param list exclude_preds: If given, never follow edges with these predicates
+        :param int limit: Most paths to return; None returns all of the shortest.
+        :return: Generator of paths, each a list of `(pred, node)` as for `bfs`
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.from_triples([('a', 'knows', 'b'), ('b', 'knows', 'c'), ('a', 'likes', 'c')])
+        >>> list(kb.paths('a', 'c'))
+        [[('likes', 'c')]]
+        >>> list(kb.paths('a', 'c', exclude_preds=['likes']))
+        [[('knows', 'b'), ('knows', 'c')]]
+        >>> list(kb.paths('c', 'a', reverse=True, preds=['knows']))
+        [[('knows', 'b'), ('knows', 'a')]]
+        """
+        paths = shortest_paths(self.G, str(start_node), str(target_node), max_depth=max_depth,
+                               reverse=reverse, preds=preds, exclude_preds=exclude_preds)
+        return itertools.islice(paths, limit)
 
     def add_node_to_trained_kg(self, sub, pred, ob):
         if (sub not in self._entity2id and ob not in self._entity2id) or (pred not in self._relation2id):
@@ -438,40 +814,56 @@ class KB():
         return pred == 2
 
     def save_all(self, dirname='.'):
-        """Save current KB to the directory specified. Saves the (state dict of the) PyTorch \
-        model as well, if it has been built.
+        """Save current KB to the directory specified, as a versioned columnar snapshot \
+        (see `zincbase.storage.snapshot`): entity and relation names are stored once, \
+        facts as columns of ids, node and edge attributes column by column, and the \
+        KG model's weights, if it has been built, as raw arrays.
 
         :param str dirname: Directory in which to save the files. Creates the directory \
-        if it doesn't already exist."""
-        if not os.path.exists(dirname):
-            os.mkdir(dirname)
-        if self._kg_model:
-            torch.save(self._kg_model.state_dict(), os.path.join(dirname, 'pytorch_model.dict'))
-        zb_dict = {
-            'model_name': self._model_name,
-            'entity2id': self._entity2id,
-            'relation2id': self._relation2id,
-            'encoded_triples': self._encoded_triples,
-            'embedding_size': self._embedding_size,
-            'gamma': self._gamma,
-            'node_attributes': self._node_attributes,
-            'pred_attributes': self._pred_attributes,
-            'attr_loss_to_graph_loss': self._attr_loss_to_graph_loss,
-            'pred_loss_to_graph_loss': self._pred_loss_to_graph_loss,
-            'rules': self.rules
-        }
-        f = open(os.path.join(dirname, 'zb.pkl'), 'wb')
-        pickle.dump(zb_dict, f)
-        f.close()
-        return True
+        if it doesn't already exist.
 
-    def load_all(self, dirname='.', cuda=False):
-        """Load KB (and model, if it exists) from the specified directory.
+        :Example:
 
-        :param str dirname: Directory to load zb.pkl and (if present) pytorch_model.dict
+        >>> import tempfile
+        >>> kb = KB()
+        >>> kb.store('a(b, c)')
+        0
+        >>> kb.node('b').size = 3
+        >>> dirname = tempfile.mkdtemp()
+        >>> kb.save_all(dirname)
+        True
+        >>> kb2 = KB()
+        >>> kb2.load_all(dirname)
+        True
+        >>> list(kb2.query('a(b, X)'))
+        [{'X': 'c'}]
+        >>> kb2.node('b').size
+        3"""
+        return save_snapshot(self, dirname)
+
+    def load_all(self, dirname='.', cuda=False, read_only=False):
+        """Load KB (and model, if it exists) from the specified directory. Snapshots \
+        written by `save_all` are memory mapped and their facts aren't re-parsed; \
+        directories holding a `zb.pkl` from older versions of ZincBase load too.
+
+        :param str dirname: Directory holding the snapshot
         :param bool cuda: If the model exists, it will be loaded - specify if you want \
-        it to be on the GPU."""
-
+        it to be on the GPU.
+        :param bool read_only: For serving only (`get_embedding`, `estimate_triple_prob`, \
+        `get_most_likely` and the like): the model's entity and relation embeddings \
+        are used straight from the snapshot's files, memory mapped copy-on-write, \
+        instead of being read into memory. Processes forked after loading, or \
+        loading the same snapshot, then share one copy of them in the page cache. \
+        The model can't be trained.
+
+        A KB that is being persisted (see `persist`) can't be loaded into, as the \
+        log would miss most of what's loaded: load first, then persist."""
+        if self._wal is not None:
+            raise Exception('Can not load into a KB that is being persisted')
+        if is_snapshot(dirname):
+            return load_snapshot(self, dirname, cuda, read_only)
+        if read_only:
+            raise ValueError('Only snapshots written by `save_all` can be loaded read-only')
         with open(os.path.join(dirname, 'zb.pkl'), 'rb') as f:
             zb_dict = pickle.load(f)
         self._model_name = zb_dict['model_name']
@@ -497,6 +889,58 @@ class KB():
         return True
 
 
+    def persist(self, dirname, fsync_interval=1.0, compact_every=100000):
+        """Keep the KB durable in a directory: from now on its changes (`store`, \
+        bulk loads, `delete_rule`, and setting or deleting node and edge attributes) \
+        are appended to a log there, which is compacted into a snapshot (see \
+        `save_all`) every `compact_every` changes. The cost of durability then grows \
+        with the rate of change rather than with the size of the KB.
+
+        If the KB has been persisted to the directory before, it is first recovered \
+        from there: the last snapshot is loaded and the changes logged since are \
+        replayed, so call this on a new KB. Otherwise the KB as it is now is the \
+        first snapshot.
+
+        :param str dirname: Directory to keep the snapshot and log in
+        :param float fsync_interval: Changes are forced to disk at most this many \
+        seconds after they're made, which is all that a crash of the machine can \
+        lose. With 0, every change is forced to disk as it's made.
+        :param int compact_every: Changes after which to compact the log into a new \
+        snapshot; None to only compact when `compact` is called.
+        :return: The `WriteAheadLog`
+
+        :Example:
+
+        >>> import tempfile
+        >>> dirname = tempfile.mkdtemp()
+        >>> kb = KB()
+        >>> kb.persist(dirname) #doctest: +ELLIPSIS
+        <WriteAheadLog ... generation 1, 0 records>
+        >>> kb.store('a(b, c)')
+        0
+        >>> kb.node('b').size = 3
+        >>> kb.close()
+        >>> kb = KB()
+        >>> kb.persist(dirname) #doctest: +ELLIPSIS
+        <WriteAheadLog ... generation 1, 2 records>
+        >>> list(kb.query('a(b, X)')), kb.node('b').size
+        ([{'X': 'c'}], 3)"""
+        self.close()
+        self._wal = WriteAheadLog(self, dirname, fsync_interval, compact_every).open()
+        return self._wal
+
+    def compact(self):
+        """Compact the log that the KB is persisted to (see `persist`) into a new snapshot."""
+        if self._wal is None:
+            raise Exception('The KB is not being persisted')
+        self._wal.compact()
+
+    def close(self):
+        """Force any changes not yet on disk to it, and stop persisting the KB."""
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
     def build_kg_model(self, cuda=False, embedding_size=256, gamma=24, model_name='RotatE',
                     node_attributes=[], attr_loss_to_graph_loss=1.0, pred_loss_to_graph_loss=1.0,
                     pred_attributes=[]):
@@ -554,6 +998,11 @@ class KB():
                                         attrs, true))
         for neg_example in self._neg_examples:
             self._encoded_neg_examples.append((self._entity2id[neg_example.head], self._relation2id[neg_example.pred], self._entity2id[neg_example.tail]))
+        self._init_kg_model(cuda, len(self._entity2id), len(self._relation2id))
+
+    def _init_kg_model(self, cuda, nentity, nrelation):
+        """Make a new, untrained KG model with the settings given to `build_kg_model`."""
+        model_name = self._model_name
         dee = False; dre = False
         if model_name == 'ComplEx':
             dee = True
@@ -566,17 +1015,18 @@ class KB():
         else:
             device = 'cpu'
         self._kg_model = KGEModel(model_name=model_name,
-                             nentity=len(self._entity2id),
-                             nrelation=len(self._relation2id),
-                             hidden_dim=embedding_size,
-                             gamma=gamma,
+                             nentity=nentity,
+                             nrelation=nrelation,
+                             hidden_dim=self._embedding_size,
+                             gamma=self._gamma,
                              double_entity_embedding=dee,
                              double_relation_embedding=dre,
-                             node_attributes=node_attributes,
-                             pred_attributes=pred_attributes,
-                             attr_loss_to_graph_loss=attr_loss_to_graph_loss,
-                             pred_loss_to_graph_loss=pred_loss_to_graph_loss,
+                             node_attributes=self._node_attributes,
+                             pred_attributes=self._pred_attributes,
+                             attr_loss_to_graph_loss=self._attr_loss_to_graph_loss,
+                             pred_loss_to_graph_loss=self._pred_loss_to_graph_loss,
                              device=device)
+        self._kg_model_read_only = False
         if cuda:
             self._cuda = True
             self._kg_model = self._kg_model.cuda()
@@ -593,6 +1043,8 @@ class KB():
         :param int neg_to_pos: Ratio of generated negative samples to real positive samples
         :param float neg_ratio: How often real/inputted negative examples should appear, vs real pos + generated neg. Smaller (>0) means more often.
         """
+        if self._kg_model_read_only:
+            raise Exception('The KG model was loaded read-only (see `load_all`); build a new one to train')
         if reencode_triples:
             # TODO: this is not encoding attributes as well, yet.
             triples = self.to_triples(data=True)
@@ -784,14 +1236,42 @@ class KB():
             retvals.append({'prob': round(expit(float(probs[i])), 4), 'triple': triple})
         return retvals
 
-    def _search(self, term):
+    def _search(self, term, stats):
+        stats.start()
+        if stats.limit is not None and stats.limit <= 0:
+            stats.cutoff = 'limit'
+            return
+        cache = self.query_cache
+        answers = found = None
+        if cache.maxsize:
+            key, names = cache.key(term)
+            answers = cache.get(key, names)
+            stats.cached = answers is not None
+            found = None if stats.cached else []
+            version = cache.version
+        if answers is None:
+            if self._engine == 'dfs':
+                answers = Resolver(self._tables.candidates).solve(term, stats)
+            else:
+                answers = self._bfs_search(term, stats)
+        for answer in answers:
+            if found is not None:
+                found.append(True if answer is True else dict(answer))
+            more = stats.found()
+            yield answer
+            if not more:
+                return
+        stats.finish()
+        if found is not None and stats.exhausted:
+            cache.put(key, names, found, stats.predicates, version)
+
+    def _bfs_search(self, term, stats):
         head_goal = Goal(Rule("x(y):-x(y)"))
         head_goal.rule.goals = [term]
         queue = deque([head_goal])
-        iterations = 0
-        max_iterations = max(100, (len(self.rules) + 1) ** 1.5)
-        while queue and iterations < max_iterations:
-            iterations += 1
+        while queue:
+            if not stats.step():
+                return
             c = queue.popleft()
             if c.idx >= len(c.rule.goals):
                 if not c.parent:
@@ -807,12 +1287,8 @@ class KB():
                 queue.append(parent)
                 continue
             term = c.rule.goals[c.idx]
-            pred = term.pred
-            for rule in self.rules:
-                if rule.head.pred != term.pred:
-                    continue
-                if len(rule.head.args) != len(term.args):
-                    continue
+            bindings = c.bindings
+            for rule in self._tables.candidates(term, lambda var: bindings.get(var.pred), stats):
                 child = Goal(rule, c)
                 ans = unify(term, c.bindings, rule.head, child.bindings)
                 if ans:
@@ -834,11 +1310,20 @@ class KB():
         """
         try:
             if isinstance(rule_idx, str) and rule_idx[0] == '~':
-                rule_idx = int(rule_idx[1:])
-                self._neg_examples.pop(rule_idx)
+                self._neg_examples.pop(int(rule_idx[1:]))
+                if self._wal is not None:
+                    self._wal.append(['delete', rule_idx])
                 return True
             rule = self.rules.pop(rule_idx)
-            self._variable_rules = [x for x in self._variable_rules if str(x) != str(rule)]
+            if self._wal is not None:
+                self._wal.append(['delete', rule_idx])
+            self._clause_index.remove(rule)
+            self._node_rules.remove(rule)
+            self._tables.invalidate(rule.head.pred)
+            self.query_cache.invalidate(rule.head.pred)
+            self._variable_rules = [x for x in self._variable_rules if x is not rule]
+            if self._datalog is not None and fact_of(rule):
+                self._datalog.remove_fact(*fact_of(rule))
             return True
         except:
             return False
@@ -863,7 +1348,12 @@ class KB():
         """Query the KB (with Prolog) and 'solidify' facts in the KB, making them part
         of the graph, so that the NN can be trained.
 
+        When the rules for `predicate` (and those they rely on) are plain Datalog, i.e. \
+        they only use atoms and variables, this is done bottom-up with `Datalog`, \
+        which finds every answer in one pass. Otherwise the KB is queried for `predicate(X, Y)`.
+
         :param str predicate: A predicate (that's a rule not a fact otherwise what's the point)
+        :return: The number of facts stored
 
         :Example:
 
@@ -883,20 +1373,117 @@ class KB():
         >>> kb.to_triples()
         [('tom', 'is', 'human'), ('shamala', 'has_part', 'head'), ('shamala', 'is', 'human')]
         """
+        by_head = defaultdict(list)
+        for rule in self.rules:
+            if rule.goals:
+                by_head[rule.head.pred].append(rule)
+        datalog = Datalog()
+        preds = [predicate]
+        seen = set(preds)
+        evaluable = True
+        while preds and evaluable:
+            for rule in by_head[preds.pop()]:
+                evaluable = evaluable and datalog.add_rule(rule)
+                for goal in rule.goals:
+                    if goal.pred not in seen:
+                        seen.add(goal.pred)
+                        preds.append(goal.pred)
+        if evaluable:
+            for rule in self.rules:
+                fact = fact_of(rule)
+                if fact and fact[0] in seen:
+                    datalog.add_fact(*fact)
+            derived = [x for x in datalog.run() if x[0] == predicate and len(x[1]) == 2]
+            return self._store_derived(derived)
         answers = self.query('{}(X, Y)'.format(predicate))
         i = 0
-        rule_strings = [str(x) for x in self.rules]
+        rule_strings = set(str(x) for x in self.rules)
         for a in answers:
             as_string = '{}({}, {})'.format(predicate, a['X'], a['Y'])
             if not as_string in rule_strings:
                 i += 1
+                rule_strings.add(as_string)
                 self.store(as_string)
         return i
 
-    def query(self, statement):
+    def materialize(self, incremental=False):
+        """Derive and store every fact that follows from the KB's rules, bottom-up \
+        and to a fixpoint, using semi-naive evaluation (see `Datalog`). Only rules \
+        in the Datalog subset (atoms and variables only) take part.
+
+        :param bool incremental: If True, keep the results up to date: from now on, \
+        each fact or rule that is stored has its consequences derived and stored \
+        too. Deleting a fact does not retract what was derived from it. The \
+        facts derived are logged like any other by a KB that is persisted (see \
+        `persist`), but keeping them up to date is not: after recovering the KB, \
+        call this again to carry on.
+        :return: The number of facts stored
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.store('parent(tom, bob)')
+        0
+        >>> kb.store('parent(bob, ann)')
+        1
+        >>> kb.store('ancestor(X, Y) :- parent(X, Y)')
+        2
+        >>> kb.store('ancestor(X, Y) :- parent(X, Z), ancestor(Z, Y)')
+        3
+        >>> kb.materialize(incremental=True)
+        3
+        >>> kb.store('parent(ann, joe)')
+        7
+        >>> kb.to_triples()[-3:]
+        [('ann', 'ancestor', 'joe'), ('bob', 'ancestor', 'joe'), ('tom', 'ancestor', 'joe')]"""
+        datalog = Datalog()
+        for rule in self.rules:
+            if rule.goals:
+                datalog.add_rule(rule)
+            else:
+                fact = fact_of(rule)
+                if fact:
+                    datalog.add_fact(*fact)
+        self._datalog = None
+        stored = self._store_derived(datalog.run())
+        if incremental:
+            self._datalog = datalog
+        return stored
+
+    def _store_derived(self, facts):
+        # Logged like any other fact: replaying the log doesn't derive anything.
+        for pred, args in facts:
+            self._store('{}({})'.format(pred, ','.join(args)), None, log=True)
+        return len(facts)
+
+    def _update_materialized(self, rule):
+        datalog = self._datalog
+        # What it derives is stored below, and is already known to it.
+        self._datalog = None
+        try:
+            if rule.goals:
+                derived = datalog.run() if datalog.add_rule(rule) else []
+            else:
+                fact = fact_of(rule)
+                derived = datalog.run([fact]) if fact and datalog.add_fact(*fact) else []
+            self._store_derived(derived)
+        finally:
+            self._datalog = datalog
+
+    def query(self, statement, max_steps=None, timeout_ms=None, limit=None):
         """Query the KB.
 
+        How far the query got is recorded in `kb.last_query_stats` (a `QueryStats`), \
+        which is updated as the generator is consumed: its `steps`, `answers` and \
+        `elapsed_ms`, whether the answers were `exhausted`, and if not, the `cutoff` \
+        that stopped the search ('max_steps', 'timeout' or 'limit').
+
         :param str statement: A rule to query on.
+        :param int max_steps: Resolution steps after which to give up, counting \
+        those spent filling tables (see `table`). Defaults to a budget that grows \
+        with the size of the KB, with a separate, larger one for filling tables.
+        :param float timeout_ms: Milliseconds after which to give up, if any.
+        :param int limit: Maximum number of answers to return, if any.
         :return: Generator of alternative bindings to variables that match the query
 
         :Example:
@@ -907,8 +1494,58 @@ class KB():
         >>> kb.query('a(X)') #doctest: +ELLIPSIS
         <generator object KB._search at 0x...>
         >>> list(kb.query('a(X)'))
-        [{'X': 'a'}]"""
-        return self._search(Term(strip_all_whitespace(statement)))
+        [{'X': 'a'}]
+        >>> kb.last_query_stats.exhausted
+        True
+        >>> kb.store('a(b)')
+        1
+        >>> list(kb.query('a(X)', limit=1))
+        [{'X': 'a'}]
+        >>> kb.last_query_stats.cutoff
+        'limit'"""
+        max_tabled_steps = None
+        if max_steps is None:
+            max_steps = max(100, (len(self.rules) + 1) ** 1.5)
+            max_tabled_steps = self._MAX_TABLED_STEPS
+        stats = QueryStats(statement, max_steps, timeout_ms=timeout_ms, limit=limit,
+                           max_tabled_steps=max_tabled_steps)
+        self.last_query_stats = stats
+        return self._search(Term(strip_all_whitespace(statement)), stats)
+
+    def table(self, predicate):
+        """Declare a predicate as tabled. Answers to calls of a tabled predicate are \
+        worked out once per call pattern and remembered, until a fact or rule \
+        they depend on is stored or deleted. Recursive rules over cyclic data then \
+        terminate with every answer, instead of running until the query's step budget \
+        is spent, and repeat queries are answered straight from the table.
+
+        Filling tables counts against the query's step budget. A query whose \
+        budget runs out while filling them is cut off with the answers found so \
+        far, and the tables, still incomplete, carry on from there when next queried.
+
+        :param str predicate: The predicate to table
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.table('path')
+        >>> kb.store('path(X, Y) :- path(X, Z), edge(Z, Y)')
+        0
+        >>> kb.store('path(X, Y) :- edge(X, Y)')
+        1
+        >>> kb.store('edge(a, b)')
+        2
+        >>> kb.store('edge(b, a)')
+        3
+        >>> sorted(x['Y'] for x in kb.query('path(a, Y)'))
+        ['a', 'b']"""
+        self._tables.add(predicate)
+        self.query_cache.clear()
+
+    def untable(self, predicate):
+        """Stop tabling a predicate (see `table`)."""
+        self._tables.remove(predicate)
+        self.query_cache.clear()
 
     def store(self, statement, node_attributes=[], edge_attributes={}):
         """Store a fact/rule in the KB
@@ -935,6 +1572,14 @@ class KB():
         >>> list(kb.query('node(What)'))
         [{'What': 'x'}]"""
         statement = strip_all_whitespace(statement)
+        rule_id = self._store(statement, None, node_attributes, edge_attributes, log=True)
+        if self._wal is not None:
+            self._wal.compact_if_due()
+        return rule_id
+
+    def _store(self, statement, parsed, node_attributes=[], edge_attributes={}, log=False):
+        """Store a fact or rule, as `store` does. With `log`, write it to the KB's \
+        log, if it has one, before the facts that materializing derives from it."""
         if 'truthiness' in edge_attributes and edge_attributes['truthiness'] < 0:
             if statement[0] != '~':
                 statement = '~' + statement
@@ -947,9 +1592,20 @@ class KB():
             if not triple[2] in self._entity2id:
                 self._entity2id[triple[2]] = len(self._entity2id)
             self._neg_examples.append(Negative(statement[1:]))
+            if log and self._wal is not None:
+                self._wal.extend([['store', statement, node_attributes, edge_attributes]])
             return '~' + str(len(self._neg_examples) - 1)
-        rule = Rule(statement)
+        rule = Rule(statement, parsed=parsed)
+        self._add_term_to_graph(rule.head)
+        for goal in rule.goals:
+            self._add_term_to_graph(goal)
+        if rule.goals:
+            self._variable_rules.append(rule)
         self.rules.append(rule)
+        self._clause_index.add(rule)
+        self._node_rules.add(rule)
+        self._tables.invalidate(rule.head.pred)
+        self.query_cache.invalidate(rule.head.pred)
 
         if edge_attributes:
             if ':-' in statement:
@@ -958,15 +1614,65 @@ class KB():
                 """)
             parts = split_to_parts(statement)
             if parts[2] is not None:
-                for idx, edge in self.G[parts[0]][parts[2]].items():
-                    if edge['pred'] == parts[1]:
-                        nx.set_edge_attributes(self.G, {(parts[0], parts[2], idx): edge_attributes})
+                edges = self.G[parts[0]][parts[2]]
+                for idx in self._edge_keys_of(parts[0], parts[1], parts[2]):
+                    edges[idx].update(edge_attributes)
+                    self._edge_indexes.update((parts[0], parts[2], idx), edge_attributes)
         if node_attributes:
             parts = split_to_parts(statement)
             nx.set_node_attributes(self.G, {parts[0]: node_attributes[0]})
+            self._attributes.update(parts[0], node_attributes[0])
             if parts[2] is not None:
                 nx.set_node_attributes(self.G, {parts[2]: node_attributes[1]})
-        return len(self.rules) - 1
+                self._attributes.update(parts[2], node_attributes[1])
+        rule_idx = len(self.rules) - 1
+        if log and self._wal is not None:
+            self._wal.extend([['store', statement, node_attributes, edge_attributes]])
+        if self._datalog is not None:
+            self._update_materialized(rule)
+        return rule_idx
+
+    def _add_term_to_graph(self, term):
+        """Add the arguments of `term`, and of every term nested in it, to the graph: \
+        each pair of arguments of a term becomes an edge, labelled with the term's predicate."""
+        stack = [(term, False)]
+        while stack:
+            term, args_done = stack.pop()
+            if not term.args:
+                continue
+            if args_done:
+                self._link_term_args(term)
+            else:
+                stack.append((term, True))
+                stack.extend((arg, False) for arg in reversed(term.args))
+
+    def _link_term_args(self, term):
+        for i, arg in enumerate(term.args):
+            str_arg = str(arg)
+            added_node_1 = False
+            if not self.G.has_node(str_arg):
+                self.G.add_node(str_arg)
+                added_node_1 = True
+            for arg2 in term.args[i+1:]:
+                added_node_2 = False
+                if not self.G.has_node(str(arg2)):
+                    self.G.add_node(str(arg2))
+                    added_node_2 = True
+                self._add_edge(str_arg, str(arg2), term.pred)
+                if added_node_1:
+                    node = self.node(str(arg2))
+                    try:
+                        if not self._dont_propagate:
+                            node._new_neighbor_fn(str(arg))
+                    except Exception as e:
+                        pass
+                if added_node_2:
+                    node = self.node(str_arg)
+                    try:
+                        if not self._dont_propagate:
+                            node._new_neighbor_fn(str(arg2))
+                    except Exception as e:
+                        pass
 
     def to_tensorboard_projector(self, embeddings_filename, labels_filename, filter_fn=None):
         """Convert the KB's trained embeddings to 2 files suitable for \
@@ -1044,8 +1750,201 @@ class KB():
                         triples.append((subject, r.head.pred, object_))
         return triples
 
+    def bulk_load(self, rows, batch_size=10000):
+        """Store many facts at once, much faster than calling `store` for each.
+
+        Rows are parsed a batch at a time, their edges are added to the graph \
+        together, and the entity and relation ids used by the KG model are \
+        assigned as they go. Callbacks for nodes gaining new neighbors are run \
+        once the whole load is done. Negative examples, facts whose arguments \
+        aren't plain atoms, and loads into a KB that is being kept materialized \
+        (see `materialize`) are stored one at a time, as `store` would.
+
+        :param iterable rows: Tuples of `(subject, pred, object)`, optionally followed by \
+        `node_attributes` and `edge_attributes` as for `store`.
+        :param int batch_size: How many rows to parse and add at a time
+        :return: dict with the number of `rows` stored, the `seconds` taken and `rows_per_sec`. \
+        It is also kept in `kb.last_load_stats`.
+
+        :Example:
+
+        >>> kb = KB()
+        >>> kb.bulk_load([('tom', 'knows', 'ann'), ('ann', 'knows', 'bob')])['rows']
+        2
+        >>> list(kb.query('knows(tom, X)'))
+        [{'X': 'ann'}]"""
+        return self._load_batches(self._parse_batches(rows, batch_size))
+
+    def _load_batches(self, batches):
+        """Store batches of already parsed `(statement, (head, goals), node_attributes, \
+        edge_attributes)` items, as `bulk_load` does."""
+        start = time.time()
+        gc_was_enabled = gc.isenabled()
+        # Loading makes many objects and frees none, which would only make the cycle collector run over and over.
+        gc.disable()
+        try:
+            count = self._bulk_load(batches)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if self._wal is not None:
+            self._wal.compact_if_due()
+        seconds = time.time() - start
+        self.last_load_stats = {'rows': count, 'seconds': seconds,
+                                'rows_per_sec': count / seconds if seconds else math.inf}
+        return self.last_load_stats
+
+    def _bulk_load(self, batches):
+        watched = set(n for n, data in self.G.nodes(data=True) if '_new_neighbor_fn' in data)
+        new_neighbors = []
+        predicates = set()
+        objects = []
+        count = 0
+        for batch in batches:
+            edges = []
+            done = 0
+            # Items up to `logged` have been written to the log, which must have them in the order they're stored.
+            logged = 0
+            try:
+                for statement, parsed, node_attributes, edge_attributes in batch:
+                    head = parsed[0]
+                    if (self._datalog is not None or edge_attributes.get('truthiness', 0) < 0 or parsed[1]
+                            or len(head.args) != 2 or not all(arg.is_atom for arg in head.args)):
+                        self._add_edges(edges, watched, new_neighbors)
+                        edges = []
+                        if self._wal is not None:
+                            self._wal.extend(['store', item[0], item[2], item[3]] for item in batch[logged:done])
+                        logged = done
+                        self._store(statement, parsed, node_attributes, edge_attributes, log=True)
+                        done += 1
+                        logged = done
+                        continue
+                    rule = Rule(statement, parsed=parsed)
+                    self.rules.append(rule)
+                    self._clause_index.add(rule)
+                    self._node_rules.add(rule)
+                    predicates.add(head.pred)
+                    sub, ob = head.args[0].pred, head.args[1].pred
+                    if sub not in self._entity2id:
+                        self._entity2id[sub] = len(self._entity2id)
+                    if head.pred not in self._relation2id:
+                        self._relation2id[head.pred] = len(self._relation2id)
+                    objects.append(ob)
+                    edge = {'pred': head.pred}
+                    edge.update(edge_attributes)
+                    edges.append((sub, ob, edge, node_attributes))
+                    done += 1
+            finally:
+                self._add_edges(edges, watched, new_neighbors)
+                count += done
+                if self._wal is not None:
+                    self._wal.extend(['store', item[0], item[2], item[3]] for item in batch[logged:done])
+        for ob in objects:
+            if ob not in self._entity2id:
+                self._entity2id[ob] = len(self._entity2id)
+        for pred in predicates:
+            self._tables.invalidate(pred)
+            self.query_cache.invalidate(pred)
+        if not self._dont_propagate:
+            for node, neighbor in new_neighbors:
+                try:
+                    self.node(node)._new_neighbor_fn(neighbor)
+                except Exception as e:
+                    pass
+        return count
+
+    def _parse_batches(self, rows, batch_size):
+        leaves = {}
+        batch = []
+        for row in itertools.chain(rows, [None]):
+            if row is not None:
+                batch.append(row)
+                if len(batch) < batch_size:
+                    continue
+            yield [(statement, parsed, row[3] if len(row) > 3 else [], row[4] if len(row) > 4 else {})
+                   for row, (statement, parsed) in zip(batch, self._parse_rows(batch, leaves))]
+            batch = []
+
+    @staticmethod
+    def _parse_rows(batch, leaves):
+        """The statement and (head, goals) of each `(subject, pred, object, ...)` row. \
+        Rows of plain names are made into terms directly, sharing the terms in `leaves`; \
+        the rest are parsed."""
+        parsed = [None] * len(batch)
+        others = []
+        for i, row in enumerate(batch):
+            sub, pred, ob = row[0], row[1], row[2]
+            if _PLAIN_NAME.match(sub) and _PLAIN_NAME.match(pred) and _PLAIN_NAME.match(ob):
+                args = []
+                for name in (sub, ob):
+                    leaf = leaves.get(name)
+                    if leaf is None:
+                        leaf = leaves[name] = build_term(name, ())
+                    args.append(leaf)
+                parsed[i] = ('{}({},{})'.format(pred, sub, ob), (build_term(pred, args), []))
+            else:
+                others.append(i)
+        statements = [strip_all_whitespace('{}({},{})'.format(batch[i][1], batch[i][0], batch[i][2])) for i in others]
+        for i, statement, rule in zip(others, statements, parse_many(statements)):
+            parsed[i] = (statement, rule)
+        return parsed
+
+    def _add_edge(self, sub, ob, pred):
+        """Add one edge to the graph, keeping the indexes on edges up to date.
+
+        :return: The edge's key"""
+        key = self.G.add_edge(sub, ob, pred=pred)
+        if self._edge_indexes:
+            self._edge_indexes.update((sub, ob, key), {'pred': pred})
+        if self._edge_keys is not None:
+            self._edge_keys.setdefault((sub, pred, ob), []).append(key)
+        return key
+
+    def _edge_keys_of(self, sub, pred, ob):
+        """The keys in the graph of the edges from `sub` to `ob` labelled `pred`, \
+        in the order they were added. The same list is returned each time, and \
+        grows as more such edges are added."""
+        if self._edge_keys is None:
+            # Only built once it's needed, so KBs that never look edges up don't keep it.
+            self._edge_keys = {}
+            for s, o, key, p in self.G.edges(keys=True, data='pred'):
+                self._edge_keys.setdefault((s, p, o), []).append(key)
+        return self._edge_keys.setdefault((sub, pred, ob), [])
+
+    def _add_edges(self, edges, watched, new_neighbors):
+        """Add (sub, ob, edge data, node_attributes) edges to the graph, noting which \
+        watched nodes get a neighbor that is new to the graph."""
+        G = self.G
+        if watched:
+            for sub, ob, _, _ in edges:
+                sub_is_new = sub not in G
+                if ob not in G and sub in watched:
+                    new_neighbors.append((sub, ob))
+                if sub_is_new and ob in watched:
+                    new_neighbors.append((ob, sub))
+                G.add_node(sub)
+                G.add_node(ob)
+        keys = G.add_edges_from((sub, ob, edge) for sub, ob, edge, _ in edges)
+        if self._edge_indexes:
+            for (sub, ob, edge, _), key in zip(edges, keys):
+                self._edge_indexes.update((sub, ob, key), edge)
+        edge_keys = self._edge_keys
+        if edge_keys is not None:
+            for (sub, ob, edge, _), key in zip(edges, keys):
+                found = edge_keys.get((sub, edge['pred'], ob))
+                if found is None:
+                    edge_keys[(sub, edge['pred'], ob)] = [key]
+                else:
+                    found.append(key)
+        for sub, ob, _, node_attributes in edges:
+            if node_attributes:
+                G.nodes[sub].update(node_attributes[0])
+                G.nodes[ob].update(node_attributes[1])
+                self._attributes.update(sub, node_attributes[0])
+                self._attributes.update(ob, node_attributes[1])
+
     def from_triples(self, triples):
-        """Stores facts from a list of tuples into the KB.
+        """Stores facts from a list of tuples into the KB (see `bulk_load`).
 
         :param list triples: List of tuples each of the form `(subject, pred, object)`
 
@@ -1055,8 +1954,7 @@ class KB():
         >>> kb.from_triples([('b', 'a', 'c')])
         >>> len(list(kb.query('a(b, c)')))
         1"""
-        for (u, p, v) in triples:
-            self.store('{}({},{})'.format(p, u, v))
+        self.bulk_load(triples, batch_size=self._PARSE_BATCH_SIZE)
 
     def to_csv(self, csvfile, delimiter=','):
         """Saves a knowledge base to a CSV file.
@@ -1072,15 +1970,22 @@ class KB():
                 rule = split_to_parts(str(rule.head))
                 _sub = self.node(rule[0])
                 _ob = self.node(rule[2])
-                _sub_attrs = json.dumps(_sub.attrs)
-                _ob_attrs = json.dumps(_ob.attrs)
-                _edge_attrs = json.dumps(self.edge(str(_sub), rule[1], str(_ob)).attrs)
+                # `default` turns the attribute views into dicts.
+                _sub_attrs = json.dumps(_sub.attrs, default=dict)
+                _ob_attrs = json.dumps(_ob.attrs, default=dict)
+                _edge_attrs = json.dumps(self.edge(str(_sub), rule[1], str(_ob)).attrs, default=dict)
                 f.writerow([_sub, rule[1], _ob, _sub_attrs, _ob_attrs, _edge_attrs])
 
 
-    def from_csv(self, csvfile, header=None, start=0, size=None, delimiter=','):
+    def from_csv(self, csvfile, header=None, start=0, size=None, delimiter=',',
+                 workers=0, chunk_size=10000, verbose=False):
         """Reads a knowledge base into memory from a CSV file.
 
+        The file is streamed a chunk of rows at a time, so memory use while \
+        reading depends on `chunk_size`, not on the size of the file. With \
+        `workers`, the rows are cleansed (and their attributes decoded) in that \
+        many processes, leaving only the storing to this one (see `bulk_load`).
+
         :param str csvfile: Filename to read. File is a number of rows separated
         by delimiter, in the basic format `subject,predicate,object`. Optionally,
         the row may have 3 more columns: `subject_attributes`, `object_attributes`
@@ -1089,6 +1994,9 @@ class KB():
         :param int start: Aside from the header row, number of subsequent rows to ignore
         :param int size: How many rows after which to stop reading, or None if never.
         :param str delimiter: Default is `','`; try `'\t'` for tab delimited.
+        :param int workers: Number of processes to cleanse rows in, or 0 to do it in this one
+        :param int chunk_size: Rows to read, cleanse and store at a time
+        :param bool verbose: Show a progress bar with the number of rows stored and rows/sec
 
         :Example:
         
@@ -1107,20 +2015,25 @@ class KB():
             while i < start:
                 i += 1
                 next(reader, None)
-            i = 0
-            for row in reader:
-                pred = cleanse(row[1])
-                sub = cleanse(row[0])
-                ob = cleanse(row[2])
-                if not (sub.replace('_','').isalnum() and ob.replace('_','').isalnum()):
-                    continue
-                if len(row) > 3:
-                    node_attributes = [json.loads(row[3]), json.loads(row[4])]
-                    edge_attributes = json.loads(row[5])
-                else:
-                    node_attributes = []
-                    edge_attributes = {}
-                self.store('{}({},{})'.format(pred, sub, ob), node_attributes=node_attributes, edge_attributes=edge_attributes)
-                i += 1
-                if size and i > size:
-                    break
+            chunks = iter(lambda: list(itertools.islice(reader, chunk_size)), [])
+            if workers:
+                chunks = self._cleanse_in_parallel(chunks, workers)
+            else:
+                chunks = map(cleanse_rows, chunks)
+            rows = itertools.chain.from_iterable(chunks)
+            if size:
+                rows = itertools.islice(rows, size + 1)
+            self.bulk_load(tqdm(rows, unit=' rows', disable=not verbose), batch_size=chunk_size)
+
+    @staticmethod
+    def _cleanse_in_parallel(chunks, workers):
+        """Yield `cleanse_rows` of each chunk, in order, from a pool of processes. \
+        Only a couple of chunks per process are read ahead of what has been yielded."""
+        with multiprocessing.Pool(workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(cleanse_rows, (chunk,)))
+                if len(pending) > 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()